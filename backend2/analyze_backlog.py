@@ -0,0 +1,44 @@
+"""
+Analyze the Threads campaign backlog offline (rows with posts but no report).
+
+    python analyze_backlog.py                     # OpenAI, reports delivered by the app's job queue
+    python analyze_backlog.py --no-notify         # store reports only, users see them on /start
+    python analyze_backlog.py --backend stub      # canned reports, no OpenAI calls (implies --no-notify)
+"""
+import argparse
+import asyncio
+import sys
+
+from services.analysis_batch import BatchAnalyzer, OpenAIBackend, StubBackend, BATCH_CONCURRENCY, BATCH_SIZE
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Batch Threads profile analysis")
+    parser.add_argument("--backend", choices=["openai", "stub"], default="openai", help="Analysis backend")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Analyses in flight")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows claimed and written per round")
+    parser.add_argument("--limit", type=int, default=None, help="Max rows to process")
+    parser.add_argument("--notify", action=argparse.BooleanOptionalAction, default=None,
+                        help="Queue report delivery to users (default: on for openai, off for stub)")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Seconds per stub analysis")
+    args = parser.parse_args()
+
+    from models.database import async_session, engine
+
+    if args.backend == "stub":
+        backend = StubBackend(latency=args.stub_latency)
+    else:
+        backend = OpenAIBackend(async_session)
+    notify = args.notify if args.notify is not None else args.backend != "stub"
+
+    try:
+        analyzer = BatchAnalyzer(async_session, backend, concurrency=args.concurrency,
+                                 batch_size=args.batch_size, notify=notify)
+        stats = await analyzer.run(limit=args.limit)
+        print(f"Backlog analysis completed: {stats}", file=sys.stderr)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 # Import required libraries and modules
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from contextlib import asynccontextmanager
@@ -15,6 +16,10 @@ from core.config import Settings
 from models.database import init_db, engine, Base
 from migrations.migrate import run_migrations
 from core.cache import setup_cache
+from core.upstream import close_http_session
+from core.startup import startup_tracker
+from services.threads_job_queue import threads_job_queue
+from core.cache import CacheKeys
 import aiohttp
 
 # Initialize application settings from environment variables
@@ -72,16 +77,18 @@ async def lifespan(app: FastAPI):
         app: FastAPI application instance
     """
     # Initialize Cache
-    app.state.cache = setup_cache()
+    with startup_tracker.phase("cache"):
+        app.state.cache = setup_cache()
     logger.info("Cache initialized")
 
     # Initialize Redis service with async client
     # We use both aiocache (app.state.cache) and direct async Redis client (app.state.redis)
     # Direct Redis client is used as fallback when cache is unavailable
-    redis = RedisService.create(settings.REDIS_HOST, settings.REDIS_PORT)
-    app.state.redis = redis.redis  # Async Redis client instance
-    app.state.redis_service = redis  # Store service instance for fallback operations
-    app.state.redis_service.cache = app.state.cache  # Connect cache to service for primary operations
+    with startup_tracker.phase("redis"):
+        redis = RedisService.create(settings.REDIS_HOST, settings.REDIS_PORT)
+        app.state.redis = redis.redis  # Async Redis client instance
+        app.state.redis_service = redis  # Store service instance for fallback operations
+        app.state.redis_service.cache = app.state.cache  # Connect cache to service for primary operations
 
     # Set up database connection and session manager
     engine = create_async_engine(settings.DATABASE_URL)
@@ -90,23 +97,34 @@ async def lifespan(app: FastAPI):
 
     # Initialize database tables
     logger.info("Initializing database...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    with startup_tracker.phase("create_all"):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
 
     # Set up and start the task scheduler with new cache
-    scheduler = SchedulerService(app.state.cache, async_session)
-    app.state.scheduler = scheduler
-    await scheduler.start()
+    # Initial tasks (leaderboard rebuild, metrics) run in background, see /ready
+    # Redis client is used for scheduler leader election between workers
+    with startup_tracker.phase("scheduler_start"):
+        scheduler = SchedulerService(app.state.cache, async_session, app.state.redis)
+        app.state.scheduler = scheduler
+        await scheduler.start()
+
+    # Threads analysis workers run in every process, jobs are shared through Postgres
+    await threads_job_queue.start(async_session, app.state.cache)
 
     # Set up Telegram webhook
     # webhook_success = await setup_telegram_webhook()
     # if not webhook_success:
     #     logger.warning("Failed to set up Telegram webhook - bot may not receive updates")
 
+    startup_tracker.mark_serving()
+
     yield
 
     # Cleanup resources on shutdown
     await scheduler.stop()
+    await threads_job_queue.stop()
+    await close_http_session()
     await engine.dispose()
     await app.state.redis.close()
     await app.state.cache.close()
@@ -147,6 +165,33 @@ async def root():
     """
     return {"status": "ok", "message": "Tetrix Hospital Bot is running"}
 
+# Readiness endpoint
+@app.get("/ready")
+async def ready(request: Request):
+    """
+    Readiness check: app serves traffic and caches are warm
+    (metrics document stored and leaderboard snapshot populated)
+    Returns:
+        JSONResponse: 200 when ready, 503 with startup details otherwise
+    """
+    if not startup_tracker.is_ready("metrics", "leaderboard"):
+        # Warm-up may be done by another worker (scheduler leader), so check shared state
+        try:
+            if await request.app.state.cache.get(CacheKeys.METRICS):
+                startup_tracker.mark_ready("metrics")
+            async with request.app.state.async_session() as session:
+                result = await session.execute(text("SELECT EXISTS (SELECT 1 FROM leaderboard_snapshots)"))
+                if result.scalar():
+                    startup_tracker.mark_ready("leaderboard")
+        except Exception as e:
+            logger.error(f"Readiness check failed: {e}")
+
+    is_ready = startup_tracker.is_ready("metrics", "leaderboard")
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, **startup_tracker.status()}
+    )
+
 if __name__ == "__main__":
     # Run the application server (development mode)
     uvicorn.run(
@@ -0,0 +1,121 @@
+"""
+Benchmark TON Connect proof verification.
+
+    python bench_ton_proof.py                 # 2000 proofs, sync vs. async through the proof executor
+    python bench_ton_proof.py -n 5000 -c 200  # more proofs, 200 concurrent logins
+
+Proofs are signed locally by a generated v4r2 wallet, no network needed. Besides
+verifications per second, the async run reports the worst event loop stall, which is
+what concurrent requests feel while proofs are verified.
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from base64 import b64encode
+
+import nacl.signing
+from tonsdk.contract.wallet import Wallets, WalletVersionEnum
+from tonsdk.utils import Address
+
+from services.ton_proof_service import (
+    TonProofService, TON_PROOF_PREFIX, TON_CONNECT_PREFIX, PROOF_WORKERS, parse_state_init
+)
+
+DOMAIN = "localhost"
+
+
+def make_proof(payload: str, signing_key: nacl.signing.SigningKey = None) -> dict:
+    """
+    Signed proof of a fresh wallet, shaped like the /ton-connect/proof request.
+    With signing_key the proof is signed and presented with that key instead of the wallet's (a forgery).
+    """
+    _, public_key, private_key, wallet = Wallets.create(WalletVersionEnum.v4r2, workchain=0)
+    state_init = wallet.create_state_init()["state_init"]
+    address = Address(wallet.address.to_string(False))
+    timestamp = int(time.time())
+
+    # Same message construction as TonProofService.check_proof
+    msg = b''.join([
+        TON_PROOF_PREFIX,
+        address.wc.to_bytes(4, byteorder='big'),
+        address.hash_part,
+        len(DOMAIN).to_bytes(4, byteorder='little'),
+        DOMAIN.encode(),
+        timestamp.to_bytes(8, byteorder='little'),
+        payload.encode()
+    ])
+    full_msg = bytes([0xff, 0xff]) + TON_CONNECT_PREFIX + hashlib.sha256(msg).digest()
+    signing_key = signing_key or nacl.signing.SigningKey(private_key[:32])
+    signature = signing_key.sign(hashlib.sha256(full_msg).digest()).signature
+
+    return {
+        "address": wallet.address.to_string(False),
+        "public_key": signing_key.verify_key.encode().hex(),
+        "proof": {
+            "timestamp": timestamp,
+            "domain": {"lengthBytes": len(DOMAIN), "value": DOMAIN},
+            "payload": payload,
+            "signature": b64encode(signature).decode(),
+            "state_init": b64encode(state_init.to_boc(False)).decode()
+        }
+    }
+
+
+def bench_sync(proofs: list) -> float:
+    """Verifications per second called inline"""
+    started = time.perf_counter()
+    for proof in proofs:
+        assert TonProofService.check_proof(proof)
+    return len(proofs) / (time.perf_counter() - started)
+
+
+async def bench_async(proofs: list, concurrency: int) -> tuple:
+    """Verifications per second through check_proof_async and the worst event loop stall in ms"""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        # Measures how late the loop wakes up a 1ms sleep
+        nonlocal stall
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - before - 0.001)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(proof: dict):
+        async with semaphore:
+            assert await TonProofService.check_proof_async(proof)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(login(proof) for proof in proofs))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    return len(proofs) / elapsed, stall * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TON proof verification benchmark")
+    parser.add_argument("-n", type=int, default=2000, help="Proofs to verify per run")
+    parser.add_argument("-c", "--concurrency", type=int, default=100, help="Concurrent logins in the async run")
+    parser.add_argument("--wallets", type=int, default=50, help="Distinct wallets (state_init cache hits repeat)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    wallets = [make_proof(f"bench-{i}") for i in range(args.wallets)]
+    proofs = [wallets[i % len(wallets)] for i in range(args.n)]
+
+    print(f"sync:  {bench_sync(proofs):8.0f} verifications/s")
+    print(f"state_init cache: {parse_state_init.cache_info()}")
+    rate, stall = asyncio.run(bench_async(proofs, args.concurrency))
+    print(f"async: {rate:8.0f} verifications/s with {PROOF_WORKERS} workers, "
+          f"max event loop stall {stall:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ class CacheTTL(Enum):
     NONE = None  # Permanent storage (user states, bot state)
     METRICS = 90  # DexScreener and holders data (90 seconds)
     DEFAULT = 432000  # 5 days default from redis_service
+    THREADS_PROFILE = 3600  # Fetched Threads profile with posts (1 hour)
+    THREADS_NOT_FOUND = 600  # Negative cache for missing Threads profiles (10 minutes)
+    LLM_ANALYSIS = 86400  # Redis front of the Postgres analysis cache (1 day)
 
 class CacheKeys:
     """Cache key patterns used throughout the application"""
@@ -20,10 +23,21 @@ class CacheKeys:
     USER_STATUS = "user:{telegram_id}:status"    # User registration status
     USER_LANGUAGE = "user:{telegram_id}:language" # User language preference
     
-    # Metrics related (TTL: 90 seconds)
-    DEX_SCREENER = "tetrix:dexscreener"
-    HOLDERS = "tetrix:holders"
-    METRICS = "tetrix:metrics"
+    # Metrics related
+    DEX_SCREENER = "tetrix:dexscreener"  # Last good DexScreener reply with fetch time
+    HOLDERS = "tetrix:holders"  # Last good tonapi holders reply with fetch time
+    METRICS = "tetrix:metrics"  # Versioned metrics document, written only by the scheduler (no TTL)
+
+    # Threads related
+    THREADS_USERNAME = "threads:username:{username}"  # Normalized username -> Threads user id or not-found marker
+    THREADS_PROFILE = "threads:profile:{user_id}"  # Threads user info and posts with fetch time
+    THREADS_FETCH_LOCK = "threads:fetch:{username}:lock"  # Single RapidAPI fetch per profile at a time
+
+    # TON Connect related
+    TON_PROOF_NONCE = "ton_proof:nonce:{nonce}"  # Used proof payload nonces, kept until the payload expires
+
+    # LLM related
+    LLM_ANALYSIS = "llm:analysis:{key}"  # Analysis text by content hash, see llm_service.analysis_cache_key
 
 def setup_cache() -> Cache:
     """Configure and return aiocache instance with same settings as current Redis"""
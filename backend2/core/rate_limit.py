@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# RapidAPI plans: sustained requests per second, burst size and max requests in flight
+RAPIDAPI_PLANS = {
+    "basic": {"rate": 1.0, "burst": 2, "concurrency": 2},
+    "pro": {"rate": 5.0, "burst": 10, "concurrency": 5},
+    "ultra": {"rate": 10.0, "burst": 20, "concurrency": 10},
+    "mega": {"rate": 25.0, "burst": 50, "concurrency": 20}
+}
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Exponential backoff with full jitter, never shorter than upstream Retry-After
+    Args:
+        attempt (int): Retry number starting from 0
+        retry_after (float): Seconds requested by upstream, if any
+        base (float): Delay scale of the first retry
+        cap (float): Upper bound of the exponential part
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse Retry-After header given in seconds or as HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token bucket: `rate` tokens per second, at most `capacity` saved up for bursts"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity  # Currently available tokens
+        self._updated = time.monotonic()  # Last refill time
+        self._paused_until = 0.0  # Monotonic time before which no token is handed out
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add tokens accumulated since the last refill"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a token; callers are served in arrival order"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (upstream asked to slow down)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class RateLimiter:
+    """
+    Process-wide limiter for one upstream: a semaphore bounds requests in flight and
+    a token bucket bounds request rate. Keeps counters for monitoring.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, concurrency: int):
+        """
+        Args:
+            name (str): Upstream name for logs and stats
+            rate (float): Sustained requests per second
+            burst (float): Requests allowed at once after idle time
+            concurrency (int): Max requests in flight
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.counters: Dict[str, int] = {"calls": 0, "throttled": 0, "retried": 0, "failed": 0}
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a concurrency slot and a rate token for one request"""
+        async with self._semaphore:
+            await self.bucket.acquire()
+            self.counters["calls"] += 1
+            yield
+
+    def record_throttled(self, retry_after: Optional[float] = None):
+        """Upstream answered 429: count it and pause all callers"""
+        self.counters["throttled"] += 1
+        self.bucket.pause(retry_after if retry_after is not None else 1 / self.bucket.rate)
+        logger.warning(f"{self.name} throttled, pausing for {retry_after or 1 / self.bucket.rate:.1f}s")
+
+    def record_retry(self):
+        """Count a retried request"""
+        self.counters["retried"] += 1
+
+    def record_failure(self):
+        """Count a request that failed for good"""
+        self.counters["failed"] += 1
+
+    def stats(self) -> Dict:
+        """Counters and configuration for the stats endpoint"""
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "concurrency": self.concurrency,
+            **self.counters
+        }
+
+def _rapidapi_limiter() -> RateLimiter:
+    """
+    Build RapidAPI limiter from RAPIDAPI_PLAN, with optional RAPIDAPI_RATE / RAPIDAPI_CONCURRENCY
+    overrides. Plan limits are per account, so they are split between WEB_WORKERS processes.
+    """
+    plan_name = os.getenv("RAPIDAPI_PLAN", "basic").lower()
+    plan = RAPIDAPI_PLANS.get(plan_name)
+    if plan is None:
+        logger.warning(f"Unknown RAPIDAPI_PLAN {plan_name}, using basic")
+        plan = RAPIDAPI_PLANS["basic"]
+    workers = max(1, int(os.getenv("WEB_WORKERS", "1")))
+    rate = float(os.getenv("RAPIDAPI_RATE", plan["rate"])) / workers
+    concurrency = max(1, int(os.getenv("RAPIDAPI_CONCURRENCY", plan["concurrency"])) // workers)
+    return RateLimiter("rapidapi", rate=rate, burst=max(1.0, plan["burst"] / workers), concurrency=concurrency)
+
+# Shared by all ThreadsService instances in the process
+rapidapi_limiter = _rapidapi_limiter()
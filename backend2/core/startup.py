@@ -0,0 +1,60 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Set
+
+logger = logging.getLogger(__name__)
+
+class StartupTracker:
+    """
+    Tracks application startup: timing of every startup phase and readiness
+    of components that are warmed up in background (caches, leaderboard).
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()  # Process start reference point
+        self.phases: Dict[str, float] = {}  # Phase name -> duration in seconds
+        self.ready_components: Set[str] = set()  # Components confirmed warm
+        self.serving = False  # Whether lifespan startup finished and app serves traffic
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure duration of a startup phase"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.monotonic() - start
+            logger.info(f"Startup phase '{name}' took {self.phases[name]:.3f}s")
+
+    def mark_serving(self):
+        """Mark lifespan startup as finished and log phase breakdown"""
+        self.serving = True
+        self.log_breakdown("Serving traffic")
+
+    def mark_ready(self, component: str):
+        """Mark a background-warmed component as ready"""
+        if component not in self.ready_components:
+            self.ready_components.add(component)
+            logger.info(f"Component '{component}' ready after {time.monotonic() - self.started_at:.3f}s")
+
+    def is_ready(self, *components: str) -> bool:
+        """Check that app serves traffic and all given components are warm"""
+        return self.serving and all(component in self.ready_components for component in components)
+
+    def log_breakdown(self, title: str):
+        """Log all recorded phases sorted by start order"""
+        breakdown = ", ".join(f"{name}={duration:.3f}s" for name, duration in self.phases.items())
+        logger.info(f"{title} after {time.monotonic() - self.started_at:.3f}s ({breakdown})")
+
+    def status(self) -> Dict:
+        """Startup state for readiness endpoint"""
+        return {
+            "serving": self.serving,
+            "ready_components": sorted(self.ready_components),
+            "phases": {name: round(duration, 3) for name, duration in self.phases.items()},
+            "uptime": round(time.monotonic() - self.started_at, 3)
+        }
+
+# Process-wide startup tracker
+startup_tracker = StartupTracker()
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Shared aiohttp session for all upstream calls (created lazily inside the event loop)
+_http_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Return process-wide aiohttp session with pooled connections.
+    Reusing one session avoids a TCP/TLS handshake per upstream call.
+    """
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+        )
+    return _http_session
+
+async def close_http_session():
+    """Close shared aiohttp session on application shutdown"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+class UpstreamError(Exception):
+    """Raised by fetch functions when upstream reply is unusable"""
+
+class CircuitState(Enum):
+    """States of the circuit breaker"""
+    CLOSED = "closed"        # Upstream healthy, requests pass through
+    OPEN = "open"            # Upstream failing, requests are short-circuited
+    HALF_OPEN = "half_open"  # Reset timeout passed, a single probe request is allowed
+
+class CircuitBreaker:
+    """
+    Circuit breaker with half-open probing.
+    After failure_threshold consecutive failures the circuit opens and calls are
+    skipped for reset_timeout seconds; then exactly one probe is let through and
+    its result decides whether the circuit closes again or re-opens.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0  # Consecutive failures counter
+        self.opened_at = 0.0  # Monotonic time when circuit was opened
+        self._probe_in_flight = False  # Only one probe request in half-open state
+
+    def allow_request(self) -> bool:
+        """Check whether a request to upstream may be made now"""
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            logger.info(f"Circuit {self.name} half-open, probing upstream")
+            self.state = CircuitState.HALF_OPEN
+
+        # Half-open: allow a single probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Count failure and open the circuit when threshold is reached or probe failed"""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+class Upstream:
+    """
+    Resilient wrapper around one upstream API.
+    Applies a timeout and circuit breaker to every call and falls back to the
+    last good value (marked with its age) when upstream is slow or failing.
+    Instances are module-level so breaker state and last good value live for
+    the whole process.
+    """
+
+    def __init__(self, name: str, timeout: float, cache_key: Optional[str] = None,
+                 failure_threshold: int = 3, reset_timeout: float = 60):
+        """
+        Args:
+            name (str): Upstream name used in logs and source markers
+            timeout (float): Total timeout for a single call in seconds
+            cache_key (str): Cache key where the last good value is persisted across restarts
+            failure_threshold (int): Consecutive failures before the circuit opens
+            reset_timeout (float): Seconds the circuit stays open before a probe
+        """
+        self.name = name
+        self.timeout = timeout
+        self.cache_key = cache_key
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self._last_good: Optional[dict] = None  # {"value": dict, "fetched_at": epoch seconds}
+
+    async def call(self, fetch: Callable[[aiohttp.ClientSession], Awaitable[dict]], cache: Any = None) -> Optional[dict]:
+        """
+        Call upstream through the breaker and return its data with a staleness marker
+        Args:
+            fetch: Coroutine function performing the request with the shared session
+            cache: Optional cache instance to persist/restore the last good value
+        Returns:
+            Optional[dict]: Upstream data extended with "stale" and "age" (seconds),
+            or None if upstream failed and no good value was ever seen
+        """
+        if self.breaker.allow_request():
+            try:
+                value = await asyncio.wait_for(fetch(get_http_session()), timeout=self.timeout)
+                self.breaker.record_success()
+                await self._remember(value, cache)
+                return {**value, "stale": False, "age": 0}
+            except asyncio.CancelledError:
+                self.breaker.record_failure()
+                raise
+            except asyncio.TimeoutError:
+                logger.error(f"{self.name} timed out after {self.timeout}s")
+                self.breaker.record_failure()
+            except Exception as e:
+                logger.error(f"{self.name} request failed: {e}")
+                self.breaker.record_failure()
+        else:
+            logger.warning(f"Circuit {self.name} is open, using last good value")
+
+        return await self._fallback(cache)
+
+    async def _remember(self, value: dict, cache: Any):
+        """Store last good value in memory and cache"""
+        self._last_good = {"value": value, "fetched_at": time.time()}
+        if cache and self.cache_key:
+            try:
+                await cache.set(self.cache_key, json.dumps(self._last_good))
+            except Exception as e:
+                logger.error(f"Failed to persist last good value for {self.name}: {e}")
+
+    async def _fallback(self, cache: Any) -> Optional[dict]:
+        """Return last good value with age marker, restoring it from cache if needed"""
+        if self._last_good is None and cache and self.cache_key:
+            try:
+                cached = await cache.get(self.cache_key)
+                if cached:
+                    self._last_good = json.loads(cached)
+            except Exception as e:
+                logger.error(f"Failed to restore last good value for {self.name}: {e}")
+
+        if self._last_good is None:
+            logger.error(f"No last good value available for {self.name}")
+            return None
+
+        age = time.time() - self._last_good["fetched_at"]
+        return {**self._last_good["value"], "stale": True, "age": round(age, 1)}
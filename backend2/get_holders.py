@@ -1,76 +1,62 @@
-import requests
-import sys
-import time
+"""
+Take a TETRIX holder snapshot with the async holder ingester.
+
+    python get_holders.py            # ingest into jetton_holders (same as the scheduler task)
+    python get_holders.py --sync     # delta sync since the last checkpoint (full if none)
+    python get_holders.py --tsv      # print snapshot as TSV to stdout, no database needed
 
+Set TONCENTER_API_URL to point at a fake server (see utils/fake_toncenter.py).
+"""
+import argparse
+import asyncio
+import sys
 
-def fetch_top_jetton_holders(jetton_address, limit=1000, offset=0):
-    API_ENDPOINT = "https://toncenter.com/api/v3/jetton/wallets"
+from core.upstream import close_http_session
+from services.holder_ingester import HolderIngester, TONCENTER_API_URL
 
-    try:
-        response = requests.get(
-            API_ENDPOINT,
-            params={
-                "jetton_address": jetton_address,
-                "exclude_zero_balance": "true",
-                "limit": limit,
-                "offset": offset,
-                "sort": "desc"
-            },
-            headers={"accept": "application/json"}
-        )
-        response.raise_for_status()
 
-        data = response.json()
-        holders = data.get("jetton_wallets", [])
-        address_book = data.get("address_book", {})
+async def print_tsv(ingester: HolderIngester):
+    """Print all holders as TSV sorted by balance desc"""
+    holders = []
+    async for page in ingester.fetch_pages():
+        print(f"Fetched page of {len(page)} holders...", file=sys.stderr)
+        holders.extend(page)
 
-        # Map both wallet and owner addresses to user_friendly names
+    if holders:
+        holders.sort(key=lambda holder: int(holder["balance"]), reverse=True)
+        fields = sorted(holders[0].keys())
+        print('\t'.join(fields))
         for holder in holders:
-            wallet_address = holder['address']
-            owner_address = holder['owner']
-            
-            holder['wallet_friendly'] = address_book.get(wallet_address, {}).get('user_friendly', wallet_address)
-            holder['owner_friendly'] = address_book.get(owner_address, {}).get('user_friendly', owner_address)
+            print('\t'.join(str(holder.get(field, 'N/A')) for field in fields))
 
-        return holders
+    print(f"Total holders processed: {len(holders)}", file=sys.stderr)
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return []
+
+async def main():
+    parser = argparse.ArgumentParser(description="TETRIX holder snapshot")
+    parser.add_argument("--tsv", action="store_true", help="Print TSV to stdout instead of writing to database")
+    parser.add_argument("--sync", action="store_true", help="Delta sync instead of a full snapshot")
+    parser.add_argument("--base-url", default=TONCENTER_API_URL, help="toncenter v3 API base URL")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max pages in flight")
+    args = parser.parse_args()
+
+    try:
+        if args.tsv:
+            await print_tsv(HolderIngester(base_url=args.base_url, concurrency=args.concurrency))
+        else:
+            # Database settings are only needed when writing the snapshot
+            from models.database import async_session
+            ingester = HolderIngester(async_session, base_url=args.base_url, concurrency=args.concurrency)
+            if args.sync:
+                result = await ingester.sync()
+                print(f"Holders {result['mode']} sync completed: {result}", file=sys.stderr)
+            else:
+                result = await ingester.ingest()
+                print(f"Ingested {result['rows']} holders in {result['pages']} pages "
+                      f"(checkpoint {result['checkpoint_id']})", file=sys.stderr)
+    finally:
+        await close_http_session()
 
 
 if __name__ == "__main__":
-    JETTON_ADDRESS = "EQC-OHxhI9r5ojKf6QMLFjhQrKoawN1thhHFCvImINhfK40C"
-    BATCH_SIZE = 1000
-    
-    all_holders = []
-    offset = 0
-    headers_printed = False
-    
-    while True:
-        print(f"Fetching batch with offset {offset}...", file=sys.stderr)
-        holders = fetch_top_jetton_holders(JETTON_ADDRESS, limit=BATCH_SIZE, offset=offset)
-        
-        if not holders:
-            break
-            
-        all_holders.extend(holders)
-        
-        # Get fields from first batch
-        if not headers_printed and holders:
-            fields = sorted(holders[0].keys())
-            print('\t'.join(fields))
-            headers_printed = True
-            
-        # Print batch data
-        for holder in holders:
-            row = [str(holder.get(field, 'N/A')) for field in fields]
-            print('\t'.join(row))
-            
-        if len(holders) < BATCH_SIZE:
-            break
-            
-        offset += BATCH_SIZE
-        time.sleep(1)  # 1 second delay between requests
-    
-    print(f"Total holders processed: {len(all_holders)}", file=sys.stderr)
+    asyncio.run(main())
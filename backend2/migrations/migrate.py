@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
@@ -7,6 +8,11 @@ from core.config import get_settings
 
 settings = get_settings()
 
+MIGRATIONS_LOCK_ID = 7305061  # pg advisory lock key, serializes concurrent migration runs
+# Migrations up to this prefix alter tables that predate the SQL files; on an empty
+# database the models already contain their result, so they are recorded, not run
+BASELINE_MIGRATION = "011"
+
 def get_db_connection():
     print(f"Connecting to database: {settings.POSTGRES_DB} at {settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}")
     conn = psycopg2.connect(
@@ -81,13 +87,45 @@ def apply_migration(conn, file_path, file_name):
         print(str(e))
         raise
 
+def is_empty_database(conn) -> bool:
+    """True if the base schema was never created"""
+    with conn.cursor() as cur:
+        cur.execute("""SELECT to_regclass('"user"') IS NULL""")
+        return cur.fetchone()[0]
+
+def create_schema():
+    """Create tables, indexes and constraints of all models that don't exist yet (create_all)"""
+    from sqlalchemy import create_engine
+    from models import Base
+
+    print("Creating missing tables from models...")
+    engine = create_engine("postgresql+psycopg2://", creator=get_db_connection)
+    try:
+        Base.metadata.create_all(engine)
+    finally:
+        engine.dispose()
+
+def record_baseline(conn, files, applied):
+    """Mark legacy migrations as applied on a database created from the models"""
+    with conn.cursor() as cur:
+        for file_name in files:
+            if file_name[:len(BASELINE_MIGRATION)] <= BASELINE_MIGRATION and file_name not in applied:
+                print(f"Recording baseline migration: {file_name}")
+                cur.execute("INSERT INTO migrations (name) VALUES (%s)", (file_name,))
+                applied.add(file_name)
+
 def run_migrations():
     """Запускаем все неприменённые миграции"""
     print("\nStarting migrations...")
+    started_at = time.monotonic()
     conn = get_db_connection()
     conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
     
     try:
+        # Another runner (release step or second replica) may be migrating right now;
+        # wait for it and then see only what is still pending
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
         ensure_migrations_table(conn)
         applied = get_applied_migrations(conn)
         
@@ -96,6 +134,13 @@ def run_migrations():
         print(f"\nScanning migrations directory: {migrations_dir}")
         files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
         print(f"Found migration files: {files}")
+
+        # Empty database: base schema comes from the models, later SQL files are idempotent on it.
+        # Existing database: SQL files first, then tables of new models (as create_all on app start did)
+        empty = is_empty_database(conn)
+        if empty:
+            create_schema()
+            record_baseline(conn, files, applied)
         
         for file_name in files:
             if file_name not in applied:
@@ -103,10 +148,14 @@ def run_migrations():
                 apply_migration(conn, file_path, file_name)
             else:
                 print(f"Skipping already applied migration: {file_name}")
+
+        if not empty:
+            create_schema()
     
     finally:
         print("\nClosing database connection")
-        conn.close()
+        conn.close()  # Also releases the advisory lock
+        print(f"Migrations finished in {time.monotonic() - started_at:.3f}s")
 
 if __name__ == '__main__':
     run_migrations() 
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- UP
+-- Delta holder sync: checkpoint mode and last_transaction_lt watermark
+-- (table is created by the model on fresh databases)
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ADD COLUMN IF NOT EXISTS mode VARCHAR(8) NOT NULL DEFAULT 'full';
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ADD COLUMN IF NOT EXISTS max_lt BIGINT;
+
+-- DOWN
+ALTER TABLE IF EXISTS holder_ingest_checkpoints DROP COLUMN IF EXISTS max_lt;
+ALTER TABLE IF EXISTS holder_ingest_checkpoints DROP COLUMN IF EXISTS mode;
@@ -0,0 +1,90 @@
+-- UP
+-- Append-only points ledger and materialized per-user totals
+CREATE TABLE IF NOT EXISTS points_ledger (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES "user"(id) ON DELETE CASCADE,
+    source VARCHAR(16) NOT NULL,
+    delta INTEGER NOT NULL,
+    ref VARCHAR(128),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT unique_points_ledger_ref UNIQUE (user_id, source, ref),
+    CONSTRAINT check_points_source CHECK (source IN ('invite', 'early_backer', 'holding', 'adjustment'))
+);
+CREATE INDEX IF NOT EXISTS ix_points_ledger_user_id ON points_ledger (user_id);
+
+CREATE TABLE IF NOT EXISTS user_points (
+    user_id INTEGER PRIMARY KEY REFERENCES "user"(id) ON DELETE CASCADE,
+    total INTEGER NOT NULL DEFAULT 0,
+    invite_points INTEGER NOT NULL DEFAULT 0,
+    early_backer_points INTEGER NOT NULL DEFAULT 0,
+    holding_points INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Fold every ledger row into user_points
+CREATE OR REPLACE FUNCTION fold_points_ledger() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO user_points (user_id, total, invite_points, early_backer_points, holding_points, updated_at)
+    VALUES (
+        NEW.user_id,
+        NEW.delta,
+        CASE WHEN NEW.source = 'invite' THEN NEW.delta ELSE 0 END,
+        CASE WHEN NEW.source = 'early_backer' THEN NEW.delta ELSE 0 END,
+        CASE WHEN NEW.source = 'holding' THEN NEW.delta ELSE 0 END,
+        now()
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        total = user_points.total + EXCLUDED.total,
+        invite_points = user_points.invite_points + EXCLUDED.invite_points,
+        early_backer_points = user_points.early_backer_points + EXCLUDED.early_backer_points,
+        holding_points = user_points.holding_points + EXCLUDED.holding_points,
+        updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS points_ledger_fold ON points_ledger;
+CREATE TRIGGER points_ledger_fold
+AFTER INSERT ON points_ledger
+FOR EACH ROW EXECUTE FUNCTION fold_points_ledger();
+
+-- Backfill: redeemed invites (420 each) and early backer bonus (4200)
+INSERT INTO points_ledger (user_id, source, delta, ref)
+SELECT creator_id, 'invite', 420, 'invite:' || id
+FROM invite_code
+WHERE used_by_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO points_ledger (user_id, source, delta, ref)
+SELECT id, 'early_backer', 4200, 'early_backer'
+FROM "user"
+WHERE is_early_backer
+ON CONFLICT DO NOTHING;
+
+-- Backfill holding tiers if holder snapshots were already ingested
+DO $$
+BEGIN
+    IF to_regclass('jetton_holders') IS NOT NULL THEN
+        INSERT INTO points_ledger (user_id, source, delta, ref)
+        SELECT u.id, 'holding',
+            CASE
+                WHEN h.balance >= 10000000000000000 THEN 4200
+                WHEN h.balance >= 1000000000000000 THEN 2100
+                WHEN h.balance >= 100000000000000 THEN 1000
+                WHEN h.balance >= 10000000000000 THEN 420
+                ELSE 100
+            END,
+            'backfill'
+        FROM "user" u
+        JOIN (SELECT owner, SUM(balance) AS balance FROM jetton_holders GROUP BY owner) h
+            ON h.owner = upper(u.wallet_address)
+        WHERE h.balance >= 1000000000
+        ON CONFLICT DO NOTHING;
+    END IF;
+END $$;
+
+-- DOWN
+DROP TRIGGER IF EXISTS points_ledger_fold ON points_ledger;
+DROP FUNCTION IF EXISTS fold_points_ledger();
+DROP TABLE IF EXISTS user_points;
+DROP TABLE IF EXISTS points_ledger;
@@ -0,0 +1,40 @@
+-- UP
+-- threads_job_campaign doubles as the analysis job queue
+-- (table is created by the model on fresh databases)
+DO $$
+BEGIN
+    IF to_regclass('threads_job_campaign') IS NOT NULL THEN
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS job_status VARCHAR(16);
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS run_after TIMESTAMPTZ NOT NULL DEFAULT now();
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ;
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS locked_by VARCHAR(128);
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS last_error TEXT;
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+
+        -- Finished entries are done; unfinished ones are marked failed so they are
+        -- retried when the user comes back with /start instead of all at once on deploy
+        UPDATE threads_job_campaign
+        SET job_status = CASE WHEN analysis_report IS NOT NULL THEN 'done' ELSE 'failed' END
+        WHERE job_status IS NULL;
+
+        ALTER TABLE threads_job_campaign ALTER COLUMN job_status SET DEFAULT 'queued';
+        ALTER TABLE threads_job_campaign ALTER COLUMN job_status SET NOT NULL;
+        ALTER TABLE threads_job_campaign DROP CONSTRAINT IF EXISTS check_threads_job_status;
+        ALTER TABLE threads_job_campaign ADD CONSTRAINT check_threads_job_status
+            CHECK (job_status IN ('queued', 'fetching', 'analyzing', 'sending', 'done', 'failed'));
+        CREATE INDEX IF NOT EXISTS ix_threads_job_campaign_pending
+            ON threads_job_campaign (run_after) WHERE job_status NOT IN ('done', 'failed');
+    END IF;
+END $$;
+
+-- DOWN
+DROP INDEX IF EXISTS ix_threads_job_campaign_pending;
+ALTER TABLE IF EXISTS threads_job_campaign DROP CONSTRAINT IF EXISTS check_threads_job_status;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS updated_at;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS last_error;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS locked_by;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS locked_at;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS run_after;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS attempts;
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS job_status;
@@ -0,0 +1,35 @@
+-- UP
+-- Extracted post texts stored at ingest; raw RapidAPI payload becomes optional
+-- (table is created by the model on fresh databases)
+DO $$
+BEGIN
+    IF to_regclass('threads_job_campaign') IS NOT NULL THEN
+        ALTER TABLE threads_job_campaign ADD COLUMN IF NOT EXISTS post_texts JSONB;
+
+        -- posts_json was written as json.dumps(...) and holds a JSON string, turn it into the object
+        UPDATE threads_job_campaign
+        SET posts_json = (posts_json #>> '{}')::jsonb
+        WHERE jsonb_typeof(posts_json) = 'string';
+
+        -- Same extraction as ThreadsService.extract_posts_from_json: first text fragment,
+        -- caption as fallback, empty texts skipped, API order kept
+        UPDATE threads_job_campaign t
+        SET post_texts = COALESCE((
+            SELECT jsonb_agg(p.text ORDER BY p.ord)
+            FROM (
+                SELECT e.ord, COALESCE(
+                    NULLIF(e.edge #>> '{node,thread_items,0,post,text_post_app_info,text_fragments,fragments,0,plaintext}', ''),
+                    NULLIF(e.edge #>> '{node,thread_items,0,post,caption,text}', '')
+                ) AS text
+                FROM jsonb_array_elements(t.posts_json #> '{posts,data,mediaData,edges}') WITH ORDINALITY AS e(edge, ord)
+            ) p
+            WHERE p.text IS NOT NULL
+        ), '[]'::jsonb)
+        WHERE t.post_texts IS NULL
+          AND jsonb_typeof(t.posts_json #> '{posts,data,mediaData,edges}') = 'array';
+    END IF;
+END $$;
+
+-- DOWN
+UPDATE threads_job_campaign SET posts_json = to_jsonb(posts_json::text) WHERE jsonb_typeof(posts_json) = 'object';
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS post_texts;
@@ -0,0 +1,7 @@
+-- UP
+-- Rendered report message parts per language, filled on first delivery or re-display
+-- (table is created by the model on fresh databases)
+ALTER TABLE IF EXISTS threads_job_campaign ADD COLUMN IF NOT EXISTS report_parts JSONB;
+
+-- DOWN
+ALTER TABLE IF EXISTS threads_job_campaign DROP COLUMN IF EXISTS report_parts;
@@ -0,0 +1,49 @@
+-- UP
+-- Wallets are stored in canonical raw uppercase form ("0:ABC...", as jetton_holders.owner),
+-- so UNIQUE(wallet_address) also holds across letter case and serves lookups and joins.
+-- A wallet linked to several users in different case stays with the earliest user; later
+-- duplicates are copied to user_wallet_unlinked before being unlinked, for a manual merge.
+-- (table and constraint are created by the model on fresh databases)
+DO $$
+BEGIN
+    IF to_regclass('"user"') IS NOT NULL THEN
+        CREATE TABLE IF NOT EXISTS user_wallet_unlinked (
+            user_id INTEGER PRIMARY KEY,
+            telegram_id BIGINT NOT NULL,
+            wallet_address VARCHAR NOT NULL,
+            kept_user_id INTEGER NOT NULL,
+            registration_phase VARCHAR(20),
+            unlinked_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+
+        INSERT INTO user_wallet_unlinked (user_id, telegram_id, wallet_address, kept_user_id, registration_phase)
+        SELECT id, telegram_id, wallet_address, kept_user_id, registration_phase
+        FROM (
+            SELECT id, telegram_id, wallet_address, registration_phase,
+                   first_value(id) OVER (PARTITION BY upper(wallet_address) ORDER BY id) AS kept_user_id
+            FROM "user"
+            WHERE wallet_address IS NOT NULL
+        ) ranked
+        WHERE id <> kept_user_id
+        ON CONFLICT (user_id) DO NOTHING;
+
+        UPDATE "user" SET wallet_address = NULL
+        WHERE id IN (SELECT user_id FROM user_wallet_unlinked) AND wallet_address IS NOT NULL;
+
+        UPDATE "user" SET wallet_address = upper(wallet_address)
+        WHERE wallet_address IS DISTINCT FROM upper(wallet_address);
+
+        ALTER TABLE "user" DROP CONSTRAINT IF EXISTS check_wallet_address;
+        ALTER TABLE "user" ADD CONSTRAINT check_wallet_address
+            CHECK (wallet_address IS NULL OR wallet_address ~ '^0:[A-F0-9]{64}$');
+
+        -- Generated upper(wallet_address) column of an earlier revision is redundant now
+        DROP INDEX IF EXISTS ix_user_wallet_canonical;
+        ALTER TABLE "user" DROP COLUMN IF EXISTS wallet_canonical;
+    END IF;
+END $$;
+
+-- DOWN
+ALTER TABLE IF EXISTS "user" DROP CONSTRAINT IF EXISTS check_wallet_address;
+ALTER TABLE IF EXISTS "user" ADD CONSTRAINT check_wallet_address
+    CHECK (wallet_address IS NULL OR wallet_address ~ '^0:[a-fA-F0-9]{64}$');
@@ -0,0 +1,9 @@
+-- UP
+-- The ingester inserts running checkpoints with raw SQL, counters need a database default
+-- (table is created by the model on fresh databases)
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ALTER COLUMN pages SET DEFAULT 0;
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ALTER COLUMN rows SET DEFAULT 0;
+
+-- DOWN
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ALTER COLUMN pages DROP DEFAULT;
+ALTER TABLE IF EXISTS holder_ingest_checkpoints ALTER COLUMN rows DROP DEFAULT;
@@ -1,9 +1,13 @@
 from .database import Base
 from .user import User
 from .metrics import TetrixMetrics
+from .metrics_history import TetrixMetricsHistory
 from .leaderboard import LeaderboardSnapshot
 from .invite_code import InviteCode
 from .threads_job_campaign import ThreadsJobCampaign
+from .jetton_holder import JettonHolder, HolderIngestCheckpoint
+from .points import PointsLedger, UserPoints
+from .llm_analysis_cache import LLMAnalysisCache
 
 # Make sure all models are imported here for SQLAlchemy to discover them
-__all__ = ['Base', 'User', 'TetrixMetrics', 'LeaderboardSnapshot', 'InviteCode', 'ThreadsJobCampaign'] 
\ No newline at end of file
+__all__ = ['Base', 'User', 'TetrixMetrics', 'TetrixMetricsHistory', 'LeaderboardSnapshot', 'InviteCode', 'ThreadsJobCampaign', 'JettonHolder', 'HolderIngestCheckpoint', 'PointsLedger', 'UserPoints', 'LLMAnalysisCache'] 
\ No newline at end of file
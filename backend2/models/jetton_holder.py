@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Numeric, BigInteger, DateTime, Text, func
+from .database import Base
+
+class JettonHolder(Base):
+    """
+    Current TETRIX holders, one row per jetton wallet.
+    Filled by the holder ingester from toncenter snapshots; wallets missing
+    from the latest complete snapshot (zero balance) are removed.
+    """
+    __tablename__ = "jetton_holders"
+
+    # Jetton wallet address in raw form (0:HEX)
+    address = Column(String(80), primary_key=True)
+    # Owner address of the jetton wallet in raw form
+    owner = Column(String(80), nullable=False, index=True)
+    # User-friendly forms of owner and wallet addresses from toncenter address book
+    owner_friendly = Column(String(80))
+    wallet_friendly = Column(String(80))
+    # Balance in jetton nano units
+    balance = Column(Numeric(40, 0), nullable=False)
+    # Jetton master address in raw form
+    jetton = Column(String(80), nullable=False)
+    # Logical time of the last wallet transaction
+    last_transaction_lt = Column(BigInteger)
+    # Ingest checkpoint that last wrote this row
+    checkpoint_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class HolderIngestCheckpoint(Base):
+    """One row per holder snapshot ingest run"""
+    __tablename__ = "holder_ingest_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    # Jetton master address the snapshot was taken for
+    jetton = Column(String(80), nullable=False)
+    # 'full' snapshot or 'delta' sync
+    mode = Column(String(8), nullable=False, default="full")
+    # 'running', 'completed' or 'failed'
+    status = Column(String(16), nullable=False, default="running")
+    # Number of fetched pages and holder rows
+    pages = Column(Integer, nullable=False, default=0, server_default="0")
+    rows = Column(Integer, nullable=False, default=0, server_default="0")
+    # Highest last_transaction_lt seen, next delta sync fetches changes after it
+    max_lt = Column(BigInteger)
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from .database import Base
+
+class LLMAnalysisCache(Base):
+    """
+    Content-addressed store of LLM profile analyses. The key hashes everything that
+    determines the output (posts, language, prompt and model), so an identical request
+    reuses the stored analysis and a prompt or model change simply misses.
+    """
+    __tablename__ = "llm_analysis_cache"
+
+    # sha256 hex of the normalized request, see services/llm_service.analysis_cache_key
+    key = Column(String(64), primary_key=True)
+    model = Column(String(64), nullable=False)
+    language = Column(String(8), nullable=False)
+    # sha256 hex of the system prompt the analysis was made with
+    prompt_hash = Column(String(64), nullable=False)
+    # Number of posts analyzed, for inspection
+    posts_count = Column(Integer, nullable=False)
+    # Analysis text as returned by the model
+    analysis = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, CheckConstraint
+from .database import Base
+
+class TetrixMetricsHistory(Base):
+    """
+    Time-series of TETRIX token metrics.
+    Each scheduler sample is folded into a minute bucket and into hourly and daily
+    rollups, so charts of any range are read from a small number of rows.
+    """
+    __tablename__ = "tetrix_metrics_history"
+
+    # Rollup resolution: 'minute', 'hour' or 'day'
+    resolution = Column(String(6), primary_key=True)
+    # Start of the bucket in UTC
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    # Average, minimum and maximum price in USD within the bucket
+    price = Column(Float, nullable=False)
+    price_min = Column(Float, nullable=False)
+    price_max = Column(Float, nullable=False)
+    # Average market cap in USD within the bucket
+    market_cap = Column(Float, nullable=False)
+    # Holders count at the last sample of the bucket
+    holders = Column(Integer, nullable=False)
+    # Average 24h volume in USD within the bucket
+    volume_24h = Column(Float, nullable=False)
+    # Number of samples folded into the bucket
+    samples = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        CheckConstraint("resolution IN ('minute', 'hour', 'day')", name='check_history_resolution'),
+    )
@@ -0,0 +1,69 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, DDL, event, func
+from .database import Base
+
+class PointsLedger(Base):
+    """
+    Append-only log of point changes: every row says why a user's score moved.
+    Inserts are folded into user_points by the points_ledger_fold trigger.
+    """
+    __tablename__ = "points_ledger"
+
+    id = Column(BigInteger, primary_key=True)
+    # User whose points changed
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Reason of the change: 'invite', 'early_backer', 'holding' or 'adjustment'
+    source = Column(String(16), nullable=False)
+    # Points added (negative when taken away)
+    delta = Column(Integer, nullable=False)
+    # Idempotency reference, e.g. "invite:42"; the same (user, source, ref) is recorded once
+    ref = Column(String(128))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "source", "ref", name="unique_points_ledger_ref"),
+        CheckConstraint("source IN ('invite', 'early_backer', 'holding', 'adjustment')", name="check_points_source"),
+    )
+
+class UserPoints(Base):
+    """Materialized per-user points totals maintained from points_ledger"""
+    __tablename__ = "user_points"
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    invite_points = Column(Integer, nullable=False, default=0)
+    early_backer_points = Column(Integer, nullable=False, default=0)
+    holding_points = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+# Trigger folding every ledger row into user_points (same as migration 013, for databases created by create_all)
+FOLD_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION fold_points_ledger() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO user_points (user_id, total, invite_points, early_backer_points, holding_points, updated_at)
+    VALUES (
+        NEW.user_id,
+        NEW.delta,
+        CASE WHEN NEW.source = 'invite' THEN NEW.delta ELSE 0 END,
+        CASE WHEN NEW.source = 'early_backer' THEN NEW.delta ELSE 0 END,
+        CASE WHEN NEW.source = 'holding' THEN NEW.delta ELSE 0 END,
+        now()
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        total = user_points.total + EXCLUDED.total,
+        invite_points = user_points.invite_points + EXCLUDED.invite_points,
+        early_backer_points = user_points.early_backer_points + EXCLUDED.early_backer_points,
+        holding_points = user_points.holding_points + EXCLUDED.holding_points,
+        updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+FOLD_TRIGGER_SQL = """
+CREATE TRIGGER points_ledger_fold
+AFTER INSERT ON points_ledger
+FOR EACH ROW EXECUTE FUNCTION fold_points_ledger()
+"""
+
+event.listen(PointsLedger.__table__, "after_create", DDL(FOLD_FUNCTION_SQL))
+event.listen(PointsLedger.__table__, "after_create", DDL(FOLD_TRIGGER_SQL))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, text, select, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, text, select, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from .database import Base
@@ -17,16 +17,42 @@ class ThreadsJobCampaign(Base):
     threads_username = Column(String, nullable=True)
     # Threads user ID from API
     threads_user_id = Column(String, nullable=True)
-    # JSON with user's posts texts
+    # Raw RapidAPI response (user info and posts), kept only with THREADS_STORE_RAW_PAYLOAD
     posts_json = Column(JSONB, nullable=True)
+    # Post texts extracted at fetch time, newest first; what the analysis reads
+    post_texts = Column(JSONB, nullable=True)
     # Analysis report text
     analysis_report = Column(String, nullable=True)
+    # Rendered report message parts by language ({"en": [...]}), sent as is on re-display
+    report_parts = Column(JSONB, nullable=True)
     # Timestamp of record creation
     created_at = Column(DateTime, server_default=func.now())
+    # Analysis job state: queued -> fetching -> analyzing -> sending -> done, or failed
+    job_status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    # Number of times a worker picked the job up
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Job is not picked up before this time (retry backoff)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Lease of the worker processing the job; stale leases are resumed by other workers
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String(128), nullable=True)
+    # Error of the last failed attempt ('not_found' when the profile doesn't exist)
+    last_error = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationship to User model
     user = relationship("User", back_populates="threads_campaign")
 
+    __table_args__ = (
+        CheckConstraint(
+            "job_status IN ('queued', 'fetching', 'analyzing', 'sending', 'done', 'failed')",
+            name='check_threads_job_status'
+        ),
+        # Pending jobs in claim order for the queue workers
+        Index('ix_threads_job_campaign_pending', 'run_after',
+              postgresql_where=text("job_status NOT IN ('done', 'failed')")),
+    )
+
     @classmethod
     async def get_by_telegram_id(cls, session, telegram_id: int):
         """Get campaign record by telegram ID"""
@@ -11,13 +11,15 @@ from models.database import get_session
 from services.user_service import UserService
 from services.tetrix_service import TetrixService
 from services.telegram_service import get_telegram_name
+from services.metrics_history_service import MetricsHistoryService, RESOLUTIONS
 
 # Data models
 from models.user import User
 from models.leaderboard import LeaderboardSnapshot
 
 # Utility imports
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 from redis.asyncio import Redis
 from core.deps import get_redis
@@ -128,9 +130,38 @@ async def rebuild_leaderboard(
     
     from services.leaderboard_service import LeaderboardService
     leaderboard_service = LeaderboardService(session, cache)
-    await leaderboard_service.update_leaderboard(force=True)  # Always force update when called via API
+    # Share the scheduler's leaderboard mutex so manual and scheduled rebuilds never overlap
+    scheduler = request.app.state.scheduler
+    ran = await scheduler.run_exclusive(
+        "leaderboard",
+        lambda: leaderboard_service.update_leaderboard(force=True)  # Always force update when called via API
+    )
+    if not ran:
+        raise HTTPException(status_code=409, detail="Leaderboard rebuild already in progress")
     return {"status": "success", "message": "Leaderboard rebuilt successfully"}
 
+@router.get("/rate-limits", response_model=Dict)
+async def get_rate_limits(
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get upstream rate limiter configuration and counters of this process
+    (calls, throttled, retried, failed)
+    """
+    from core.rate_limit import rapidapi_limiter
+    return {"rapidapi": rapidapi_limiter.stats()}
+
+@router.get("/scheduler/status", response_model=Dict)
+async def get_scheduler_status(
+    request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get scheduler leadership and per-task runtime stats
+    (runs, failures, skipped overlaps, durations, next run)
+    """
+    return await request.app.state.scheduler.get_status()
+
 @router.get("/tetrix-state", response_model=Dict)
 async def get_tetrix_state(
     redis: Redis = Depends(get_redis),
@@ -143,6 +174,33 @@ async def get_tetrix_state(
     tetrix_service = TetrixService(redis, session)
     return await tetrix_service.get_metrics()
 
+@router.get("/tetrix-history", response_model=Dict)
+async def get_tetrix_history(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get TETRIX metrics history (price, cap, holders, volume) for charts.
+    Defaults to the last 24 hours. Resolution ('minute', 'hour', 'day') is chosen
+    automatically from the range length unless given explicitly.
+    """
+    if resolution is not None and resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Resolution must be one of: {', '.join(RESOLUTIONS)}")
+
+    # Treat naive datetimes as UTC
+    end = end or datetime.now(timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    start = start or end - timedelta(days=1)
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    history_service = MetricsHistoryService(session)
+    return await history_service.get_history(start, end, resolution)
+
 @router.post("/combined", response_model=Dict)
 async def get_combined_stats(
     request: UserRequest,
@@ -15,6 +15,8 @@ from core.deps import get_redis
 from core.config import get_settings
 from locales.language_utils import with_locale, LANGUAGE_MODULES
 from services.tetrix_service import TetrixService
+from services.threads_job_queue import threads_job_queue
+from utils.telegram_utils import send_message_parts
 from core.cache import CacheKeys
 from locales import ru, en
 
@@ -83,39 +85,6 @@ def trim_to_visual_width(s: str, max_width: int) -> str:
         
     return result
 
-async def split_and_send_message(telegram_id: int, text: str, **kwargs) -> bool:
-    """Split long message and send parts"""
-    MAX_LENGTH = 4000  # Leave some room for formatting
-    
-    # If message is short enough, send as is
-    if len(text) <= MAX_LENGTH:
-        return await send_telegram_message(telegram_id=telegram_id, text=text, **kwargs)
-    
-    # Split message into parts
-    parts = []
-    while text:
-        if len(text) <= MAX_LENGTH:
-            parts.append(text)
-            break
-            
-        # Find last newline before MAX_LENGTH
-        split_pos = text.rfind('\n', 0, MAX_LENGTH)
-        if split_pos == -1:
-            # If no newline found, split at MAX_LENGTH
-            split_pos = MAX_LENGTH
-            
-        parts.append(text[:split_pos])
-        text = text[split_pos:].lstrip()
-    
-    # Send each part
-    success = True
-    for i, part in enumerate(parts, 1):
-        part_text = f"Part {i}/{len(parts)}:\n\n{part}"
-        if not await send_telegram_message(telegram_id=telegram_id, text=part_text, **kwargs):
-            success = False
-            
-    return success
-
 class TelegramHandler:
     def __init__(self, user_service: UserService, redis_service: RedisService, redis: Redis, session: AsyncSession):
         self.user_service = user_service
@@ -125,6 +94,20 @@ class TelegramHandler:
         # Set Redis client in user_service
         self.user_service.redis = redis
 
+    async def _format_stats_message(self, user, stats: Dict) -> str:
+        """
+        Build stats screen text: metrics part comes preformatted per language and
+        metrics version, only the user's points are interpolated here
+        """
+        tetrix_service = TetrixService(self.user_service.cache, self.session)
+        template = await tetrix_service.get_stats_template(user.language or 'ru')
+        return template.format(
+            points=stats['points'],
+            holding_points=stats['points_breakdown']['holding'],
+            invite_points=stats['points_breakdown']['invites'],
+            early_backer_bonus=stats['points_breakdown']['early_backer_bonus']
+        )
+
     @with_locale
     async def handle_language_selection(self, *, telegram_id: int, strings) -> bool:
         """Show language selection menu"""
@@ -208,46 +191,34 @@ class TelegramHandler:
                         # If user already has analysis report - show it again
                         logger.info(f"[TELEGRAM] Showing existing analysis for user {telegram_id}")
                         try:
-                            report = json.loads(campaign_entry.analysis_report)
-                            return await split_and_send_message(
-                                telegram_id=telegram_id,
-                                text=strings.THREADS_ANALYSIS_COMPLETE.format(
-                                    analysis_text=self.user_service.llm_service.format_report(report)
-                                ),
+                            parts = await self.user_service.get_report_parts(campaign_entry, lang)
+                            return await send_message_parts(
+                                telegram_id,
+                                parts,
                                 parse_mode="HTML",
                                 disable_web_page_preview=True
                             )
                         except Exception as e:
                             logger.error(f"Error showing analysis: {e}")
                         return True
-                    elif campaign_entry.posts_json:
-                        # If we have posts but no analysis - resume analysis
-                        logger.info(f"[TELEGRAM] Resuming analysis for user {telegram_id}")
-                        await send_telegram_message(
-                            telegram_id=telegram_id,
-                            text=strings.THREADS_ANALYZING,
-                            parse_mode="Markdown"
-                        )
-                        # Start analysis
-                        success = await self.analyze_threads_profile(telegram_id=telegram_id, strings=strings)
-                        return success
-                    elif campaign_entry.threads_user_id:
-                        # If we have profile but no posts - fetch posts and analyze
-                        logger.info(f"[TELEGRAM] Starting analysis for existing profile of user {telegram_id}")
-                        await send_telegram_message(
+                    elif campaign_entry.job_status == 'failed' and campaign_entry.last_error == 'not_found':
+                        # Submitted profile doesn't exist - request profile again
+                        return await send_telegram_message(
                             telegram_id=telegram_id,
-                            text=strings.THREADS_ANALYZING,
-                            parse_mode="Markdown"
+                            text=strings.THREADS_PROFILE_REQUEST,
+                            parse_mode="HTML"
                         )
-                        success = await self.analyze_threads_profile(telegram_id=telegram_id, strings=strings)
-                        return success
                     else:
-                        # If we have campaign entry but no profile info - something went wrong, request profile again
-                        logger.warning(f"[TELEGRAM] Campaign entry without profile info for user {telegram_id}")
+                        if campaign_entry.job_status == 'failed':
+                            # Retry failed analysis; workers resume from the last finished step
+                            logger.info(f"[TELEGRAM] Requeueing failed analysis for user {telegram_id}")
+                            await self.user_service.requeue_threads_job(campaign_entry)
+                            threads_job_queue.wake()
+                        # Job is queued or in progress - the report is sent when ready
                         return await send_telegram_message(
                             telegram_id=telegram_id,
-                            text=strings.THREADS_PROFILE_REQUEST,
-                            parse_mode="HTML"
+                            text=strings.THREADS_ANALYZING,
+                            parse_mode="Markdown"
                         )
                 # If no campaign entry - request threads profile
                 return await send_telegram_message(
@@ -296,22 +267,9 @@ class TelegramHandler:
             await self.redis_service.set_status_registered(telegram_id)
             stats = await self.user_service.get_user_stats(user)
             
-            # Get TETRIX metrics
-            tetrix_service = TetrixService(self.redis, self.session)
-            tetrix_metrics = await tetrix_service.get_metrics()
-            
             return await send_telegram_message(
                 telegram_id=telegram_id,
-                text=strings.WELCOME_BACK_SHORT + "\n\n" + strings.STATS_TEMPLATE.format(
-                    points=stats['points'],
-                    health_bar=tetrix_metrics['health']['bar'],
-                    strength_bar=tetrix_metrics['strength']['bar'],
-                    mood_bar=tetrix_metrics['mood']['bar'],
-                    emotion=tetrix_metrics['emotion'],
-                    holding_points=stats['points_breakdown']['holding'],
-                    invite_points=stats['points_breakdown']['invites'],
-                    early_backer_bonus=stats['points_breakdown']['early_backer_bonus']
-                ),
+                text=strings.WELCOME_BACK_SHORT + "\n\n" + await self._format_stats_message(user, stats),
                 parse_mode="HTML",
                 reply_markup={
                     "inline_keyboard": [
@@ -581,21 +539,10 @@ class TelegramHandler:
                     )
                 else:
                     stats = await self.user_service.get_user_stats(user)
-                    tetrix_service = TetrixService(self.redis, self.session)
-                    tetrix_metrics = await tetrix_service.get_metrics()
                     
                     return await send_telegram_message(
                         telegram_id=telegram_id,
-                        text=strings.STATS_TEMPLATE.format(
-                            points=stats['points'],
-                            health_bar=tetrix_metrics['health']['bar'],
-                            strength_bar=tetrix_metrics['strength']['bar'],
-                            mood_bar=tetrix_metrics['mood']['bar'],
-                            emotion=tetrix_metrics['emotion'],
-                            holding_points=stats['points_breakdown']['holding'],
-                            invite_points=stats['points_breakdown']['invites'],
-                            early_backer_bonus=stats['points_breakdown']['early_backer_bonus']
-                        ),
+                        text=await self._format_stats_message(user, stats),
                         parse_mode="HTML",
                         reply_markup={
                             "inline_keyboard": [
@@ -641,42 +588,21 @@ class TelegramHandler:
             
             if not success:
                 # Send error message
-                if error == 'invalid_format':
-                    logger.debug("Sending invalid format message")
-                    await send_telegram_message(
-                        telegram_id=telegram_id,
-                        text=strings.THREADS_INVALID_FORMAT,
-                        parse_mode="Markdown"
-                    )
-                elif error == 'not_found':
-                    logger.debug("Sending profile not found message")
-                    await send_telegram_message(
-                        telegram_id=telegram_id,
-                        text=strings.THREADS_PROFILE_NOT_FOUND,
-                        parse_mode="Markdown"
-                    )
+                logger.debug("Sending invalid format message")
+                await send_telegram_message(
+                    telegram_id=telegram_id,
+                    text=strings.THREADS_INVALID_FORMAT,
+                    parse_mode="Markdown"
+                )
                 return
                 
-            # Send analyzing message
+            # Send analyzing message; fetch, analysis and delivery run in the job queue workers
             await send_telegram_message(
                 telegram_id=telegram_id,
                 text=strings.THREADS_ANALYZING,
                 parse_mode="Markdown"
             )
-                
-            # Start analysis
-            logger.debug("Starting threads profile analysis")
-            success = await self.user_service.analyze_threads_profile(telegram_id)
-            logger.debug(f"analyze_threads_profile result: success={success}")
-            
-            if not success:
-                logger.debug("Sending analysis error message")
-                await send_telegram_message(
-                    telegram_id=telegram_id,
-                    text=strings.THREADS_ANALYSIS_ERROR,
-                    parse_mode="Markdown"
-                )
-                return
+            threads_job_queue.wake()
 
     async def handle_callback(self, telegram_id: int, callback_data: str) -> None:
         """Handle callback query"""
@@ -702,36 +628,6 @@ class TelegramHandler:
             logger.error(f"Error handling callback from {telegram_id}: {e}")
             await self.send_error_message(telegram_id)
 
-    @with_locale
-    async def analyze_threads_profile(self, *, telegram_id: int, strings) -> bool:
-        """Analyze user's Threads profile"""
-        try:
-            logger.debug(f"Starting analyze_threads_profile for telegram_id={telegram_id}")
-            
-            # Start analysis
-            success = await self.user_service.analyze_threads_profile(telegram_id)
-            logger.debug(f"analyze_threads_profile result: success={success}")
-            
-            if not success:
-                # Send error message
-                logger.debug("Sending analysis error message")
-                await send_telegram_message(
-                    telegram_id=telegram_id,
-                    text=strings.THREADS_ANALYSIS_ERROR,
-                    parse_mode="Markdown"
-                )
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error in analyze_threads_profile: {e}")
-            await send_telegram_message(
-                telegram_id=telegram_id,
-                text=strings.THREADS_ANALYSIS_ERROR,
-                parse_mode="Markdown"
-            )
-            return False
-
 @router.post(WEBHOOK_PATH)
 async def telegram_webhook(
     update: Dict[str, Any],
@@ -2,9 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 from pydantic import BaseModel
-import secrets
 import logging
-from typing import Optional, Dict, Any
+from typing import Dict, Any
 import json
 
 from models.database import get_session
@@ -12,9 +11,13 @@ from services.user_service import UserService
 from services.redis_service import RedisService
 from core.deps import get_redis
 from core.config import get_settings
+from services.ton_payload import create_payload, consume_payload
+from services.ton_proof_service import TonProofService
+from utils.ton_address import normalize_address
 from locales.language_utils import with_locale
 from routers.telegram import send_telegram_message
 
+settings = get_settings()
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ton-connect", tags=["ton-connect"])
 
@@ -25,6 +28,10 @@ class ProofRequest(BaseModel):
     telegram_id: int
     wallet_address: str
     payload: str
+    # TON Connect ton_proof item ({timestamp, domain, payload, signature, state_init}) and wallet public key;
+    # the wallet signature proves ownership of wallet_address
+    proof: Dict[str, Any]
+    public_key: str
 
 class TonConnectHandler:
     def __init__(self, user_service: UserService, redis_service: RedisService):
@@ -73,8 +80,8 @@ async def get_message(request: MessageRequest):
     """
     try:
         logger.info(f"[TON_CONNECT] Received get_message request for telegram_id={request.telegram_id}")
-        # Generate random payload
-        payload = secrets.token_hex(32)
+        # Signed payload, verified statelessly in /proof
+        payload = create_payload(request.telegram_id, settings.JWT_SECRET_KEY)
         logger.info(f"[TON_CONNECT] Generated payload={payload} for telegram_id={request.telegram_id}")
         return {"message": payload}
     except Exception as e:
@@ -89,6 +96,20 @@ async def verify_proof(
     redis: Redis = Depends(get_redis)
 ):
     """Handle TON Connect proof verification"""
+    # Payload must be one we issued to this user, unexpired and not used before
+    if not await consume_payload(redis, proof_data.payload, proof_data.telegram_id, settings.JWT_SECRET_KEY):
+        raise HTTPException(status_code=400, detail="Invalid or expired payload")
+    if proof_data.proof.get('payload') != proof_data.payload:
+        raise HTTPException(status_code=400, detail="Proof does not match payload")
+    # CPU-bound signature check runs in the proof executor, off the event loop
+    verified = await TonProofService.check_proof_async({
+        'address': proof_data.wallet_address,
+        'public_key': proof_data.public_key,
+        'proof': proof_data.proof
+    })
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid wallet proof")
+
     try:
         # Get cache from app state
         cache = request.app.state.cache
@@ -127,7 +148,7 @@ async def verify_proof(
                 # Update wallet address and phase
                 await user_service.update_user(
                     user,
-                    wallet_address=proof_data.wallet_address,
+                    wallet_address=normalize_address(proof_data.wallet_address) or proof_data.wallet_address,
                     registration_phase='pending'
                 )
             else:
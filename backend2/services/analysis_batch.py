@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.threads_job_campaign import ThreadsJobCampaign
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50  # Rows claimed and written per round
+BATCH_CONCURRENCY = 8  # Analyses in flight at once
+
+class OpenAIBackend:
+    """Analysis backend using LLMService (OpenAI with prompt budget and analysis cache)"""
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None, cache=None):
+        from services.llm_service import LLMService
+        self.llm_service = LLMService(cache, session_factory)
+
+    async def analyze(self, posts: List[str], telegram_id: int, language: str) -> Optional[Dict]:
+        """Analysis report for posts, None on failure"""
+        return await self.llm_service.analyze_threads_profile(posts, telegram_id, language)
+
+class StubBackend:
+    """Local backend returning a canned report after an optional delay, for tests and dry runs"""
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0):
+        """
+        Args:
+            latency (float): Seconds every analysis takes
+            fail_every (int): Fail every n-th analysis (0 never) to exercise error handling
+        """
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0  # Analyses requested so far
+
+    async def analyze(self, posts: List[str], telegram_id: int, language: str) -> Optional[Dict]:
+        """Canned report mentioning the number of posts"""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_every and self.calls % self.fail_every == 0:
+            return None
+        return {
+            "language": language,
+            "telegram_id": telegram_id,
+            "analysis": f"Stub analysis of {len(posts)} posts"
+        }
+
+class BatchAnalyzer:
+    """
+    Offline runner for campaign backlogs: analyzes threads_job_campaign rows that have
+    extracted posts but no report. Rows are claimed with SKIP LOCKED under a queue lease,
+    so the Threads job queue workers leave them alone meanwhile. Reports of a round are
+    written with one bulk UPDATE; with notify the rows are handed back to the job queue,
+    whose sending step delivers them (no analysis is repeated), otherwise they are marked
+    done and users see the report on their next /start.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, backend, concurrency: int = BATCH_CONCURRENCY,
+                 batch_size: int = BATCH_SIZE, notify: bool = True):
+        """
+        Args:
+            session_factory (async_sessionmaker): Database session factory
+            backend: Object with async analyze(posts, telegram_id, language) -> Optional[Dict]
+            concurrency (int): Analyses in flight at once
+            batch_size (int): Rows claimed and written per round
+            notify (bool): Queue report delivery to users
+        """
+        self.session_factory = session_factory
+        self.backend = backend
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.notify = notify
+        self.worker_id = f"batch:{socket.gethostname()}:{os.getpid()}"  # Lease owner name
+
+    async def _claim(self, session, after_id: int, count: int) -> List:
+        """Lock next pending rows after after_id (rows failing in this run are not retried) and lease them"""
+        result = await session.execute(
+            select(ThreadsJobCampaign, User.telegram_id, User.language)
+            .join(User, User.id == ThreadsJobCampaign.user_id)
+            .where(
+                ThreadsJobCampaign.post_texts.isnot(None),
+                ThreadsJobCampaign.analysis_report.is_(None),
+                ThreadsJobCampaign.job_status.in_(["queued", "failed"]),
+                ThreadsJobCampaign.id > after_id
+            )
+            .order_by(ThreadsJobCampaign.id)
+            .limit(count)
+            .with_for_update(skip_locked=True, of=ThreadsJobCampaign)
+        )
+        rows = result.all()
+        now = datetime.now(timezone.utc)
+        for campaign, _, _ in rows:
+            campaign.job_status = "analyzing"
+            campaign.locked_by = self.worker_id
+            campaign.locked_at = now
+        await session.commit()
+        return rows
+
+    async def _analyze(self, semaphore: asyncio.Semaphore, campaign, telegram_id: int, language: str) -> Dict:
+        """Analyze one row, returns its bulk update parameters"""
+        async with semaphore:
+            try:
+                report = await self.backend.analyze(campaign.post_texts, telegram_id, language or 'ru')
+                error = None if report else "Analysis failed"
+            except Exception as e:
+                report, error = None, str(e)
+
+        if report is None:
+            logger.warning(f"Batch analysis of job {campaign.id} failed: {error}")
+            return {"id": campaign.id, "job_status": "failed", "last_error": error, "locked_by": None}
+        return {
+            "id": campaign.id,
+            "analysis_report": json.dumps(report, ensure_ascii=False),
+            "job_status": "queued" if self.notify else "done",
+            "attempts": 0,
+            "last_error": None,
+            "locked_by": None,
+            "run_after": datetime.now(timezone.utc)
+        }
+
+    async def run(self, limit: Optional[int] = None) -> Dict:
+        """
+        Process backlog until empty
+        Args:
+            limit (int): Max rows to process, None for all
+        Returns:
+            Dict: Rows analyzed, failed and queued for delivery
+        """
+        stats = {"analyzed": 0, "failed": 0, "notified": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_id = 0  # Keyset position, every row is tried once per run
+        while True:
+            count = self.batch_size
+            if limit is not None:
+                count = min(count, limit - stats["analyzed"] - stats["failed"])
+                if count <= 0:
+                    break
+            async with self.session_factory() as session:
+                rows = await self._claim(session, last_id, count)
+                if not rows:
+                    break
+                last_id = rows[-1][0].id
+
+                updates = await asyncio.gather(*(
+                    self._analyze(semaphore, campaign, telegram_id, language)
+                    for campaign, telegram_id, language in rows
+                ))
+                # One bulk UPDATE by primary key for the whole round
+                await session.execute(update(ThreadsJobCampaign), list(updates))
+                await session.commit()
+
+            failed = sum(1 for row in updates if row["job_status"] == "failed")
+            stats["failed"] += failed
+            stats["analyzed"] += len(updates) - failed
+            if self.notify:
+                stats["notified"] += len(updates) - failed
+            logger.info(f"Batch round: {len(updates) - failed} analyzed, {failed} failed, total {stats}")
+
+        if self.notify and stats["notified"]:
+            # Delivery is done by the job queue workers of the running app
+            logger.info(f"{stats['notified']} reports queued for delivery")
+        return stats
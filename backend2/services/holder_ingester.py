@@ -0,0 +1,559 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.rate_limit import parse_retry_after
+from core.upstream import get_http_session
+
+logger = logging.getLogger(__name__)
+
+TONCENTER_API_URL = os.getenv("TONCENTER_API_URL", "https://toncenter.com/api/v3")  # Overridable for the fake server
+TONCENTER_API_KEY = os.getenv("TONCENTER_API_KEY")  # Optional key, raises toncenter rate limit
+TETRIX_JETTON_ADDRESS = "EQC-OHxhI9r5ojKf6QMLFjhQrKoawN1thhHFCvImINhfK40C"  # TETRIX jetton master
+
+PAGE_SIZE = 1000  # Max page size accepted by toncenter /jetton/wallets
+MAX_RETRIES = 5  # Attempts per page before the ingest fails
+OWNERS_PER_REQUEST = 100  # Owner addresses per /jetton/wallets lookup in delta sync
+DELTA_MAX_OWNERS = 5000  # More changed owners than this and a full snapshot is cheaper
+FULL_RESYNC_INTERVAL = 86400  # Seconds between full snapshots, deltas in between
+
+# Columns COPY'd into the staging table, in record order
+HOLDER_COLUMNS = [
+    "address", "owner", "owner_friendly", "wallet_friendly",
+    "balance", "jetton", "last_transaction_lt", "checkpoint_id"
+]
+
+CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE jetton_holders_staging
+        (LIKE jetton_holders INCLUDING DEFAULTS)
+    ON COMMIT DROP
+""")
+
+# Pages fetched concurrently with offset pagination may overlap or skip wallets when
+# balances move; DISTINCT ON keeps one row per wallet, _merge rechecks skipped ones
+MERGE_STAGING_SQL = text("""
+    INSERT INTO jetton_holders AS h
+        (address, owner, owner_friendly, wallet_friendly, balance, jetton, last_transaction_lt, checkpoint_id, updated_at)
+    SELECT DISTINCT ON (address)
+        address, owner, owner_friendly, wallet_friendly, balance, jetton, last_transaction_lt, checkpoint_id, now()
+    FROM jetton_holders_staging
+    ORDER BY address, last_transaction_lt DESC NULLS LAST
+    ON CONFLICT (address) DO UPDATE SET
+        owner = EXCLUDED.owner,
+        owner_friendly = EXCLUDED.owner_friendly,
+        wallet_friendly = EXCLUDED.wallet_friendly,
+        balance = EXCLUDED.balance,
+        last_transaction_lt = EXCLUDED.last_transaction_lt,
+        checkpoint_id = EXCLUDED.checkpoint_id,
+        updated_at = now()
+""")
+
+# Single wallet upsert used by delta sync; older data never overwrites newer
+UPSERT_HOLDER_SQL = text("""
+    INSERT INTO jetton_holders AS h
+        (address, owner, owner_friendly, wallet_friendly, balance, jetton, last_transaction_lt, checkpoint_id, updated_at)
+    VALUES
+        (:address, :owner, :owner_friendly, :wallet_friendly, :balance, :jetton, :last_transaction_lt, :checkpoint_id, now())
+    ON CONFLICT (address) DO UPDATE SET
+        owner = EXCLUDED.owner,
+        owner_friendly = EXCLUDED.owner_friendly,
+        wallet_friendly = EXCLUDED.wallet_friendly,
+        balance = EXCLUDED.balance,
+        last_transaction_lt = EXCLUDED.last_transaction_lt,
+        checkpoint_id = EXCLUDED.checkpoint_id,
+        updated_at = now()
+    WHERE h.last_transaction_lt IS NULL OR h.last_transaction_lt < EXCLUDED.last_transaction_lt
+""")
+
+# Async callback receiving balance change events of one sync run:
+# [{"owner", "address", "old_balance", "new_balance", "last_transaction_lt"}]
+BalanceChangeListener = Callable[[List[Dict]], Awaitable[None]]
+
+class AdaptiveRateLimiter:
+    """
+    AIMD rate limiter: request rate grows additively while upstream answers
+    and is cut multiplicatively when it throttles (HTTP 429).
+    """
+
+    def __init__(self, rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 increase: float = 0.2, decrease: float = 0.5):
+        """
+        Args:
+            rate (float): Initial rate in requests per second
+            min_rate (float): Lower bound of the rate
+            max_rate (float): Upper bound of the rate
+            increase (float): Rate added after every successful request
+            decrease (float): Factor the rate is multiplied by on throttling
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._next_slot = 0.0  # Monotonic time when the next request may start
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until the next request may be sent"""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """Additive increase"""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease, honouring upstream Retry-After"""
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self._next_slot = max(self._next_slot, time.monotonic() + pause)
+        logger.warning(f"toncenter throttled, rate lowered to {self.rate:.2f} req/s")
+
+async def toncenter_get(http: aiohttp.ClientSession, rate_limiter: AdaptiveRateLimiter, url: str, params,
+                        retries: int = MAX_RETRIES, timeout: float = 30) -> Dict:
+    """
+    GET toncenter endpoint through the rate limiter, retrying throttled and failed requests
+    Args:
+        http: aiohttp session
+        rate_limiter (AdaptiveRateLimiter): Limiter slowed down on throttling
+        url (str): Endpoint URL, e.g. f"{TONCENTER_API_URL}/jetton/wallets"
+        params: Query parameters (dict or list of pairs for repeated keys)
+        retries (int): Attempts before giving up
+        timeout (float): Seconds per attempt
+    Returns:
+        Dict: Parsed JSON response
+    """
+    headers = {"accept": "application/json"}
+    if TONCENTER_API_KEY:
+        headers["X-API-Key"] = TONCENTER_API_KEY
+
+    for attempt in range(1, retries + 1):
+        await rate_limiter.acquire()
+        try:
+            async with http.get(url, params=params, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 429 or response.status >= 500:
+                    # Retry-After may be seconds or an HTTP date
+                    rate_limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                    continue
+                response.raise_for_status()
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"toncenter {url} failed (attempt {attempt}): {e}")
+            rate_limiter.on_throttle()
+            continue
+
+        rate_limiter.on_success()
+        return data
+
+    raise RuntimeError(f"toncenter {url} still throttled after {retries} attempts")
+
+class HolderIngester:
+    """
+    Async TETRIX holder snapshot ingester.
+    Pages of toncenter /jetton/wallets are fetched with bounded concurrency and
+    adaptive rate limiting, streamed into a staging table with COPY and merged
+    into jetton_holders. Every run is recorded in holder_ingest_checkpoints.
+    Between full snapshots only wallets of owners with new jetton transfers
+    (by last_transaction_lt watermark) are refreshed, see sync().
+    """
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None, base_url: str = TONCENTER_API_URL,
+                 jetton_address: str = TETRIX_JETTON_ADDRESS, page_size: int = PAGE_SIZE,
+                 concurrency: int = 4, rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        """
+        Args:
+            session_factory: SQLAlchemy async session maker (not needed for fetch_pages)
+            base_url (str): toncenter v3 API base URL
+            jetton_address (str): Jetton master address
+            page_size (int): Rows per page
+            concurrency (int): Max pages in flight
+            rate_limiter (AdaptiveRateLimiter): Shared limiter, a new one by default
+        """
+        self.session_factory = session_factory
+        self.base_url = base_url.rstrip("/")
+        self.jetton_address = jetton_address
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self._listeners: List[BalanceChangeListener] = []  # Balance change event subscribers
+
+    def on_balance_change(self, listener: BalanceChangeListener):
+        """Subscribe to balance change events emitted by delta sync"""
+        self._listeners.append(listener)
+
+    async def _get(self, http: aiohttp.ClientSession, path: str, params) -> Dict:
+        """GET toncenter endpoint through this ingester's rate limiter, see toncenter_get"""
+        return await toncenter_get(http, self.rate_limiter, f"{self.base_url}{path}", params, timeout=30)
+
+    def _wallets_with_friendly(self, data: Dict) -> List[Dict]:
+        """Extract wallet rows with friendly addresses resolved from address book"""
+        address_book = data.get("address_book", {})
+        return [
+            {
+                **wallet,
+                "wallet_friendly": address_book.get(wallet["address"], {}).get("user_friendly", wallet["address"]),
+                "owner_friendly": address_book.get(wallet["owner"], {}).get("user_friendly", wallet["owner"])
+            }
+            for wallet in data.get("jetton_wallets", [])
+        ]
+
+    async def _fetch_page(self, http: aiohttp.ClientSession, offset: int) -> List[Dict]:
+        """
+        Fetch one page of holders sorted by balance
+        Args:
+            http: aiohttp session
+            offset (int): Page offset in rows
+        Returns:
+            List[Dict]: Holder rows with friendly addresses resolved from address book
+        """
+        data = await self._get(http, "/jetton/wallets", {
+            "jetton_address": self.jetton_address,
+            "exclude_zero_balance": "true",
+            "limit": self.page_size,
+            "offset": offset,
+            "sort": "desc"
+        })
+        return self._wallets_with_friendly(data)
+
+    async def _fetch_changed_owners(self, http: aiohttp.ClientSession, start_lt: int) -> Tuple[Set[str], int]:
+        """
+        Collect owners touched by jetton transfers since start_lt
+        Returns:
+            Tuple[Set[str], int]: Owner addresses and the highest transfer lt seen
+        """
+        owners: Set[str] = set()
+        max_lt = start_lt
+        offset = 0
+        while True:
+            data = await self._get(http, "/jetton/transfers", {
+                "jetton_master": self.jetton_address,
+                "start_lt": start_lt,
+                "limit": self.page_size,
+                "offset": offset,
+                "sort": "asc"
+            })
+            transfers = data.get("jetton_transfers", [])
+            for transfer in transfers:
+                owners.update(owner for owner in (transfer.get("source"), transfer.get("destination")) if owner)
+                max_lt = max(max_lt, int(transfer["transaction_lt"]))
+            if len(transfers) < self.page_size or len(owners) > DELTA_MAX_OWNERS:
+                return owners, max_lt
+            offset += self.page_size
+
+    async def _fetch_wallets_of(self, http: aiohttp.ClientSession, owners: List[str]) -> List[Dict]:
+        """Fetch current jetton wallets of given owners, batched and bounded by concurrency"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_batch(batch: List[str]) -> List[Dict]:
+            params = [("jetton_address", self.jetton_address), ("exclude_zero_balance", "true"),
+                      ("limit", self.page_size)]
+            params += [("owner_address", owner) for owner in batch]
+            async with semaphore:
+                return self._wallets_with_friendly(await self._get(http, "/jetton/wallets", params))
+
+        batches = [owners[i:i + OWNERS_PER_REQUEST] for i in range(0, len(owners), OWNERS_PER_REQUEST)]
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        return [wallet for batch in results for wallet in batch]
+
+    async def fetch_pages(self, http: Optional[aiohttp.ClientSession] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Fetch all holder pages with up to `concurrency` requests in flight.
+        Total count is unknown upfront: workers claim increasing offsets until
+        a page shorter than page_size marks the end.
+        Yields:
+            List[Dict]: Holder rows of one page, pages in completion order
+        """
+        http = http or get_http_session()
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        next_offset = 0  # Next unclaimed offset
+        end_offset: Optional[int] = None  # Offset of the first short page once seen
+
+        async def worker():
+            nonlocal next_offset, end_offset
+            while end_offset is None or next_offset < end_offset:
+                offset = next_offset
+                next_offset += self.page_size
+                rows = await self._fetch_page(http, offset)
+                if len(rows) < self.page_size and (end_offset is None or offset < end_offset):
+                    end_offset = offset
+                if rows:
+                    await pages.put(rows)
+
+        async def run_workers():
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                # First failure ends the run, stop the other workers instead of letting them page on
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await pages.put(None)
+
+        runner = asyncio.create_task(run_workers())
+        try:
+            while (rows := await pages.get()) is not None:
+                yield rows
+            await runner  # Propagate worker errors
+        finally:
+            runner.cancel()
+
+    def _to_record(self, row: Dict, checkpoint_id: int) -> tuple:
+        """Convert toncenter wallet row to a COPY record"""
+        lt = row.get("last_transaction_lt")
+        return (
+            row["address"], row["owner"], row.get("owner_friendly"), row.get("wallet_friendly"),
+            int(row["balance"]), row["jetton"], int(lt) if lt else None, checkpoint_id
+        )
+
+    async def _start_checkpoint(self, mode: str) -> int:
+        """Record a running ingest ('full' or 'delta') and return its id"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text("""
+                    INSERT INTO holder_ingest_checkpoints (jetton, mode, status)
+                    VALUES (:jetton, :mode, 'running') RETURNING id
+                """),
+                {"jetton": self.jetton_address, "mode": mode}
+            )
+            checkpoint_id = result.scalar_one()
+            await session.commit()
+            return checkpoint_id
+
+    async def _finish_checkpoint(self, checkpoint_id: int, status: str, pages: int, rows: int,
+                                 max_lt: Optional[int] = None, error: Optional[str] = None):
+        """Record ingest outcome and the lt watermark the next delta sync starts from"""
+        async with self.session_factory() as session:
+            await session.execute(
+                text("""
+                    UPDATE holder_ingest_checkpoints
+                    SET status = :status, pages = :pages, rows = :rows, max_lt = :max_lt,
+                        error = :error, finished_at = now()
+                    WHERE id = :id
+                """),
+                {"id": checkpoint_id, "status": status, "pages": pages, "rows": rows,
+                 "max_lt": max_lt, "error": error}
+            )
+            await session.commit()
+
+    async def _last_checkpoint(self) -> Optional[Dict]:
+        """Latest completed checkpoint with the time of the latest full snapshot"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text("""
+                    SELECT max_lt,
+                        (SELECT MAX(finished_at) FROM holder_ingest_checkpoints
+                         WHERE jetton = :jetton AND mode = 'full' AND status = 'completed') AS last_full_at
+                    FROM holder_ingest_checkpoints
+                    WHERE jetton = :jetton AND status = 'completed' AND max_lt IS NOT NULL
+                    ORDER BY id DESC
+                    LIMIT 1
+                """),
+                {"jetton": self.jetton_address}
+            )
+            row = result.first()
+            return {"max_lt": row.max_lt, "last_full_at": row.last_full_at} if row else None
+
+    async def sync(self, fence: Optional[Callable[[], Awaitable[bool]]] = None) -> Dict:
+        """
+        Keep jetton_holders current: delta sync from the last checkpoint's lt watermark,
+        full snapshot when there is no watermark yet or the last full one is too old
+        Args:
+            fence: Optional check run before commit; returning False discards the results
+        Returns:
+            Dict: Result of the run with its mode
+        """
+        last = await self._last_checkpoint()
+        if last is None or last["last_full_at"] is None or \
+                (datetime.now(timezone.utc) - last["last_full_at"]).total_seconds() > FULL_RESYNC_INTERVAL:
+            return {"mode": "full", **await self.ingest(fence)}
+
+        result = await self.ingest_delta(last["max_lt"], fence)
+        if result is None:
+            return {"mode": "full", **await self.ingest(fence)}
+        return {"mode": "delta", **result}
+
+    async def ingest_delta(self, start_lt: int, fence: Optional[Callable[[], Awaitable[bool]]] = None) -> Optional[Dict]:
+        """
+        Update only wallets whose owners had jetton transfers since start_lt,
+        then emit balance change events to subscribers
+        Args:
+            start_lt (int): Watermark of the previous checkpoint
+            fence: Optional check run before commit
+        Returns:
+            Optional[Dict]: Checkpoint id, changed owners and events count,
+            None if too many owners changed and a full snapshot should be taken instead
+        """
+        http = get_http_session()
+        owners, max_lt = await self._fetch_changed_owners(http, start_lt)
+        if len(owners) > DELTA_MAX_OWNERS:
+            logger.info(f"{len(owners)}+ holders changed since lt {start_lt}, falling back to full snapshot")
+            return None
+
+        checkpoint_id = await self._start_checkpoint("delta")
+        events: List[Dict] = []
+        try:
+            wallets = await self._fetch_wallets_of(http, sorted(owners)) if owners else []
+            async with self.session_factory() as session:
+                events = await self._apply_delta(session, owners, wallets, checkpoint_id)
+                if fence is not None and not await fence():
+                    raise RuntimeError("Leadership lost during holders delta sync, discarding results")
+                await session.commit()
+            max_lt = max([max_lt] + [int(w["last_transaction_lt"]) for w in wallets if w.get("last_transaction_lt")])
+        except Exception as e:
+            logger.error(f"Holders delta sync {checkpoint_id} failed: {e}", exc_info=True)
+            await self._finish_checkpoint(checkpoint_id, "failed", 0, 0, error=str(e))
+            raise
+
+        await self._finish_checkpoint(checkpoint_id, "completed", 0, len(wallets), max_lt)
+        logger.info(f"Holders delta sync {checkpoint_id}: {len(owners)} owners, {len(events)} balance changes")
+        await self._emit(events)
+        return {"checkpoint_id": checkpoint_id, "owners": len(owners), "events": len(events)}
+
+    async def _apply_delta(self, session: AsyncSession, owners: Set[str], wallets: List[Dict],
+                           checkpoint_id: int) -> List[Dict]:
+        """
+        Upsert fetched wallets and remove wallets of changed owners that dropped to zero
+        Returns:
+            List[Dict]: Balance change events
+        """
+        if not owners:
+            return []
+        result = await session.execute(
+            text("SELECT address, owner, balance, last_transaction_lt FROM jetton_holders WHERE owner = ANY(:owners)"),
+            {"owners": list(owners)}
+        )
+        stored = {row.address: row for row in result}
+        events = []
+
+        for wallet in wallets:
+            lt = int(wallet["last_transaction_lt"]) if wallet.get("last_transaction_lt") else None
+            previous = stored.pop(wallet["address"], None)
+            if previous is not None and previous.last_transaction_lt and lt and previous.last_transaction_lt >= lt:
+                continue  # Already up to date
+            record = dict(zip(HOLDER_COLUMNS, self._to_record(wallet, checkpoint_id)))
+            await session.execute(UPSERT_HOLDER_SQL, record)
+            old_balance = int(previous.balance) if previous is not None else 0
+            if old_balance != record["balance"]:
+                events.append({
+                    "owner": record["owner"], "address": record["address"],
+                    "old_balance": old_balance, "new_balance": record["balance"], "last_transaction_lt": lt
+                })
+
+        # exclude_zero_balance hides emptied wallets: whatever of the changed owners is left is gone
+        if stored:
+            await session.execute(
+                text("DELETE FROM jetton_holders WHERE address = ANY(:addresses)"),
+                {"addresses": list(stored)}
+            )
+            events += [
+                {"owner": row.owner, "address": row.address, "old_balance": int(row.balance),
+                 "new_balance": 0, "last_transaction_lt": None}
+                for row in stored.values()
+            ]
+        return events
+
+    async def _emit(self, events: List[Dict]):
+        """Deliver balance change events; a failing listener doesn't affect others"""
+        if not events:
+            return
+        for listener in self._listeners:
+            try:
+                await listener(events)
+            except Exception as e:
+                logger.error(f"Balance change listener failed: {e}", exc_info=True)
+
+    async def ingest(self, fence: Optional[Callable[[], Awaitable[bool]]] = None) -> Dict:
+        """
+        Take a full holder snapshot into jetton_holders
+        Args:
+            fence: Optional check run before commit; returning False discards the snapshot
+        Returns:
+            Dict: Checkpoint id, pages and rows ingested
+        """
+        started = time.monotonic()
+        checkpoint_id = await self._start_checkpoint("full")
+        pages = rows = max_lt = 0
+        try:
+            async with self.session_factory() as session:
+                await session.execute(CREATE_STAGING_SQL)
+                # COPY through the asyncpg driver connection behind the session
+                raw = await (await session.connection()).get_raw_connection()
+                driver = raw.driver_connection
+
+                async for page in self.fetch_pages():
+                    await driver.copy_records_to_table(
+                        "jetton_holders_staging",
+                        records=[self._to_record(row, checkpoint_id) for row in page],
+                        columns=HOLDER_COLUMNS
+                    )
+                    pages += 1
+                    rows += len(page)
+                    max_lt = max([max_lt] + [int(row["last_transaction_lt"]) for row in page if row.get("last_transaction_lt")])
+
+                # An empty snapshot means toncenter misbehaved, don't wipe known holders
+                if rows == 0:
+                    raise RuntimeError("toncenter returned no holders")
+                await self._merge(session, checkpoint_id)
+                if fence is not None and not await fence():
+                    raise RuntimeError("Leadership lost during holders ingest, discarding snapshot")
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Holders ingest {checkpoint_id} failed: {e}", exc_info=True)
+            await self._finish_checkpoint(checkpoint_id, "failed", pages, rows, error=str(e))
+            raise
+
+        await self._finish_checkpoint(checkpoint_id, "completed", pages, rows, max_lt)
+        logger.info(f"Holders ingest {checkpoint_id}: {rows} rows in {pages} pages, {time.monotonic() - started:.1f}s")
+        return {"checkpoint_id": checkpoint_id, "pages": pages, "rows": rows}
+
+    async def _merge(self, session: AsyncSession, checkpoint_id: int):
+        """
+        Upsert staged snapshot and drop wallets that left it. Offset pages shift while
+        balances move, so a wallet missing from the snapshot may only have been skipped:
+        missing wallets are looked up by owner and only those toncenter no longer lists are deleted.
+        """
+        await session.execute(MERGE_STAGING_SQL)
+        # toncenter returns jetton master in raw form, take it from the staged rows
+        result = await session.execute(
+            text("""
+                SELECT address, owner FROM jetton_holders
+                WHERE checkpoint_id <> :checkpoint_id
+                AND jetton IN (SELECT DISTINCT jetton FROM jetton_holders_staging)
+            """),
+            {"checkpoint_id": checkpoint_id}
+        )
+        missing = {row.address: row.owner for row in result}
+        if not missing:
+            return
+        owners = sorted(set(missing.values()))
+        if len(owners) > DELTA_MAX_OWNERS:
+            # Far more than wallets emptied between snapshots: the snapshot itself is suspect
+            logger.warning(f"{len(missing)} wallets missing from holders snapshot {checkpoint_id}, keeping them")
+            return
+
+        for wallet in await self._fetch_wallets_of(get_http_session(), owners):
+            if wallet["address"] in missing:
+                missing.pop(wallet["address"])
+                record = dict(zip(HOLDER_COLUMNS, self._to_record(wallet, checkpoint_id)))
+                await session.execute(UPSERT_HOLDER_SQL, record)
+        if missing:
+            await session.execute(
+                text("DELETE FROM jetton_holders WHERE address = ANY(:addresses)"),
+                {"addresses": list(missing)}
+            )
+        logger.info(f"Holders snapshot {checkpoint_id}: {len(owners)} owners rechecked, {len(missing)} wallets removed")
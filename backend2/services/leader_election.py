@@ -0,0 +1,116 @@
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Take the lease only if nobody holds it; every successful acquisition gets a new fencing token
+ACQUIRE_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    local token = redis.call('incr', KEYS[2])
+    redis.call('set', KEYS[1], ARGV[1] .. '|' .. token, 'PX', ARGV[2])
+    return token
+end
+return false
+"""
+
+# Extend the lease only if it is still ours
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Drop the lease only if it is still ours
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class LeaderElection:
+    """
+    Redis lease based leader election.
+    One process holds the lease key and renews it every renew_interval seconds;
+    if it dies the lease expires after lease_ttl and another process takes over.
+    Every acquisition gets a monotonically increasing fencing token, so writes
+    made by a leader that lost its lease can be detected and rejected.
+    """
+
+    def __init__(self, redis: Redis, name: str = "scheduler", lease_ttl: float = 15, renew_interval: float = 5):
+        """
+        Args:
+            redis (Redis): Async Redis client
+            name (str): Election name, used as key prefix
+            lease_ttl (float): Lease lifetime in seconds (max failover time)
+            renew_interval (float): How often the leader renews and followers retry, in seconds
+        """
+        self.redis = redis
+        self.key = f"{name}:leader"
+        self.fence_key = f"{name}:leader:fence"
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval
+        # Unique id of this process in the cluster
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.token: Optional[int] = None  # Fencing token while leader, None otherwise
+        self._last_renewed = 0.0  # Monotonic time of the last confirmed lease
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process holds a lease that has not expired locally"""
+        return self.token is not None and time.monotonic() - self._last_renewed < self.lease_ttl
+
+    @property
+    def _lease_value(self) -> str:
+        """Value stored in the lease key while we are leader"""
+        return f"{self.instance_id}|{self.token}"
+
+    async def try_acquire(self) -> bool:
+        """Try to become leader, returns True on success"""
+        token = await self.redis.eval(
+            ACQUIRE_SCRIPT, 2, self.key, self.fence_key,
+            self.instance_id, int(self.lease_ttl * 1000)
+        )
+        if not token:
+            return False
+        self.token = int(token)
+        self._last_renewed = time.monotonic()
+        logger.info(f"Instance {self.instance_id} became leader with fencing token {self.token}")
+        return True
+
+    async def renew(self) -> bool:
+        """Extend the lease, returns False if leadership was lost"""
+        if self.token is None:
+            return False
+        renewed = await self.redis.eval(
+            RENEW_SCRIPT, 1, self.key, self._lease_value, int(self.lease_ttl * 1000)
+        )
+        if not renewed:
+            logger.warning(f"Instance {self.instance_id} lost leadership (token {self.token})")
+            self.token = None
+            return False
+        self._last_renewed = time.monotonic()
+        return True
+
+    async def validate(self) -> bool:
+        """Check in Redis that the lease still carries our fencing token"""
+        if self.token is None:
+            return False
+        return await self.redis.get(self.key) == self._lease_value
+
+    async def release(self):
+        """Give up leadership so another process can take over immediately"""
+        if self.token is None:
+            return
+        try:
+            await self.redis.eval(RELEASE_SCRIPT, 1, self.key, self._lease_value)
+        except Exception as e:
+            logger.error(f"Failed to release leadership: {e}")
+        finally:
+            self.token = None
@@ -3,7 +3,7 @@ from sqlalchemy import text, select
 import logging
 from models.leaderboard import LeaderboardSnapshot
 from models.user import User
-from services.user_service import UserService
+from services.points_service import PointsService
 from services.telegram_service import get_telegram_name
 from datetime import datetime
 
@@ -94,13 +94,22 @@ class LeaderboardService:
         await self.session.commit()
 
     async def _get_users_with_stats(self):
-        user_service = UserService(self.session)
-        user_service.cache = self.cache  # Set cache instance
         result = await self.session.execute(select(User))
         users = result.scalars().all()
-        stats = [await user_service.get_user_stats(user) for user in users]
+        # Take holding changes from full snapshots into the ledger, then read one row per user
+        await PointsService(self.session).reconcile_holdings(users)
+
+        result = await self.session.execute(text("""
+            SELECT u.id, COALESCE(up.total, 0) AS points,
+                (SELECT COUNT(*) FROM invite_code ic
+                 WHERE ic.creator_id = u.id AND ic.used_by_id IS NOT NULL) AS total_invites
+            FROM "user" u
+            LEFT JOIN user_points up ON up.user_id = u.id
+        """))
+        stats_by_user = {row.id: {"points": row.points, "total_invites": row.total_invites} for row in result}
+        stats = [stats_by_user[user.id] for user in users]
         
         # Just use whatever name is in the database, no API calls
         telegram_names = [user.telegram_display_name or str(user.telegram_id) for user in users]
             
-        return list(zip(users, stats, telegram_names))
\ No newline at end of file
+        return list(zip(users, stats, telegram_names))
@@ -1,8 +1,10 @@
 """Service for working with LLM APIs using LangGraph for flow control"""
 
 import os
+import hashlib
 import logging
-from typing import List, Optional, TypedDict, Annotated, Dict
+import re
+from typing import Any, List, Optional, TypedDict, Annotated, Dict
 from langgraph.graph import Graph, StateGraph
 from langgraph.prebuilt import ToolExecutor
 from openai import AsyncOpenAI
@@ -10,45 +12,171 @@ import json
 from operator import itemgetter
 from locales.language_utils import get_strings
 from locales.ascii_art import REPORT_HEADER, REPORT_FOOTER, get_block_border
-from utils.telegram_utils import send_telegram_message, split_and_send_message
+from utils.telegram_utils import send_telegram_message, send_message_parts, split_message, TelegramStreamWriter
+from core.cache import CacheKeys, CacheTTL
+from services.prompt_builder import select_posts
+from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
 
+# ASCII header and footer wrapped in <code> line by line, built once
+REPORT_HEADER_HTML = "\n".join(f"<code>{line}</code>" for line in REPORT_HEADER.split("\n"))
+REPORT_FOOTER_HTML = "\n".join(f"<code>{line}</code>" for line in REPORT_FOOTER.split("\n"))
+
+ANALYSIS_MODEL = "gpt-4o-mini"  # OpenAI model used for profile analysis
+ANALYSIS_CACHE_VERSION = 1  # Bump to invalidate cached analyses when output handling changes
+
+def analysis_cache_key(posts: List[str], language: str, system_prompt: str, model: str = ANALYSIS_MODEL) -> str:
+    """
+    Content hash of an analysis request. Posts are normalized (trimmed, whitespace collapsed,
+    empty ones dropped) in their original order, since order is part of the prompt.
+    """
+    normalized = [re.sub(r"\s+", " ", post).strip() for post in posts]
+    payload = json.dumps({
+        "version": ANALYSIS_CACHE_VERSION,
+        "model": model,
+        "language": language,
+        "prompt": hashlib.sha256(system_prompt.encode()).hexdigest(),
+        "posts": [post for post in normalized if post]
+    }, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 class ThreadsAnalysisState(TypedDict):
     """State for threads analysis flow"""
     posts: List[str]
     language: str
     telegram_id: int
     analysis: Optional[str]
+    writer: Optional[Any]  # TelegramStreamWriter showing the analysis while it is generated
+    prompt_stats: Optional[Dict]  # Posts and tokens sent vs. saved, see prompt_builder.select_posts
 
 class LLMService:
     """Service for interacting with LLM APIs"""
     
-    def __init__(self):
+    def __init__(self, cache=None, session_factory=None):
+        """
+        Args:
+            cache: aiocache instance, Redis front of the analysis cache
+            session_factory: Async session factory for the llm_analysis_cache table
+        """
         self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.cache = cache
+        self.session_factory = session_factory
         self.workflow = self._create_analysis_workflow()
+
+    async def _get_cached_analysis(self, key: str) -> Optional[str]:
+        """Look analysis up in Redis, then in Postgres (refilling Redis on hit)"""
+        cache_key = CacheKeys.LLM_ANALYSIS.format(key=key)
+        if self.cache:
+            try:
+                analysis = await self.cache.get(cache_key)
+                if analysis:
+                    logger.debug(f"Analysis {key} served from Redis")
+                    return analysis
+            except Exception as e:
+                logger.warning(f"Redis analysis cache read failed: {e}")
+
+        if not self.session_factory:
+            return None
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text("SELECT analysis FROM llm_analysis_cache WHERE key = :key"), {"key": key}
+            )
+            analysis = result.scalar()
+        if analysis is None:
+            return None
+
+        logger.debug(f"Analysis {key} served from Postgres")
+        if self.cache:
+            try:
+                await self.cache.set(cache_key, analysis, ttl=CacheTTL.LLM_ANALYSIS.value)
+            except Exception as e:
+                logger.warning(f"Redis analysis cache write failed: {e}")
+        return analysis
+
+    async def _store_analysis(self, key: str, analysis: str, language: str, system_prompt: str, posts_count: int):
+        """Save analysis to Postgres and Redis; failures are logged, the analysis is still returned"""
+        try:
+            if self.session_factory:
+                async with self.session_factory() as session:
+                    await session.execute(
+                        text("""
+                            INSERT INTO llm_analysis_cache (key, model, language, prompt_hash, posts_count, analysis)
+                            VALUES (:key, :model, :language, :prompt_hash, :posts_count, :analysis)
+                            ON CONFLICT (key) DO NOTHING
+                        """),
+                        {
+                            "key": key, "model": ANALYSIS_MODEL, "language": language,
+                            "prompt_hash": hashlib.sha256(system_prompt.encode()).hexdigest(),
+                            "posts_count": posts_count, "analysis": analysis
+                        }
+                    )
+                    await session.commit()
+            if self.cache:
+                await self.cache.set(CacheKeys.LLM_ANALYSIS.format(key=key), analysis, ttl=CacheTTL.LLM_ANALYSIS.value)
+        except Exception as e:
+            logger.error(f"Error storing analysis {key}: {e}")
         
     async def _analyze_profile(self, state: ThreadsAnalysisState) -> ThreadsAnalysisState:
         """Analyze profile with single comprehensive prompt"""
         try:
             strings = get_strings(state['language'])
-            posts_text = "\n\n".join(f"Post: {post}" for post in state['posts'])
+
+            # Fit posts into the token budget: duplicates dropped, recent and longer posts preferred
+            posts, prompt_stats = select_posts(state['posts'], state['language'])
+            state['prompt_stats'] = prompt_stats
+            logger.info(f"Analysis prompt for {state['telegram_id']}: {prompt_stats['posts_sent']}/"
+                        f"{prompt_stats['posts_total']} posts, {prompt_stats['tokens_sent']} tokens sent, "
+                        f"{prompt_stats['tokens_saved']} saved")
+            posts_text = "\n\n".join(f"Post: {post}" for post in posts)
             
             # Get the appropriate prompt from strings module
             system_prompt = strings.system_prompt
 
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": posts_text}
-                ],
-                temperature=0.89
-            )
-            state['analysis'] = response.choices[0].message.content
+            # Same posts, language, prompt and model were analyzed before - reuse the result
+            key = analysis_cache_key(posts, state['language'], system_prompt)
+            cached = await self._get_cached_analysis(key)
+            if cached:
+                state['analysis'] = cached
+                return state
+
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": posts_text}
+            ]
+            writer = state.get('writer')
+            if writer:
+                # Stream tokens into Telegram, so the user sees output from the first token
+                stream = await self.client.chat.completions.create(
+                    model=ANALYSIS_MODEL,
+                    messages=messages,
+                    temperature=0.89,
+                    stream=True
+                )
+                chunks = []
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                        await writer.append(delta)
+                await writer.flush()
+                state['analysis'] = "".join(chunks)
+            else:
+                response = await self.client.chat.completions.create(
+                    model=ANALYSIS_MODEL,
+                    messages=messages,
+                    temperature=0.89
+                )
+                state['analysis'] = response.choices[0].message.content
+            if state['analysis']:
+                await self._store_analysis(key, state['analysis'], state['language'], system_prompt, len(posts))
             return state
         except Exception as e:
             logger.error(f"Error analyzing profile: {e}")
+            writer = state.get('writer')
+            if writer and writer.started:
+                # Drop the partly streamed text, the fallback is sent as a fresh message
+                await writer.discard()
             state['analysis'] = "Could not analyze profile"
             return state
 
@@ -90,26 +218,37 @@ class LLMService:
             return "Error formatting report"
 
     def _format_header(self) -> str:
-        """Create ASCII header for the report with HTML tags"""
-        return "\n".join(f"<code>{line}</code>" for line in REPORT_HEADER.split("\n"))
+        """ASCII header for the report with HTML tags"""
+        return REPORT_HEADER_HTML
 
     def _format_footer(self) -> str:
-        """Create ASCII footer for the report with HTML tags"""
-        return "\n".join(f"<code>{line}</code>" for line in REPORT_FOOTER.split("\n"))
+        """ASCII footer for the report with HTML tags"""
+        return REPORT_FOOTER_HTML
+
+    def render_report_parts(self, analysis_report: Dict, language: str) -> List[str]:
+        """Final report message in the user's language, split into sendable parts (stored for re-display)"""
+        strings = get_strings(language)
+        text = strings.THREADS_ANALYSIS_COMPLETE.format(analysis_text=self.format_report(analysis_report))
+        return split_message(text)
 
-    async def send_analysis_to_user(self, telegram_id: int, analysis_report: Dict, language: str) -> bool:
-        """Format and send analysis to user"""
+    async def send_analysis_to_user(self, telegram_id: int, analysis_report: Dict, language: str,
+                                    writer: Optional[TelegramStreamWriter] = None,
+                                    parts: Optional[List[str]] = None) -> bool:
+        """
+        Format and send analysis to user, replacing the streamed messages if the writer shows any
+        Args:
+            parts (List[str]): Already rendered parts (see render_report_parts), rendered if not given
+        """
         try:
-            # Format report
-            formatted_report = self.format_report(analysis_report)
-            
-            # Get strings for language
-            strings = get_strings(language)
-            
+            parts = parts or self.render_report_parts(analysis_report, language)
+
+            if writer and writer.started:
+                return await writer.finish(parts, parse_mode="HTML", disable_web_page_preview=True)
+
             # Send report to user
-            return await split_and_send_message(
-                telegram_id=telegram_id,
-                text=strings.THREADS_ANALYSIS_COMPLETE.format(analysis_text=formatted_report),
+            return await send_message_parts(
+                telegram_id,
+                parts,
                 parse_mode="HTML",
                 disable_web_page_preview=True
             )
@@ -124,37 +263,31 @@ class LLMService:
             )
             return False
 
-    async def analyze_threads_profile(self, posts: List[str], telegram_id: int, language: str = 'ru') -> Optional[Dict]:
-        """Run threads profile analysis workflow"""
+    async def analyze_threads_profile(self, posts: List[str], telegram_id: int, language: str = 'ru',
+                                      writer: Optional[TelegramStreamWriter] = None) -> Optional[Dict]:
+        """
+        Run threads profile analysis workflow
+        Args:
+            writer (TelegramStreamWriter): Stream the analysis to the user while it is generated
+                (not used on cache hits); pass it to send_analysis_to_user to finalize the messages
+        """
         try:
             # Initialize state
             state = {
                 'posts': posts,
                 'language': language,
                 'telegram_id': telegram_id,
-                'analysis': None
+                'analysis': None,
+                'writer': writer,
+                'prompt_stats': None
             }
             
             # Run workflow with async nodes
             final_state = await self.workflow.ainvoke(state)
             
-            # Remove posts from final state before returning
-            analysis_report = {k: v for k, v in final_state.items() if k != 'posts'}
-            
-            # Send progress messages
-            try:
-                await split_and_send_message(
-                    telegram_id=telegram_id,
-                    text=get_strings(language).THREADS_ANALYSIS_COMPLETE.format(
-                        analysis_text=self.format_report(analysis_report)
-                    ),
-                    parse_mode="HTML",
-                    disable_web_page_preview=True
-                )
-            except Exception as e:
-                logger.error(f"Error sending progress message: {e}")
-            
-            return analysis_report
+            # Remove posts and writer from final state before returning;
+            # delivery is a separate job step, see send_analysis_to_user
+            return {k: v for k, v in final_state.items() if k not in ('posts', 'writer')}
         except Exception as e:
             logger.error(f"Error in analysis workflow: {e}")
             return None 
\ No newline at end of file
@@ -0,0 +1,153 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Supported rollup resolutions with bucket size
+RESOLUTIONS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+# How long rows of each resolution are kept (None - forever)
+RETENTION = {
+    "minute": timedelta(days=7),
+    "hour": timedelta(days=180),
+    "day": None
+}
+
+MAX_POINTS = 1000  # Upper bound of points returned by a single history query
+
+# Folds one sample into a bucket: running averages, min/max price and last holders count
+UPSERT_SAMPLE_SQL = text("""
+    INSERT INTO tetrix_metrics_history AS h
+        (resolution, bucket, price, price_min, price_max, market_cap, holders, volume_24h, samples)
+    VALUES
+        (:resolution, :bucket, :price, :price, :price, :market_cap, :holders, :volume_24h, 1)
+    ON CONFLICT (resolution, bucket) DO UPDATE SET
+        price = (h.price * h.samples + EXCLUDED.price) / (h.samples + 1),
+        price_min = LEAST(h.price_min, EXCLUDED.price_min),
+        price_max = GREATEST(h.price_max, EXCLUDED.price_max),
+        market_cap = (h.market_cap * h.samples + EXCLUDED.market_cap) / (h.samples + 1),
+        holders = EXCLUDED.holders,
+        volume_24h = (h.volume_24h * h.samples + EXCLUDED.volume_24h) / (h.samples + 1),
+        samples = h.samples + 1
+""")
+
+def truncate_to_bucket(ts: datetime, resolution: str) -> datetime:
+    """Truncate UTC timestamp to the start of its bucket"""
+    if resolution == "minute":
+        return ts.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def choose_resolution(start: datetime, end: datetime, max_points: int = MAX_POINTS) -> str:
+    """Pick the finest resolution that covers the range within max_points"""
+    span = end - start
+    for resolution, size in RESOLUTIONS.items():
+        if span / size <= max_points:
+            return resolution
+    return "day"
+
+class MetricsHistoryService:
+    """Service for writing and querying the TETRIX metrics time-series"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record_sample(self, metrics: Dict, sampled_at: Optional[datetime] = None) -> bool:
+        """
+        Append metrics document to minute bucket and hourly/daily rollups
+        Args:
+            metrics (Dict): Metrics document built by TetrixService
+            sampled_at (datetime): Sample time, defaults to now (UTC)
+        Returns:
+            bool: False if the sample was skipped
+        """
+        # Fallback values are not real observations, don't chart them
+        sources = metrics.get("sources", {})
+        if any(source.get("stale") for source in sources.values()):
+            logger.debug("Skipping history sample with stale sources")
+            return False
+
+        sampled_at = sampled_at or datetime.now(timezone.utc)
+        raw = metrics["raw"]
+        for resolution in RESOLUTIONS:
+            await self.session.execute(UPSERT_SAMPLE_SQL, {
+                "resolution": resolution,
+                "bucket": truncate_to_bucket(sampled_at, resolution),
+                "price": raw["price"],
+                "market_cap": raw["market_cap"],
+                "holders": raw["holders"],
+                "volume_24h": raw["volume_24h"]
+            })
+        return True
+
+    async def prune(self) -> int:
+        """
+        Delete rows older than retention of their resolution
+        Returns:
+            int: Number of deleted rows
+        """
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        for resolution, keep in RETENTION.items():
+            if keep is None:
+                continue
+            result = await self.session.execute(
+                text("DELETE FROM tetrix_metrics_history WHERE resolution = :resolution AND bucket < :cutoff"),
+                {"resolution": resolution, "cutoff": now - keep}
+            )
+            deleted += result.rowcount or 0
+        return deleted
+
+    async def get_history(self, start: datetime, end: datetime, resolution: Optional[str] = None) -> Dict:
+        """
+        Get downsampled metrics for time range
+        Args:
+            start (datetime): Range start (UTC)
+            end (datetime): Range end (UTC)
+            resolution (str): 'minute', 'hour', 'day' or None to choose automatically
+        Returns:
+            Dict: Resolution used and list of points ordered by time
+        """
+        resolution = resolution or choose_resolution(start, end)
+        result = await self.session.execute(
+            text("""
+                SELECT bucket, price, price_min, price_max, market_cap, holders, volume_24h
+                FROM tetrix_metrics_history
+                WHERE resolution = :resolution
+                AND bucket >= :start AND bucket <= :end
+                ORDER BY bucket
+                LIMIT :limit
+            """),
+            {
+                "resolution": resolution,
+                "start": truncate_to_bucket(start, resolution),
+                "end": end,
+                "limit": MAX_POINTS
+            }
+        )
+        points: List[Dict] = [
+            {
+                "time": row.bucket.isoformat(),
+                "price": row.price,
+                "price_min": row.price_min,
+                "price_max": row.price_max,
+                "market_cap": row.market_cap,
+                "holders": row.holders,
+                "volume_24h": row.volume_24h
+            }
+            for row in result
+        ]
+        return {
+            "resolution": resolution,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "points": points
+        }
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Single UPSERT per key; GREATEST keeps the highest value when several workers flush concurrently
+UPSERT_MAX_SQL = text("""
+    INSERT INTO tetrix_metrics (key, value, updated_at)
+    VALUES (:key, :value, now())
+    ON CONFLICT (key) DO UPDATE
+    SET value = GREATEST(tetrix_metrics.value, EXCLUDED.value),
+        updated_at = CASE
+            WHEN EXCLUDED.value > tetrix_metrics.value THEN now()
+            ELSE tetrix_metrics.updated_at
+        END
+    RETURNING value
+""")
+
+class HighWaterMarkTracker:
+    """
+    In-process tracker of ever-growing TetrixMetrics values (max_volume and similar keys).
+    Values are loaded from tetrix_metrics once, raised in memory on every observation
+    and flushed to Postgres in the background only when some value grew.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}  # Current high-water marks by key
+        self._dirty: Set[str] = set()  # Keys grown since the last flush
+        self._flush_task: Optional[asyncio.Task] = None  # Running background flush
+        self.loaded = False  # Whether values were loaded from database
+
+    async def load(self, session: AsyncSession):
+        """
+        Load all stored marks from tetrix_metrics, keeping higher in-memory values
+        Args:
+            session (AsyncSession): Database session
+        """
+        result = await session.execute(text("SELECT key, value FROM tetrix_metrics"))
+        for key, value in result.all():
+            if value > self._values.get(key, float("-inf")):
+                self._values[key] = value
+                self._dirty.discard(key)
+        self.loaded = True
+        logger.info(f"Loaded metric high-water marks: {self._values}")
+
+    def get(self, key: str, default: float = 0) -> float:
+        """Get current mark for key without changing it"""
+        return self._values.get(key, default)
+
+    def observe(self, key: str, value: float, default: float = 0) -> float:
+        """
+        Raise the mark for key if value is higher
+        Args:
+            key (str): Metric key, e.g. "max_volume"
+            value (float): Newly observed value
+            default (float): Initial mark for keys never seen before
+        Returns:
+            float: Current mark after the observation
+        """
+        current = self._values.get(key, default)
+        if value > current:
+            self._values[key] = value
+            self._dirty.add(key)
+            return value
+        return current
+
+    async def flush(self, session: AsyncSession):
+        """
+        Persist grown marks with a GREATEST() UPSERT and adopt higher values
+        written by other workers
+        Args:
+            session (AsyncSession): Database session
+        """
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, set()
+        try:
+            for key in dirty:
+                result = await session.execute(UPSERT_MAX_SQL, {"key": key, "value": self._values[key]})
+                stored = result.scalar_one()
+                if stored > self._values[key]:
+                    self._values[key] = stored
+            await session.commit()
+            logger.debug(f"Flushed metric high-water marks: {sorted(dirty)}")
+        except Exception:
+            # Keep keys dirty so the next flush retries them
+            self._dirty |= dirty
+            await session.rollback()
+            raise
+
+    def flush_in_background(self, session_factory: async_sessionmaker):
+        """
+        Start a background flush with its own session unless one is already running
+        Args:
+            session_factory: SQLAlchemy async session maker
+        """
+        if not self._dirty or (self._flush_task and not self._flush_task.done()):
+            return
+
+        async def _flush():
+            try:
+                async with session_factory() as session:
+                    await self.flush(session)
+            except Exception as e:
+                logger.error(f"Failed to flush metric high-water marks: {e}")
+
+        self._flush_task = asyncio.create_task(_flush())
+
+# Process-wide tracker shared by all TetrixService instances
+metrics_tracker = HighWaterMarkTracker()
@@ -0,0 +1,210 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.ton_address import normalize_address
+
+logger = logging.getLogger(__name__)
+
+TETRIX_DECIMALS = 9  # Jetton balances are stored in nano units
+POINTS_PER_INVITE = 420  # Points for every redeemed invite
+EARLY_BACKER_BONUS = 4200  # One-time bonus for early backers
+
+# Holding tiers: (minimum whole TETRIX held, points), checked from the highest
+HOLDING_TIERS = [
+    (10_000_000, 4200),
+    (1_000_000, 2100),
+    (100_000, 1000),
+    (10_000, 420),
+    (1, 100)
+]
+
+def holding_points(balance: int) -> int:
+    """Points for a jetton balance in nano units"""
+    tokens = balance // 10 ** TETRIX_DECIMALS
+    for min_tokens, points in HOLDING_TIERS:
+        if tokens >= min_tokens:
+            return points
+    return 0
+
+class HolderIndex:
+    """
+    In-memory index of the latest holder balances keyed by normalized owner address.
+    Friendly forms from the snapshot are indexed too, so any stored form resolves
+    with a single dict lookup.
+    """
+
+    def __init__(self):
+        self.balances: Dict[str, int] = {}  # Normalized raw owner -> balance in nano units
+        self.friendly: Dict[str, str] = {}  # User-friendly owner -> normalized raw owner
+
+    def add(self, owner: str, owner_friendly: Optional[str], balance: int):
+        """Add holder row; balances of several wallets of one owner are summed"""
+        raw = normalize_address(owner)
+        if raw is None:
+            return
+        self.balances[raw] = self.balances.get(raw, 0) + int(balance)
+        if owner_friendly:
+            self.friendly[owner_friendly] = raw
+
+    def balance_of(self, address: Optional[str]) -> int:
+        """Balance of owner in any address form, 0 if not a holder"""
+        if not address:
+            return 0
+        raw = self.friendly.get(address) or normalize_address(address)
+        return self.balances.get(raw, 0) if raw else 0
+
+    def __len__(self) -> int:
+        return len(self.balances)
+
+class PointsService:
+    """
+    Points of users: holding points from the latest jetton_holders snapshot and the
+    append-only points_ledger with materialized user_points totals
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def load_holder_index(self) -> HolderIndex:
+        """Load all current holders into an index (one query, O(N) build)"""
+        index = HolderIndex()
+        result = await self.session.execute(text("SELECT owner, owner_friendly, balance FROM jetton_holders"))
+        for owner, owner_friendly, balance in result:
+            index.add(owner, owner_friendly, balance)
+        logger.info(f"Loaded holder index with {len(index)} owners")
+        return index
+
+    async def compute_holding_points(self, users: Iterable, index: Optional[HolderIndex] = None) -> Dict[int, int]:
+        """
+        Bulk holding points for leaderboard rebuild
+        Args:
+            users: Users with wallet_address
+            index (HolderIndex): Preloaded index, loaded from database if not given
+        Returns:
+            Dict[int, int]: User id -> holding points
+        """
+        index = index or await self.load_holder_index()
+        return {user.id: holding_points(index.balance_of(user.wallet_address)) for user in users}
+
+    async def record(self, user_id: int, source: str, delta: int, ref: Optional[str] = None) -> bool:
+        """
+        Append a ledger entry; user_points is updated by the points_ledger_fold trigger
+        in the same transaction. Caller commits.
+        Args:
+            user_id (int): User whose points change
+            source (str): 'invite', 'early_backer', 'holding' or 'adjustment'
+            delta (int): Points to add (negative to take away)
+            ref (str): Idempotency reference, an entry with the same (user, source, ref) is recorded once
+        Returns:
+            bool: False if the entry was already recorded
+        """
+        if not delta:
+            return False
+        result = await self.session.execute(
+            text("""
+                INSERT INTO points_ledger (user_id, source, delta, ref)
+                VALUES (:user_id, :source, :delta, :ref)
+                ON CONFLICT (user_id, source, ref) DO NOTHING
+            """),
+            {"user_id": user_id, "source": source, "delta": delta, "ref": ref}
+        )
+        return bool(result.rowcount)
+
+    async def get_user_points(self, user_id: int) -> Dict:
+        """Materialized points of a user with breakdown by source"""
+        result = await self.session.execute(
+            text("""
+                SELECT total, invite_points, early_backer_points, holding_points
+                FROM user_points WHERE user_id = :user_id
+            """),
+            {"user_id": user_id}
+        )
+        row = result.first()
+        return {
+            "total": row.total if row else 0,
+            "invites": row.invite_points if row else 0,
+            "early_backer_bonus": row.early_backer_points if row else 0,
+            "holding": row.holding_points if row else 0
+        }
+
+    async def set_holding_points(self, targets: Dict[int, int]) -> int:
+        """
+        Bring users' holding points to target values by appending 'holding' ledger entries
+        for the difference. Idempotent, so holding entries need no ref.
+        Args:
+            targets (Dict[int, int]): User id -> holding points they should have
+        Returns:
+            int: Number of users whose holding points changed
+        """
+        if not targets:
+            return 0
+        # Serialize holding updates of delta sync and leaderboard rebuild
+        await self.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('points:holding'))"))
+        result = await self.session.execute(
+            text("SELECT user_id, holding_points FROM user_points WHERE user_id = ANY(:user_ids)"),
+            {"user_ids": list(targets)}
+        )
+        current = dict(result.all())
+        changed = 0
+        for user_id, points in targets.items():
+            if await self.record(user_id, "holding", points - current.get(user_id, 0)):
+                changed += 1
+        return changed
+
+    async def reconcile_holdings(self, users: Iterable, index: Optional[HolderIndex] = None) -> int:
+        """
+        Align holding points of all users with the latest holder snapshot
+        (catches changes taken in by full snapshots, which emit no events)
+        """
+        return await self.set_holding_points(await self.compute_holding_points(users, index))
+
+    async def apply_balance_changes(self, events: List[Dict]) -> int:
+        """
+        Record holding point changes of users whose balances changed, without a full rebuild.
+        Leaderboard points are refreshed in place; ranks are refreshed by the next scheduled rebuild.
+        Args:
+            events (List[Dict]): Balance change events from the holder ingester
+        Returns:
+            int: Number of users whose points changed
+        """
+        owners = {normalize_address(event["owner"]) for event in events} - {None}
+        if not owners:
+            return 0
+
+        result = await self.session.execute(
+            text('SELECT id, wallet_address AS owner FROM "user" WHERE wallet_address = ANY(:owners)'),
+            {"owners": list(owners)}
+        )
+        users = result.all()
+        if not users:
+            return 0
+
+        result = await self.session.execute(
+            text("SELECT owner, SUM(balance) AS balance FROM jetton_holders WHERE owner = ANY(:owners) GROUP BY owner"),
+            {"owners": [user.owner for user in users]}
+        )
+        balances = {row.owner: int(row.balance) for row in result}
+
+        changed = await self.set_holding_points(
+            {user.id: holding_points(balances.get(user.owner, 0)) for user in users}
+        )
+        await self.session.execute(
+            text("""
+                UPDATE leaderboard_snapshots ls SET points = up.total
+                FROM user_points up JOIN "user" u ON u.id = up.user_id
+                WHERE ls.telegram_id = u.telegram_id AND u.id = ANY(:user_ids)
+            """),
+            {"user_ids": [user.id for user in users]}
+        )
+        logger.info(f"Applied holding changes: {changed} of {len(users)} affected users changed tier")
+        return changed
+
+def balance_change_listener(session_factory):
+    """Holder ingester listener applying balance changes to user points in its own transaction"""
+    async def listener(events: List[Dict]):
+        async with session_factory() as session:
+            await PointsService(session).apply_balance_changes(events)
+            await session.commit()
+    return listener
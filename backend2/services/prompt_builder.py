@@ -0,0 +1,119 @@
+"""Token-budgeted selection of Threads posts for the analysis prompt"""
+
+import math
+import os
+import re
+import logging
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POST_TOKEN_BUDGET = 6000  # Tokens of posts per analysis unless configured per language
+MAX_POST_TOKENS = 500  # Longer posts are truncated, one essay shouldn't take the whole budget
+POST_OVERHEAD_TOKENS = 4  # "Post: " prefix and separator added to every post
+DUPLICATE_SIMILARITY = 0.85  # Word-set Jaccard similarity at which posts count as duplicates
+RECENCY_WEIGHT = 0.6  # Share of recency in the post score, the rest is length
+LENGTH_SATURATION = 200  # Tokens after which a longer post scores no higher
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_URL_RE = re.compile(r"https?://\S+")
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate tokens of text for OpenAI o200k-style tokenizers without a tokenizer dependency:
+    punctuation is a token, ASCII words take ~4 chars per token, other scripts (Cyrillic etc.) ~3.
+    Errs on the high side so the budget holds.
+    """
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        chars_per_token = 4 if piece.isascii() else 3
+        tokens += max(1, math.ceil(len(piece) / chars_per_token))
+    return tokens
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a word boundary so that it fits max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    # Binary search the longest word prefix that fits
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) + 1 <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]) + "…"
+
+def get_post_token_budget(language: str) -> int:
+    """Token budget for posts: LLM_POST_TOKEN_BUDGET_<LANG>, then LLM_POST_TOKEN_BUDGET, then default"""
+    value = os.getenv(f"LLM_POST_TOKEN_BUDGET_{language.upper()}") or os.getenv("LLM_POST_TOKEN_BUDGET")
+    return int(value) if value else DEFAULT_POST_TOKEN_BUDGET
+
+def _word_set(text: str) -> Set[str]:
+    """Normalized words of a post for near-duplicate detection (links and case ignored)"""
+    return set(re.findall(r"\w+", _URL_RE.sub("", text).lower()))
+
+def deduplicate_posts(posts: List[str]) -> List[int]:
+    """
+    Indexes of posts to keep: a post is dropped when it is nearly identical to an earlier
+    (more recent) one, e.g. reposted announcements or the same text with another link
+    """
+    kept: List[int] = []
+    kept_words: List[Set[str]] = []
+    for i, post in enumerate(posts):
+        words = _word_set(post)
+        if not words:
+            continue
+        duplicate = any(
+            len(words & other) / len(words | other) >= DUPLICATE_SIMILARITY
+            for other in kept_words
+        )
+        if not duplicate:
+            kept.append(i)
+            kept_words.append(words)
+    return kept
+
+def select_posts(posts: List[str], language: str, budget: int = None) -> Tuple[List[str], Dict]:
+    """
+    Pick posts for the analysis prompt within the token budget
+    Args:
+        posts (List[str]): Post texts newest first, as returned by the Threads API
+        language (str): Analysis language, selects the budget
+        budget (int): Token budget overriding the configured one
+    Returns:
+        Tuple[List[str], Dict]: Selected posts in original order and prompt stats
+            (posts and tokens in total, after dedup, sent and saved)
+    """
+    budget = budget or get_post_token_budget(language)
+    tokens_total = sum(count_tokens(post) + POST_OVERHEAD_TOKENS for post in posts)
+
+    unique = deduplicate_posts(posts)
+    candidates = {i: truncate_to_tokens(posts[i], MAX_POST_TOKENS) for i in unique}
+    costs = {i: count_tokens(text) + POST_OVERHEAD_TOKENS for i, text in candidates.items()}
+
+    # Score: newer and longer posts say more about the author
+    count = len(posts)
+    def score(i: int) -> float:
+        recency = 1 - i / count
+        length = min(costs[i], LENGTH_SATURATION) / LENGTH_SATURATION
+        return RECENCY_WEIGHT * recency + (1 - RECENCY_WEIGHT) * length
+
+    selected = []
+    tokens_sent = 0
+    for i in sorted(candidates, key=score, reverse=True):
+        if tokens_sent + costs[i] <= budget:
+            selected.append(i)
+            tokens_sent += costs[i]
+
+    selected.sort()
+    stats = {
+        "budget": budget,
+        "posts_total": count,
+        "posts_unique": len(unique),
+        "posts_sent": len(selected),
+        "tokens_total": tokens_total,
+        "tokens_sent": tokens_sent,
+        "tokens_saved": tokens_total - tokens_sent
+    }
+    return [candidates[i] for i in selected], stats
@@ -1,38 +1,109 @@
 import asyncio
+import json
 import logging
+import math
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Callable, Dict, Optional
+from typing import Awaitable, Callable, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from core.cache import cache_metrics, CacheKeys, Cache
-import json
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+from core.cache import CacheKeys, Cache
+from core.startup import startup_tracker
+from .leader_election import LeaderElection
 
 logger = logging.getLogger(__name__)
 
+TASK_LOCK_KEY = "scheduler:task:{task_name}:lock"  # Per-task mutex shared by all processes
+TASK_STATS_KEY = "scheduler:task_stats"  # Hash of task name -> JSON stats of the last run
+RETRY_DELAY = 60  # Seconds before retrying a failed task whose next slot is further away
+
+class TaskStats:
+    """Runtime statistics of one scheduled task"""
+
+    def __init__(self, history_size: int = 100):
+        self.runs = 0  # Completed runs (successful or failed)
+        self.failures = 0  # Failed runs
+        self.skipped_overlap = 0  # Runs skipped because the task was already running
+        self.last_duration: Optional[float] = None  # Duration of the last run in seconds
+        self.durations = deque(maxlen=history_size)  # Recent run durations for percentiles
+        self.last_started: Optional[float] = None  # Epoch time of the last run start
+        self.last_error: Optional[str] = None  # Error of the last failed run
+        self.next_run: Optional[float] = None  # Epoch time of the next planned run
+
+    def record(self, duration: float, error: Optional[Exception] = None):
+        """Record finished run"""
+        self.runs += 1
+        self.last_duration = duration
+        self.durations.append(duration)
+        if error is not None:
+            self.failures += 1
+            self.last_error = str(error)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent run durations"""
+        if not self.durations:
+            return None
+        ordered = sorted(self.durations)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    def to_dict(self) -> Dict:
+        """Stats in JSON-serializable form"""
+        def iso(ts):
+            return datetime.utcfromtimestamp(ts).isoformat() if ts else None
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_overlap": self.skipped_overlap,
+            "last_duration": self.last_duration,
+            "p95_duration": self.p95(),
+            "last_started": iso(self.last_started),
+            "last_error": self.last_error,
+            "next_run": iso(self.next_run)
+        }
+
 class SchedulerService:
     """
     Service responsible for scheduling and executing periodic tasks like 
-    updating leaderboards, fetching metrics, and holder information
+    updating leaderboards and refreshing TETRIX metrics (price, volume and holders)
     """
-    def __init__(self, cache: Cache, session_factory: async_sessionmaker):
+    def __init__(self, cache: Cache, session_factory: async_sessionmaker, redis: Optional[Redis] = None):
         """
         Initialize scheduler service with cache connection and database session factory
         
         Args:
             cache: Cache instance for caching (aiocache)
             session_factory: SQLAlchemy async session maker for database operations
+            redis: Async Redis client for leader election; without it this process always leads
         """
         self.cache = cache  # Replace Redis with cache
         self.session_factory = session_factory  # Database session factory
-        self.tasks: Dict[str, asyncio.Task] = {}  # Dictionary to store running tasks
+        self.redis = redis  # Async Redis client for task mutexes and shared stats
+        # Periodic tasks configuration: fixed-rate interval, random start jitter
+        # and mutex timeout (upper bound of a single run), all in seconds
+        self.tasks = {
+            "leaderboard": {"interval": 3600, "jitter": 60, "lock_timeout": 1800},   # Every hour
+            "metrics": {"interval": 60, "jitter": 5, "lock_timeout": 55},            # Every minute
+            "history_prune": {"interval": 3600, "jitter": 120, "lock_timeout": 600}, # Every hour
+            "holders": {"interval": 300, "jitter": 30, "lock_timeout": 1800}         # Every 5 minutes (delta)
+        }
+        self.stats: Dict[str, TaskStats] = {task_name: TaskStats() for task_name in self.tasks}
+        self._local_locks: Dict[str, asyncio.Lock] = {}  # Mutexes used when Redis is not available
+        self._task_handles: Dict[str, asyncio.Task] = {}  # Running periodic tasks (leader only)
+        self._election_task: Optional[asyncio.Task] = None  # Leadership acquire/renew loop
         self._running = False  # Flag to track scheduler running state
-        self._last_execution: Dict[str, datetime] = {}  # Track last execution time of tasks
+        # Only the elected leader of all processes runs periodic tasks
+        self.election = LeaderElection(redis) if redis is not None else None
 
     async def _execute_task(self, task_name: str):
         """
         Execute a scheduled task and handle its lifecycle
         
         Args:
-            task_name: Name of the task to execute (leaderboard/metrics/holders)
+            task_name: Name of the task to execute (leaderboard/metrics/history_prune/holders)
         """
         logger.info(f"Executing task {task_name} at {datetime.now()}")
         
@@ -44,9 +115,23 @@ class SchedulerService:
                     await leaderboard_service.ensure_populated()
                     await leaderboard_service.update_leaderboard()
                 elif task_name == "metrics":
-                    await self._fetch_metrics(session)
+                    await self._refresh_metrics(session)
+                elif task_name == "history_prune":
+                    from .metrics_history_service import MetricsHistoryService
+                    deleted = await MetricsHistoryService(session).prune()
+                    logger.info(f"Pruned {deleted} expired metrics history rows")
                 elif task_name == "holders":
-                    await self._fetch_holders(session)
+                    # Ingester manages its own transactions (checkpoint + snapshot);
+                    # delta syncs update affected users' points through balance change events
+                    from .holder_ingester import HolderIngester
+                    from .points_service import balance_change_listener
+                    ingester = HolderIngester(self.session_factory)
+                    ingester.on_balance_change(balance_change_listener(self.session_factory))
+                    await ingester.sync(fence=self.election.validate if self.election else None)
+
+                # Fencing: don't commit if another process took over the lease meanwhile
+                if self.election and not await self.election.validate():
+                    raise RuntimeError(f"Leadership lost during task {task_name}, discarding results")
                     
                 await session.commit()
                 logger.info(f"Task {task_name} completed successfully")
@@ -55,87 +140,260 @@ class SchedulerService:
                 await session.rollback()
                 raise
 
-    @cache_metrics(key_pattern=CacheKeys.DEX_SCREENER)
-    async def _fetch_metrics(self, session: AsyncSession):
+    async def _refresh_metrics(self, session: AsyncSession):
         """
-        Fetch and cache price and volume data from DexScreener
+        Fetch DexScreener and tonapi data and store the versioned metrics document.
+        The scheduler is the only producer of metrics, request paths only read them.
         
         Args:
             session: Active database session for the operation
         """
         from .tetrix_service import TetrixService
+        from .metrics_tracker import metrics_tracker
         tetrix = TetrixService(self.cache, session)
-        # Use get_metrics instead of direct call to avoid cache duplication
-        metrics = await tetrix.get_metrics()
-        return metrics.get('raw', {})
+        metrics = await tetrix.refresh_metrics(
+            fencing_token=self.election.token if self.election else None
+        )
+        # Persist grown high-water marks (max volume) without delaying the refresh
+        metrics_tracker.flush_in_background(self.session_factory)
 
-    @cache_metrics(key_pattern=CacheKeys.HOLDERS)
-    async def _fetch_holders(self, session: AsyncSession):
-        """
-        Fetch and cache the current count of token holders
-        
-        Args:
-            session: Active database session for the operation
-        """
-        from .tetrix_service import TetrixService
-        tetrix = TetrixService(self.cache, session)
-        # Use get_metrics instead of direct call to avoid cache duplication
-        metrics = await tetrix.get_metrics()
-        return {"holders_count": metrics.get('raw', {}).get('holders', 0)}
+        # Append sample to the metrics time-series (minute bucket and rollups)
+        from .metrics_history_service import MetricsHistoryService
+        await MetricsHistoryService(session).record_sample(metrics)
+        return metrics
 
     async def start(self):
-        """Start the scheduler"""
+        """
+        Start the scheduler without blocking: try to become leader and keep competing
+        for leadership. Initial and periodic tasks run in background, only in the leader process.
+        """
         logger.info("Starting scheduler service...")
-        logger.info("Executing initial tasks sequentially...")
+        self._running = True
 
-        # First update leaderboard
-        logger.info("Initial execution of leaderboard")
-        await self._execute_task("leaderboard")
-        logger.info("Initial leaderboard task completed")
+        is_leader = self.election is None or await self.election.try_acquire()
 
-        # Then ensure metrics are populated
-        await self._ensure_metrics_populated()
+        # Start renewing before initial tasks, they may take longer than the lease
+        if self.election is not None:
+            self._election_task = asyncio.create_task(self._election_loop())
 
-        logger.info("All initial tasks completed, starting periodic scheduling...")
+        if is_leader:
+            # Initial tasks warm caches in background so startup doesn't wait for them
+            self._task_handles["initial"] = asyncio.create_task(self._on_elected())
+        else:
+            logger.info("Another instance is scheduler leader, running as follower")
 
-        # Schedule periodic tasks
-        self.tasks = {
-            "leaderboard": {"interval": 3600, "last_execution": None},  # Every hour
-            "metrics": {"interval": 60, "last_execution": None},        # Every minute
-            "holders": {"interval": 60, "last_execution": None}         # Every minute
-        }
+    async def stop(self):
+        """Stop periodic tasks and give up leadership"""
+        self._running = False
+        if self._election_task:
+            self._election_task.cancel()
+        self._cancel_periodic_tasks()
+        if self.election:
+            await self.election.release()
+        logger.info("Scheduler stopped")
+
+    async def _on_elected(self):
+        """Run initial tasks and start periodic scheduling after becoming leader"""
+        logger.info("Executing initial tasks sequentially...")
+
+        # First update leaderboard; a run skipped because another one holds the mutex
+        # proves nothing, /ready then checks the snapshot table itself
+        try:
+            with startup_tracker.phase("initial_leaderboard"):
+                completed = await self.run_task("leaderboard")
+            if completed:
+                startup_tracker.mark_ready("leaderboard")
+        except Exception as e:
+            logger.error(f"Initial leaderboard task failed, periodic run will retry: {e}")
+
+        # Load metric high-water marks (max volume) once per process,
+        # then ensure metrics are populated
+        try:
+            with startup_tracker.phase("initial_metrics"):
+                from .metrics_tracker import metrics_tracker
+                async with self.session_factory() as session:
+                    await metrics_tracker.load(session)
+                populated = await self._ensure_metrics_populated()
+            if populated:
+                startup_tracker.mark_ready("metrics")
+        except Exception as e:
+            logger.error(f"Initial metrics task failed, periodic run will retry: {e}")
+
+        startup_tracker.log_breakdown("Initial scheduler tasks completed")
+        logger.info("Starting periodic scheduling...")
 
         for task_name in self.tasks:
-            asyncio.create_task(self._schedule_task(task_name))
+            self._task_handles[task_name] = asyncio.create_task(self._schedule_task(task_name))
 
-    async def _ensure_metrics_populated(self):
-        """Check if metrics exist in cache and populate if missing"""
-        async with self.session_factory() as session:
-            # Check DexScreener data
-            dex_data = await self._fetch_metrics(session)
-            if not dex_data:
-                logger.info("DexScreener data missing in cache, fetching...")
-                await self._fetch_metrics(session)
-            else:
-                logger.info("DexScreener data exists in cache, skipping initial fetch")
-
-            # Check holders
-            holders = await self._fetch_holders(session)
-            if not holders:
-                logger.info("Holders count missing in cache, fetching...")
-                await self._fetch_holders(session)
-            else:
-                logger.info("Holders count exists in cache, skipping initial fetch")
+    def _cancel_periodic_tasks(self):
+        """Cancel periodic tasks of this process"""
+        for handle in self._task_handles.values():
+            handle.cancel()
+        self._task_handles = {}
+
+    async def _election_loop(self):
+        """Renew the lease while leader, otherwise try to take over an expired one"""
+        while self._running:
+            try:
+                await asyncio.sleep(self.election.renew_interval)
+                if self.election.token is not None:
+                    if not await self.election.renew():
+                        self._cancel_periodic_tasks()
+                elif await self.election.try_acquire():
+                    # Run in background so the lease keeps being renewed meanwhile
+                    self._task_handles["initial"] = asyncio.create_task(self._on_elected())
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in scheduler leader election: {e}", exc_info=True)
+                # Lease could not be confirmed in time, another instance may lead now
+                if self._task_handles and not self.election.is_leader:
+                    logger.warning("Lease expired without renewal, stopping periodic tasks")
+                    self.election.token = None
+                    self._cancel_periodic_tasks()
+
+    async def _ensure_metrics_populated(self) -> bool:
+        """
+        Check if metrics document exists in cache and populate if missing
+        Returns:
+            bool: False if the fetch was skipped because the metrics task is already running
+        """
+        if await self.cache.get(CacheKeys.METRICS):
+            logger.info("Metrics document exists in cache, skipping initial fetch")
+            return True
+
+        logger.info("Metrics document missing in cache, fetching...")
+        return await self.run_task("metrics")
+
+    @asynccontextmanager
+    async def _task_mutex(self, task_name: str):
+        """
+        Non-blocking per-task mutex, shared across processes through Redis.
+        Yields True if the mutex was acquired, False if the task is already running.
+        """
+        if self.redis is None:
+            lock = self._local_locks.setdefault(task_name, asyncio.Lock())
+            if lock.locked():
+                yield False
+                return
+            async with lock:
+                yield True
+            return
+
+        lock = self.redis.lock(
+            TASK_LOCK_KEY.format(task_name=task_name),
+            timeout=self.tasks[task_name]["lock_timeout"],
+            blocking=False
+        )
+        if not await lock.acquire():
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning(f"Mutex of task {task_name} expired before the run finished")
+
+    async def run_exclusive(self, task_name: str, job: Callable[[], Awaitable]) -> bool:
+        """
+        Run job under the task mutex and record its runtime stats.
+        Used both by the scheduler and by manual triggers (e.g. leaderboard rebuild endpoint).
+        Args:
+            task_name: Name of the task the job belongs to
+            job: Coroutine function to run
+        Returns:
+            bool: False if skipped because the same task is already running
+        Raises:
+            Exception: Re-raises job errors after recording them
+        """
+        stats = self.stats[task_name]
+        async with self._task_mutex(task_name) as acquired:
+            if not acquired:
+                stats.skipped_overlap += 1
+                logger.warning(f"Task {task_name} is already running, skipping")
+                await self._publish_stats(task_name)
+                return False
+
+            stats.last_started = time.time()
+            started = time.monotonic()
+            error = None
+            try:
+                await job()
+                return True
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                stats.record(time.monotonic() - started, error)
+                await self._publish_stats(task_name)
+
+    async def run_task(self, task_name: str) -> bool:
+        """Run scheduled task under its mutex"""
+        return await self.run_exclusive(task_name, lambda: self._execute_task(task_name))
+
+    async def _publish_stats(self, task_name: str):
+        """Share task stats through Redis so any worker can report them"""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.hset(TASK_STATS_KEY, task_name, json.dumps(self.stats[task_name].to_dict()))
+        except Exception as e:
+            logger.error(f"Failed to publish stats of task {task_name}: {e}")
+
+    async def get_status(self) -> Dict:
+        """
+        Scheduler status for admin endpoint: leadership and per-task runtime stats.
+        Stats come from Redis (written by whichever process ran the task), local stats otherwise.
+        """
+        tasks = {task_name: stats.to_dict() for task_name, stats in self.stats.items()}
+        leader = None
+        if self.redis is not None:
+            shared = await self.redis.hgetall(TASK_STATS_KEY)
+            for task_name, value in shared.items():
+                tasks[task_name] = json.loads(value)
+            if self.election:
+                leader = await self.redis.get(self.election.key)
+
+        return {
+            "instance_id": self.election.instance_id if self.election else None,
+            "is_leader": self.election.is_leader if self.election else True,
+            "leader": leader,
+            "tasks": {
+                task_name: {**self.tasks.get(task_name, {}), **task_stats}
+                for task_name, task_stats in tasks.items()
+            }
+        }
 
     async def _schedule_task(self, task_name: str):
-        """Schedule a task to run periodically"""
+        """
+        Run a task at a fixed rate: runs are aligned to a grid of interval-long slots
+        (so durations don't accumulate drift) and each start is delayed by a random jitter
+        """
+        config = self.tasks[task_name]
+        stats = self.stats[task_name]
+        next_slot = time.time() + config["interval"]
+        retry_at = None
         while True:
             try:
-                await self._execute_task(task_name)
-                self.tasks[task_name]["last_execution"] = datetime.now()
-                await asyncio.sleep(self.tasks[task_name]["interval"])
+                due = retry_at if retry_at is not None else next_slot + random.uniform(0, config["jitter"])
+                stats.next_run = due
+                await asyncio.sleep(max(0, due - time.time()))
+
+                if retry_at is None:
+                    next_slot += config["interval"]
+                retry_at = None
+                # Skip slots missed while the loop was stalled instead of running them back to back
+                now = time.time()
+                if next_slot < now:
+                    next_slot += math.ceil((now - next_slot) / config["interval"]) * config["interval"]
+
+                try:
+                    await self.run_task(task_name)
+                except Exception:
+                    # Already logged by _execute_task; retry sooner than the next slot for long-interval tasks
+                    if next_slot - time.time() > RETRY_DELAY:
+                        retry_at = time.time() + RETRY_DELAY
             except asyncio.CancelledError:
                 break
-            except Exception as e:
-                logger.error(f"Error in task {task_name}: {e}", exc_info=True)
-                await asyncio.sleep(60)  # Wait a minute before retrying
\ No newline at end of file
@@ -1,14 +1,17 @@
 # Import necessary libraries for Redis, SQLAlchemy, HTTP requests, and other utilities
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 import aiohttp
+import asyncio
 import logging
 import json
+import time
 from datetime import datetime, timedelta
-from models.metrics import TetrixMetrics
 from typing import Optional
 from locales.ascii_art import get_emotion_by_percentage
-from core.cache import cache_metrics, CacheKeys, Cache
+from locales.language_utils import get_strings
+from core.cache import CacheKeys, CacheTTL, Cache
+from core.upstream import Upstream, UpstreamError
+from services.metrics_tracker import metrics_tracker
 
 # Initialize logger for this module
 logger = logging.getLogger(__name__)
@@ -30,6 +33,30 @@ MAX_CAP = 1_000_000  # Maximum market cap in USD (100% strength metric)
 INITIAL_MAX_VOLUME = 0  # Starting point for volume tracking
 CACHE_TIME = 60  # Fin values cache duration for general metrics (in seconds)
 
+# User-specific placeholders of STATS_TEMPLATE, filled per request
+USER_STATS_FIELDS = ("points", "holding_points", "invite_points", "early_backer_bonus")
+
+# Preformatted stats templates keyed by (language, metrics version)
+_stats_templates = {}
+
+# Upstream clients with per-upstream timeouts and circuit breakers (shared by all service instances)
+DEXSCREENER_UPSTREAM = Upstream("dexscreener", timeout=5, cache_key=CacheKeys.DEX_SCREENER)
+TONAPI_UPSTREAM = Upstream("tonapi", timeout=5, cache_key=CacheKeys.HOLDERS)
+
+# Store the metrics document unless the current one was written by a newer leader
+# (higher fencing token); compare and set in one step so a deposed leader can't slip in between
+STORE_METRICS_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if current then
+    local ok, document = pcall(cjson.decode, current)
+    if ok and type(document) == 'table' and tonumber(document['fencing_token'] or 0) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('set', KEYS[1], ARGV[1])
+return 1
+"""
+
 class TetrixService:
     """Service class for handling Tetrix token-related operations and metrics"""
     
@@ -43,122 +70,53 @@ class TetrixService:
         self.cache = cache
         self.session = session
 
-    async def _ensure_max_volume_exists(self):
-        """
-        Ensures that a maximum volume record exists in the database
-        Returns the initial max volume if no database session is available
-        """
-        if not self.session:
-            return INITIAL_MAX_VOLUME
-
-        try:
-            # Query max volume
-            result = await self.session.execute(
-                select(TetrixMetrics).where(TetrixMetrics.key == "max_volume")
-            )
-            max_volume = result.scalar_one_or_none()
-            
-            if not max_volume:
-                max_volume = TetrixMetrics(
-                    key="max_volume",
-                    value=INITIAL_MAX_VOLUME
-                )
-                self.session.add(max_volume)
-                await self.session.commit()
-                return INITIAL_MAX_VOLUME
-            
-            return max_volume.value
-        except Exception as e:
-            logger.error(f"Error in ensure_max_volume: {e}")
-            await self.session.rollback()
-            raise
-
-    async def _update_max_volume(self, new_volume: float):
-        """Update max volume in database if needed"""
-        if not self.session:
-            return
-
-        try:
-            # Query max volume
-            result = await self.session.execute(
-                select(TetrixMetrics).where(TetrixMetrics.key == "max_volume")
-            )
-            max_volume = result.scalar_one_or_none()
-            
-            if max_volume and new_volume > max_volume.value:
-                max_volume.value = new_volume
-                await self.session.commit()
-        except Exception as e:
-            logger.error(f"Error in update_max_volume: {e}")
-            await self.session.rollback()
-            raise
-
     def _generate_bar(self, percentage: float) -> str:
         """Generate ASCII progress bar"""
         bar_length = 20
         filled = max(1, int((percentage / 100) * bar_length))  # At least 1 bar if percentage > 0
         return f"[{'█' * filled}{'░' * (bar_length - filled)}] {percentage:.1f}%"
 
-    @cache_metrics(key_pattern=CacheKeys.HOLDERS)
-    async def _fetch_holders(self):
-        """Fetch current holders count"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{TON_API_URL}/jettons/{TETRIX_ADDRESS}",
-                headers={
-                    "Authorization": f"Bearer {TON_API_KEY}",
-                    "accept": "application/json"
-                }
-            ) as response:
-                data = await response.json()
-                return {"holders_count": data["holders_count"]}
+    async def _fetch_holders(self, http: aiohttp.ClientSession) -> dict:
+        """Fetch current holders count from tonapi"""
+        async with http.get(
+            f"{TON_API_URL}/jettons/{TETRIX_ADDRESS}",
+            headers={
+                "Authorization": f"Bearer {TON_API_KEY}",
+                "accept": "application/json"
+            }
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise UpstreamError(f"tonapi returned status {response.status}: {error_text[:200]}")
+            try:
+                data = await response.json(content_type=None)
+                return {"holders_count": int(data["holders_count"])}
+            except (ValueError, KeyError, TypeError) as e:
+                raise UpstreamError(f"tonapi returned unexpected body: {e}")
 
-    @cache_metrics(key_pattern=CacheKeys.DEX_SCREENER)
-    async def _fetch_dexscreener_data(self):
+    async def _fetch_dexscreener_data(self, http: aiohttp.ClientSession) -> dict:
         """Fetch price and volume data from DexScreener"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{DEXSCREENER_API_URL}/pairs/ton/{TETRIX_POOL}",
-                    headers={"accept": "application/json"}
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"DexScreener API returned status {response.status}: {error_text}")
-                        return self._get_default_dex_data()
-                        
-                    try:
-                        data = await response.json()
-                        if not data or "pairs" not in data or not data["pairs"]:
-                            logger.warning("DexScreener API returned no pair data, using defaults")
-                            return self._get_default_dex_data()
-                            
-                        pair = data["pairs"][0]  # Get the first pair (should be only one)
-                        
-                        volume_usd = float(pair["volume"]["h24"])
-                        price = float(pair["priceUsd"])
-                        cap = price * TOTAL_SUPPLY
-
-                        # Get max volume from database
-                        max_volume = await self._ensure_max_volume_exists()
-                        
-                        # Update max volume if needed
-                        if volume_usd > max_volume:
-                            await self._update_max_volume(volume_usd)
-                            max_volume = volume_usd
-
-                        return {
-                            "price": price,
-                            "cap": cap,
-                            "volume": volume_usd,
-                            "max_volume": max_volume
-                        }
-                    except Exception as e:
-                        logger.error(f"Error parsing DexScreener data: {e}")
-                        return self._get_default_dex_data()
-        except Exception as e:
-            logger.error(f"Error fetching DexScreener data: {e}")
-            return self._get_default_dex_data()
+        async with http.get(
+            f"{DEXSCREENER_API_URL}/pairs/ton/{TETRIX_POOL}",
+            headers={"accept": "application/json"}
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise UpstreamError(f"DexScreener returned status {response.status}: {error_text[:200]}")
+            try:
+                data = await response.json(content_type=None)
+                if not data or not data.get("pairs"):
+                    raise UpstreamError("DexScreener returned no pair data")
+
+                pair = data["pairs"][0]  # Get the first pair (should be only one)
+                price = float(pair["priceUsd"])
+                return {
+                    "price": price,
+                    "cap": price * TOTAL_SUPPLY,
+                    "volume": float(pair["volume"]["h24"])
+                }
+            except (ValueError, KeyError, TypeError) as e:
+                raise UpstreamError(f"DexScreener returned unexpected body: {e}")
 
     def _get_default_dex_data(self):
         """Return default values when DexScreener data is unavailable"""
@@ -169,83 +127,177 @@ class TetrixService:
             "max_volume": INITIAL_MAX_VOLUME  # Default max volume
         }
 
-    @cache_metrics(key_pattern="tetrix:metrics")
-    async def get_metrics(self):
-        """Get all TETRIX metrics from cache"""
-        try:
-            # Get cached values using decorated methods
-            dex_data = await self._fetch_dexscreener_data()
-            holders_data = await self._fetch_holders()
-            
-            missing_metrics = []
-            if not holders_data:
-                missing_metrics.append("holders")
-                
-            if missing_metrics:
-                logger.error("Missing metrics: %s", ", ".join(missing_metrics))
-                raise ValueError(f"Missing required metrics: {', '.join(missing_metrics)}")
-            
-            # Calculate percentages
-            health_percent = min(100, (holders_data["holders_count"] / MAX_HOLDERS) * 100)
-            strength_percent = min(100, (dex_data["cap"] / MAX_CAP) * 100)
-            mood_percent = min(100, (dex_data["volume"] / dex_data["max_volume"]) * 100) if dex_data["max_volume"] > 0 else 0
-            
-            # Get average percentage for emotion with weights
-            # Health and Strength have weight 2.5, Mood has weight 1
-            # Total denominator is 2.5 + 2.5 + 1 = 6
-            avg_percent = (2.5 * health_percent + 2.5 * strength_percent + mood_percent) / 6
-            emotion = get_emotion_by_percentage(avg_percent)
-            
-            logger.debug("Calculated metrics: health=%.2f%%, strength=%.2f%%, mood=%.2f%%, weighted_avg=%.2f%%",
-                      health_percent, strength_percent, mood_percent, avg_percent)
-            
-            metrics = {
-                "health": {
-                    "value": holders_data["holders_count"],
-                    "percent": health_percent,
-                    "bar": self._generate_bar(health_percent)
-                },
-                "strength": {
-                    "value": dex_data["cap"],
-                    "percent": strength_percent,
-                    "bar": self._generate_bar(strength_percent)
-                },
-                "mood": {
-                    "value": dex_data["volume"],
-                    "percent": mood_percent,
-                    "bar": self._generate_bar(mood_percent)
-                },
-                "emotion": emotion,
-                "raw": {
-                    "price": dex_data["price"],
-                    "market_cap": dex_data["cap"],
-                    "holders": holders_data["holders_count"],
-                    "volume_24h": dex_data["volume"],
-                    "max_volume": dex_data["max_volume"]
-                }
-            }
+    async def refresh_metrics(self, fencing_token: Optional[int] = None) -> dict:
+        """
+        Fetch DexScreener and tonapi data concurrently, build the metrics document
+        and store it in cache. Called only by the scheduler, so upstream latency
+        never reaches user requests.
+        Args:
+            fencing_token (int): Scheduler leader token; a document written by a
+                newer leader is never overwritten
+        Returns:
+            dict: Freshly built metrics document
+        """
+        dex_data, holders_data = await asyncio.gather(
+            DEXSCREENER_UPSTREAM.call(self._fetch_dexscreener_data, self.cache),
+            TONAPI_UPSTREAM.call(self._fetch_holders, self.cache)
+        )
 
-            # If we got a string, try to deserialize it
-            if isinstance(metrics, str):
-                try:
-                    metrics = json.loads(metrics)
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to decode metrics from cache, raw value: {metrics[:100]}")
-                    # Re-raise to trigger recalculation
-                    raise
+        # Upstreams fall back to their last good value, so this only happens
+        # when a source has never answered since the cache was empty
+        missing_metrics = []
+        if not dex_data:
+            missing_metrics.append("dexscreener")
+        if not holders_data:
+            missing_metrics.append("holders")
+        if missing_metrics:
+            logger.error("Missing metrics: %s", ", ".join(missing_metrics))
+            raise ValueError(f"Missing required metrics: {', '.join(missing_metrics)}")
 
+        # Max volume is tracked in memory and only grows with fresh data;
+        # persisting it to tetrix_metrics is done by the scheduler in background
+        if not metrics_tracker.loaded and self.session:
+            await metrics_tracker.load(self.session)
+        if dex_data["stale"]:
+            dex_data["max_volume"] = metrics_tracker.get("max_volume", INITIAL_MAX_VOLUME)
+        else:
+            dex_data["max_volume"] = metrics_tracker.observe("max_volume", dex_data["volume"], INITIAL_MAX_VOLUME)
+
+        metrics = self._build_metrics(dex_data, holders_data)
+        # Staleness of every source, so consumers can tell live data from fallbacks
+        metrics["sources"] = {
+            "dexscreener": {"stale": dex_data["stale"], "age": dex_data["age"]},
+            "holders": {"stale": holders_data["stale"], "age": holders_data["age"]}
+        }
+        # Version is the sample timestamp, so readers can tell documents apart
+        metrics["version"] = int(time.time())
+        metrics["updated_at"] = datetime.utcnow().isoformat()
+
+        if fencing_token is not None:
+            metrics["fencing_token"] = fencing_token
+            stored = await self.cache.client.eval(
+                STORE_METRICS_SCRIPT, 1, self.cache.build_key(CacheKeys.METRICS),
+                json.dumps(metrics), fencing_token
+            )
+            if not stored:
+                raise RuntimeError(f"Metrics document written by newer leader, token {fencing_token} is stale")
+        else:
+            await self.cache.set(CacheKeys.METRICS, json.dumps(metrics), ttl=CacheTTL.NONE.value)
+        logger.info(f"Metrics document v{metrics['version']} stored in cache")
+        return metrics
+
+    def _build_metrics(self, dex_data: dict, holders_data: dict) -> dict:
+        """
+        Calculate percentages, bars and emotion from raw upstream data
+        Args:
+            dex_data (dict): Price, cap, volume and max volume from DexScreener
+            holders_data (dict): Holders count from tonapi
+        Returns:
+            dict: Metrics document without version fields
+        """
+        # Calculate percentages
+        health_percent = min(100, (holders_data["holders_count"] / MAX_HOLDERS) * 100)
+        strength_percent = min(100, (dex_data["cap"] / MAX_CAP) * 100)
+        mood_percent = min(100, (dex_data["volume"] / dex_data["max_volume"]) * 100) if dex_data["max_volume"] > 0 else 0
+        
+        # Get average percentage for emotion with weights
+        # Health and Strength have weight 2.5, Mood has weight 1
+        # Total denominator is 2.5 + 2.5 + 1 = 6
+        avg_percent = (2.5 * health_percent + 2.5 * strength_percent + mood_percent) / 6
+        emotion = get_emotion_by_percentage(avg_percent)
+        
+        logger.debug("Calculated metrics: health=%.2f%%, strength=%.2f%%, mood=%.2f%%, weighted_avg=%.2f%%",
+                  health_percent, strength_percent, mood_percent, avg_percent)
+        
+        return {
+            "health": {
+                "value": holders_data["holders_count"],
+                "percent": health_percent,
+                "bar": self._generate_bar(health_percent)
+            },
+            "strength": {
+                "value": dex_data["cap"],
+                "percent": strength_percent,
+                "bar": self._generate_bar(strength_percent)
+            },
+            "mood": {
+                "value": dex_data["volume"],
+                "percent": mood_percent,
+                "bar": self._generate_bar(mood_percent)
+            },
+            "emotion": emotion,
+            "raw": {
+                "price": dex_data["price"],
+                "market_cap": dex_data["cap"],
+                "holders": holders_data["holders_count"],
+                "volume_24h": dex_data["volume"],
+                "max_volume": dex_data["max_volume"]
+            }
+        }
+
+    async def get_metrics(self) -> dict:
+        """
+        Get TETRIX metrics document produced by the scheduler.
+        Never calls upstream APIs: if the scheduler has not stored a document yet,
+        a placeholder built from default values is returned (version 0).
+        """
+        metrics = await self._get_cached_value(CacheKeys.METRICS)
+        if metrics:
             return metrics
-            
-        except Exception as e:
-            logger.error("Error getting metrics: %s", str(e), exc_info=True)
-            raise
+
+        logger.warning("Metrics document not in cache yet, returning defaults")
+        metrics = self._build_metrics(self._get_default_dex_data(), {"holders_count": 0})
+        metrics["version"] = 0
+        metrics["updated_at"] = None
+        return metrics
+
+    async def get_stats_template(self, language: str) -> str:
+        """
+        Get STATS_TEMPLATE with metrics bars and emotion already rendered.
+        Only user placeholders ({points}, {holding_points}, {invite_points},
+        {early_backer_bonus}) are left, so a stats screen is a single format() call.
+        Templates are memoized per language and metrics version: all users share
+        the same metrics block until the scheduler publishes a new document.
+        Args:
+            language (str): Language code of the user
+        Returns:
+            str: Preformatted template
+        """
+        metrics = await self.get_metrics()
+        memo_key = (language, metrics.get("version", 0))
+        template = _stats_templates.get(memo_key)
+        if template is None:
+            template = self._render_stats_template(get_strings(language), metrics)
+            # Keep only templates of the current metrics version
+            for key in [key for key in _stats_templates if key[1] != memo_key[1]]:
+                del _stats_templates[key]
+            _stats_templates[memo_key] = template
+        return template
+
+    def _render_stats_template(self, strings, metrics: dict) -> str:
+        """Render metrics part of STATS_TEMPLATE, keeping user placeholders intact"""
+        # Sentinels survive the first format() and brace escaping, then become placeholders again
+        sentinels = {field: f"\x00{field}\x00" for field in USER_STATS_FIELDS}
+        rendered = strings.STATS_TEMPLATE.format(
+            health_bar=metrics['health']['bar'],
+            strength_bar=metrics['strength']['bar'],
+            mood_bar=metrics['mood']['bar'],
+            emotion=metrics['emotion'],
+            **sentinels
+        )
+        rendered = rendered.replace("{", "{{").replace("}", "}}")
+        for field, sentinel in sentinels.items():
+            rendered = rendered.replace(sentinel, "{" + field + "}")
+        return rendered
 
     async def _get_cached_value(self, key: str) -> Optional[dict]:
-        """Get cached value from Redis"""
-        cached = await self.redis.get(key)
+        """Get cached JSON value from cache"""
+        if not self.cache:
+            return None
+        cached = await self.cache.get(key)
         if cached:
             try:
                 return json.loads(cached)
             except json.JSONDecodeError:
                 logger.error(f"Failed to decode cached value for {key}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from locales.language_utils import get_strings
+from utils.telegram_utils import send_telegram_message, TelegramStreamWriter
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3  # Attempts before a job is marked failed
+LEASE_SECONDS = 600  # In-progress jobs with an older lease belong to a dead worker and are resumed
+POLL_INTERVAL = 2  # Seconds between queue polls when idle
+RETRY_BASE_DELAY = 30  # Seconds before the first retry, doubled for every next one
+STORE_RAW_PAYLOAD = os.getenv("THREADS_STORE_RAW_PAYLOAD", "false").lower() == "true"  # Keep full RapidAPI response
+STREAM_ANALYSIS = os.getenv("THREADS_STREAM_ANALYSIS", "true").lower() == "true"  # Show analysis while it is generated
+
+# Claim one runnable job: queued and due, or in progress with an expired lease.
+# A stale job is claimed once more after its last attempt, only to be marked failed.
+# SKIP LOCKED lets any number of workers in any number of processes poll concurrently.
+CLAIM_JOB_SQL = text("""
+    UPDATE threads_job_campaign
+    SET locked_at = now(), locked_by = :worker, attempts = attempts + 1, updated_at = now(),
+        job_status = CASE WHEN job_status = 'queued' THEN 'fetching' ELSE job_status END
+    WHERE id = (
+        SELECT id FROM threads_job_campaign
+        WHERE (job_status = 'queued' AND run_after <= now())
+           OR (job_status IN ('fetching', 'analyzing', 'sending')
+               AND locked_at < now() - make_interval(secs => :lease)
+               AND attempts <= :max_attempts)
+        ORDER BY run_after
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, attempts
+""")
+
+class ThreadsJobQueue:
+    """
+    Durable Threads analysis queue on top of threads_job_campaign.
+    The webhook only creates a queued row; a pool of workers in every process claims
+    jobs with SKIP LOCKED and runs fetch -> analyze -> send, saving the result of each
+    step, so a job interrupted by a restart resumes from the step it reached.
+    """
+
+    def __init__(self, concurrency: int = int(os.getenv("THREADS_WORKERS", "3"))):
+        """
+        Args:
+            concurrency (int): Max jobs processed at once by this process
+        """
+        self.concurrency = concurrency
+        self.session_factory: Optional[async_sessionmaker] = None
+        self.cache = None  # aiocache instance for Threads profile cache
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"  # Lease owner name
+        self._workers: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()  # Set when a job is enqueued in this process
+
+    async def start(self, session_factory: async_sessionmaker, cache=None):
+        """Start worker pool"""
+        self.session_factory = session_factory
+        self.cache = cache
+        self._workers = [
+            asyncio.create_task(self._worker(f"{self.worker_id}:{n}"))
+            for n in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} Threads analysis workers")
+
+    async def stop(self):
+        """Stop workers; jobs they held are resumed after the lease expires"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def wake(self):
+        """Wake idle workers of this process after enqueueing"""
+        self._wakeup.set()
+
+    async def _worker(self, name: str):
+        """Claim and process jobs until cancelled"""
+        while True:
+            try:
+                job = await self._claim(name)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self._process(*job)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Threads worker {name} error: {e}", exc_info=True)
+                await asyncio.sleep(POLL_INTERVAL)
+
+    async def _claim(self, name: str) -> Optional[tuple]:
+        """Claim next runnable job, returns (job id, attempt) or None"""
+        async with self.session_factory() as session:
+            result = await session.execute(CLAIM_JOB_SQL, {"worker": name, "lease": LEASE_SECONDS,
+                                                          "max_attempts": MAX_ATTEMPTS})
+            row = result.first()
+            await session.commit()
+            return (row.id, row.attempts) if row else None
+
+    async def _save(self, session, campaign, status: str):
+        """Persist job status with the step's results and renew the lease"""
+        campaign.job_status = status
+        campaign.locked_at = datetime.now(timezone.utc)
+        await session.commit()
+
+    async def _process(self, job_id: int, attempt: int):
+        """Run remaining steps of a job; every finished step is persisted"""
+        from models.threads_job_campaign import ThreadsJobCampaign
+        from models.user import User
+        from services.threads_service import ThreadsService
+        from services.llm_service import LLMService
+
+        async with self.session_factory() as session:
+            campaign = await session.get(ThreadsJobCampaign, job_id)
+            if campaign is None:
+                return  # Entry was replaced by a new submission
+            user = await session.get(User, campaign.user_id)
+            # Plain values stay usable after a rollback expires the loaded instances
+            telegram_id = user.telegram_id
+            language = user.language or 'ru'
+            strings = get_strings(language)
+            llm_service = LLMService(self.cache, self.session_factory)
+            threads_service = ThreadsService(self.cache)
+
+            if attempt > MAX_ATTEMPTS:
+                # Worker died during the last attempt
+                await self._fail(session, campaign, attempt, telegram_id, strings,
+                                 campaign.last_error or "lease expired")
+                return
+
+            writer = None
+            try:
+                if campaign.post_texts is None:
+                    await self._save(session, campaign, "fetching")
+                    threads_data, not_found = await threads_service.get_profile(campaign.threads_username)
+                    if not_found:
+                        campaign.last_error = "not_found"
+                        campaign.locked_by = None
+                        await self._save(session, campaign, "failed")
+                        await send_telegram_message(telegram_id, strings.THREADS_PROFILE_NOT_FOUND,
+                                                    parse_mode="Markdown")
+                        return
+                    if threads_data is None:
+                        raise RuntimeError("Threads API unavailable")
+                    campaign.threads_user_id = str(threads_data['user']['data']['user']['id'])
+                    # Posts are extracted once; the raw response is only kept for debugging
+                    campaign.post_texts = threads_service.extract_posts_from_json(threads_data)
+                    campaign.posts_json = threads_data if STORE_RAW_PAYLOAD else None
+                    await self._save(session, campaign, "analyzing")
+
+                writer = TelegramStreamWriter(telegram_id) if STREAM_ANALYSIS else None
+                if not campaign.analysis_report:
+                    await self._save(session, campaign, "analyzing")
+                    report = await llm_service.analyze_threads_profile(campaign.post_texts, telegram_id,
+                                                                       language, writer=writer)
+                    if not report:
+                        raise RuntimeError("Analysis failed")
+                    campaign.analysis_report = json.dumps(report, ensure_ascii=False)
+
+                # Rendered parts are stored, so re-display on /start is a plain send
+                report = json.loads(campaign.analysis_report)
+                parts = llm_service.render_report_parts(report, language)
+                campaign.report_parts = {**(campaign.report_parts or {}), language: parts}
+                await self._save(session, campaign, "sending")
+                if not await llm_service.send_analysis_to_user(telegram_id, report, language,
+                                                               writer=writer, parts=parts):
+                    raise RuntimeError("Failed to deliver analysis")
+                campaign.locked_by = None
+                campaign.last_error = None
+                await self._save(session, campaign, "done")
+                logger.info(f"Threads analysis job {job_id} done")
+            except Exception as e:
+                if writer is not None and writer.started:
+                    # The retry streams or sends the report again with a new writer
+                    await writer.discard()
+                await session.rollback()
+                campaign = await session.get(ThreadsJobCampaign, job_id)
+                if campaign is None:
+                    return
+                await self._fail(session, campaign, attempt, telegram_id, strings, str(e))
+
+    async def _fail(self, session, campaign, attempt: int, telegram_id: int, strings, error: str):
+        """Schedule retry with exponential backoff or give up after MAX_ATTEMPTS"""
+        job_id = campaign.id
+        campaign.last_error = error
+        campaign.locked_by = None
+        if attempt < MAX_ATTEMPTS:
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            logger.warning(f"Threads job {job_id} attempt {attempt} failed: {error}, retry in {delay}s")
+            campaign.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await self._save(session, campaign, "queued")
+            return
+
+        logger.error(f"Threads job {job_id} failed after {min(attempt, MAX_ATTEMPTS)} attempts: {error}")
+        await self._save(session, campaign, "failed")
+        await send_telegram_message(telegram_id, strings.THREADS_ANALYSIS_ERROR, parse_mode="Markdown")
+
+# Process-wide queue, started in the application lifespan
+threads_job_queue = ThreadsJobQueue()
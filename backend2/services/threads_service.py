@@ -2,109 +2,248 @@
 
 import aiohttp
 import logging
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import json
 import os
 import asyncio
+import time
+from core.cache import CacheKeys, CacheTTL
+from core.upstream import get_http_session
+from core.rate_limit import rapidapi_limiter, backoff_delay, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+NOT_FOUND = "not_found"  # Cached marker for usernames that don't exist
+FETCH_LOCK_TTL = 30  # Seconds a profile fetch lock is held at most
+FETCH_WAIT = 15  # Seconds to wait for a concurrent fetch of the same profile
+
+def normalize_username(username: str) -> str:
+    """Threads usernames are case-insensitive, normalize for cache keys"""
+    return username.strip().lstrip('@').lower()
+
 class ThreadsService:
     """Service for interacting with Threads API"""
     
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache: Optional aiocache instance; profiles are cached in Redis when given
+        """
         self.base_url = "https://threads-api4.p.rapidapi.com/api"
         self.headers = {
             "x-rapidapi-host": "threads-api4.p.rapidapi.com",
             "x-rapidapi-key": os.getenv("RAPIDAPI_KEY")
         }
         self.max_retries = 4
-        self.retry_delay = 1  # seconds
+        self.retry_delay = 1  # Backoff base in seconds
+        self.cache = cache
 
     async def _make_request(self, session: aiohttp.ClientSession, url: str, params: Dict) -> Optional[Dict]:
-        """Make request with retry logic for rate limits"""
-        retries = 0
-        while retries <= self.max_retries:
-            try:
-                async with session.get(url, headers=self.headers, params=params) as response:
-                    if response.status == 429:  # Rate limit error
-                        if retries == self.max_retries:
-                            logger.error(f"Rate limit reached after {retries} retries")
+        """
+        Make request through the shared RapidAPI limiter, retrying rate limits, server
+        errors and network failures with exponential backoff and jitter (honouring Retry-After)
+        """
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with rapidapi_limiter.slot():
+                try:
+                    async with session.get(url, headers=self.headers, params=params) as response:
+                        if response.status == 429:  # Rate limit error
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            rapidapi_limiter.record_throttled(retry_after)
+                        elif response.status >= 500:
+                            logger.warning(f"Server error {response.status} from {url}")
+                        elif response.status != 200:
+                            response_text = await response.text()
+                            logger.error(f"Error response: status={response.status}, body={response_text}")
+                            rapidapi_limiter.record_failure()
                             return None
-                        retries += 1
-                        logger.warning(f"Rate limit hit, retry {retries} of {self.max_retries}")
-                        await asyncio.sleep(self.retry_delay)
-                        continue
-                        
-                    response_text = await response.text()
-                    
-                    if response.status != 200:
-                        logger.error(f"Error response: status={response.status}, body={response_text}")
-                        return None
-                        
-                    return await response.json()
-                    
-            except Exception as e:
-                logger.error(f"Request error: {str(e)}")
+                        else:
+                            return await response.json()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Request error: {str(e)}")
+                except Exception as e:
+                    logger.error(f"Request error: {str(e)}")
+                    rapidapi_limiter.record_failure()
+                    return None
+
+            if attempt == self.max_retries:
+                break
+            # Back off outside the limiter so waiting doesn't hold a concurrency slot
+            rapidapi_limiter.record_retry()
+            delay = backoff_delay(attempt, retry_after, base=self.retry_delay)
+            logger.warning(f"Retry {attempt + 1} of {self.max_retries} for {url} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        logger.error(f"Request to {url} failed after {self.max_retries} retries")
+        rapidapi_limiter.record_failure()
+        return None
+
+    async def get_user_data(self, username: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get user data by username, including ID and posts, through the shared Redis cache.
+        Args:
+            username (str): Threads username
+            max_age (float): See get_profile
+        Returns:
+            Optional[Dict]: {"user", "posts"} or None if not found or unavailable
+        """
+        data, _ = await self.get_profile(username, max_age)
+        return data
+
+    async def get_profile(self, username: str, max_age: Optional[float] = None) -> Tuple[Optional[Dict], bool]:
+        """
+        Get user data telling a missing profile apart from an unavailable API.
+        Concurrent requests for the same profile wait for a single RapidAPI fetch.
+        Args:
+            username (str): Threads username
+            max_age (float): Refetch if the cached profile is older (seconds); on refetch
+                failure the cached profile is still returned. None accepts any cached profile.
+        Returns:
+            Tuple[Optional[Dict], bool]: {"user", "posts"} (None on failure) and whether the profile doesn't exist
+        """
+        if not self.cache:
+            return await self._fetch_user_data(username)
+
+        key = normalize_username(username)
+        cached = await self._get_cached_profile(key)
+        if cached == NOT_FOUND:
+            logger.debug(f"Threads profile {key} cached as not found")
+            return None, True
+        if cached and (max_age is None or time.time() - cached["fetched_at"] <= max_age):
+            logger.debug(f"Threads profile {key} served from cache")
+            return cached["data"], False
+
+        lock_key = CacheKeys.THREADS_FETCH_LOCK.format(username=key)
+        locked = await self._try_lock(lock_key)
+        if not locked:
+            # Another request is fetching this profile, wait for its result
+            fetched = await self._wait_for_profile(key, cached)
+            if fetched == NOT_FOUND:
+                return None, True
+            if fetched is not None:
+                return fetched["data"], False
+
+        try:
+            data, not_found = await self._fetch_user_data(username)
+            if data:
+                await self._cache_profile(key, data)
+            elif not_found:
+                await self.cache.set(CacheKeys.THREADS_USERNAME.format(username=key), NOT_FOUND,
+                                     ttl=CacheTTL.THREADS_NOT_FOUND.value)
+            elif cached:
+                logger.warning(f"Refetch of Threads profile {key} failed, using cached profile")
+                return cached["data"], False
+            return data, not_found
+        finally:
+            if locked:
+                await self.cache.delete(lock_key)
+
+    async def _try_lock(self, lock_key: str) -> bool:
+        """Take fetch lock, False if another request holds it"""
+        try:
+            await self.cache.add(lock_key, "1", ttl=FETCH_LOCK_TTL)
+            return True
+        except ValueError:  # aiocache raises when the key already exists
+            return False
+
+    async def _get_cached_profile(self, key: str):
+        """Cached profile {"data", "fetched_at"}, NOT_FOUND marker or None"""
+        try:
+            user_id = await self.cache.get(CacheKeys.THREADS_USERNAME.format(username=key))
+            if not user_id:
                 return None
+            if user_id == NOT_FOUND:
+                return NOT_FOUND
+            cached = await self.cache.get(CacheKeys.THREADS_PROFILE.format(user_id=user_id))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.error(f"Failed to read cached Threads profile {key}: {e}")
+            return None
+
+    async def _cache_profile(self, key: str, data: Dict):
+        """Store profile under its user id and point the username at it"""
+        try:
+            user_id = data["user"]["data"]["user"]["id"]
+            ttl = CacheTTL.THREADS_PROFILE.value
+            await self.cache.set(CacheKeys.THREADS_PROFILE.format(user_id=user_id),
+                                 json.dumps({"data": data, "fetched_at": time.time()}, ensure_ascii=False), ttl=ttl)
+            await self.cache.set(CacheKeys.THREADS_USERNAME.format(username=key), str(user_id), ttl=ttl)
+        except Exception as e:
+            logger.error(f"Failed to cache Threads profile {key}: {e}")
+
+    async def _wait_for_profile(self, key: str, previous: Optional[Dict]):
+        """Poll cache until a concurrent fetch stores a newer profile or gives up"""
+        previous_fetched_at = previous["fetched_at"] if previous else 0
+        deadline = time.monotonic() + FETCH_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+            cached = await self._get_cached_profile(key)
+            if cached == NOT_FOUND or (cached and cached["fetched_at"] > previous_fetched_at):
+                return cached
         return None
 
-    async def get_user_data(self, username: str) -> Optional[Dict]:
-        """Get user data by username, including ID and posts"""
+    async def _fetch_user_data(self, username: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Fetch user info and posts from RapidAPI
+        Returns:
+            Tuple[Optional[Dict], bool]: Data (None on failure) and whether the profile doesn't exist
+        """
         logger.debug(f"Starting get_user_data for username: {username}")
-        async with aiohttp.ClientSession() as session:
-            try:
-                # First get user info
-                url = f"{self.base_url}/user/info"
-                params = {"username": username}
-                logger.debug(f"Making request to {url} with params: {params}")
+        # Pooled session: profile fetches reuse upstream connections instead of a TLS handshake each
+        session = get_http_session()
+        try:
+            # First get user info
+            url = f"{self.base_url}/user/info"
+            params = {"username": username}
+            logger.debug(f"Making request to {url} with params: {params}")
+            
+            user_data = await self._make_request(session, url, params)
+            if not user_data:
+                logger.error(f"Failed to get user data for {username}")
+                return None, False
                 
-                user_data = await self._make_request(session, url, params)
-                if not user_data:
-                    logger.error(f"Failed to get user data for {username}")
-                    return None
-                    
-                logger.debug(f"Got user data response: {json.dumps(user_data, indent=2)}")
+            logger.debug(f"Got user data response: {json.dumps(user_data, indent=2)}")
+            
+            user = user_data.get("data", {}).get("user")
+            if not user:
+                logger.error(f"User {username} not found in response data")
+                return None, True
                 
-                user = user_data.get("data", {}).get("user")
-                if not user:
-                    logger.error(f"User {username} not found in response data")
-                    return None
-                    
-                user_id = user.get("id")
-                if not user_id:
-                    logger.error(f"No user ID found for {username}")
-                    return None
+            user_id = user.get("id")
+            if not user_id:
+                logger.error(f"No user ID found for {username}")
+                return None, True
 
-                logger.debug(f"Successfully got user_id: {user_id}")
-                
-                # Then get posts data
-                url = f"{self.base_url}/user/posts"
-                params = {"user_id": user_id}
-                logger.debug(f"Making request to {url} with params: {params}")
-                
-                posts_data = await self._make_request(session, url, params)
-                if not posts_data:
-                    logger.error(f"Failed to get posts for user {user_id}")
-                    return None
-                    
-                logger.debug(f"Got posts data response: {json.dumps(posts_data, indent=2)}")
+            logger.debug(f"Successfully got user_id: {user_id}")
+            
+            # Then get posts data
+            url = f"{self.base_url}/user/posts"
+            params = {"user_id": user_id}
+            logger.debug(f"Making request to {url} with params: {params}")
+            
+            posts_data = await self._make_request(session, url, params)
+            if not posts_data:
+                logger.error(f"Failed to get posts for user {user_id}")
+                return None, False
                 
-                # Check for errors
-                if posts_data.get("errors") or not posts_data.get("data"):
-                    error = posts_data.get("errors", [{}])[0]
-                    logger.error(f"API error for user {user_id}: {error.get('description', 'Unknown error')}")
-                    return None
+            logger.debug(f"Got posts data response: {json.dumps(posts_data, indent=2)}")
+            
+            # Check for errors
+            if posts_data.get("errors") or not posts_data.get("data"):
+                error = posts_data.get("errors", [{}])[0]
+                logger.error(f"API error for user {user_id}: {error.get('description', 'Unknown error')}")
+                return None, False
+            
+            # Return combined data
+            return {
+                "user": user_data,
+                "posts": posts_data
+            }, False
                 
-                # Return combined data
-                return {
-                    "user": user_data,
-                    "posts": posts_data
-                }
-                    
-            except Exception as e:
-                logger.error(f"Error getting user data: {str(e)}")
-                return None
+        except Exception as e:
+            logger.error(f"Error getting user data: {str(e)}")
+            return None, False
 
     def extract_posts_from_json(self, data: Dict) -> List[str]:
         """Extract post texts from API response JSON"""
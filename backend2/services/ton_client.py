@@ -1,37 +1,145 @@
-from tonsdk.contract.wallet import WalletVersionEnum, Wallets
-from tonsdk.utils import to_nano, Address
-import os
-from loguru import logger
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.upstream import get_http_session
+from services.holder_ingester import AdaptiveRateLimiter, TONCENTER_API_URL, TETRIX_JETTON_ADDRESS, toncenter_get
+from utils.ton_address import normalize_address
+
+logger = logging.getLogger(__name__)
+
+ADDRESSES_PER_REQUEST = 50  # Addresses per batched lookup, keeps the query under the 8KB request line limit
+BALANCE_TTL = 30  # Seconds a fetched balance is served from memory
+BALANCE_CACHE_SIZE = 10000  # Cached balances per kind before the cache is reset
+MAX_RETRIES = 3  # Attempts per request
+
+# Shared by all clients in the process, toncenter limits are per API key
+_rate_limiter = AdaptiveRateLimiter(rate=2.0, max_rate=10.0)
 
 class TonClient:
-    def __init__(self):
-        pass
+    """
+    Async toncenter v3 client for balances and transactions. Requests go through the
+    pooled upstream session and a shared rate limiter; lookups of many addresses are
+    batched and balances are cached in memory for BALANCE_TTL seconds.
+    """
+
+    # Canonical address -> (fetch time, balance in nano units), per balance kind
+    _balances: Dict[str, Dict[str, Tuple[float, int]]] = {}
+
+    def __init__(self, base_url: str = TONCENTER_API_URL, jetton_address: str = TETRIX_JETTON_ADDRESS,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        """
+        Args:
+            base_url (str): toncenter v3 API base URL (fake server in tests)
+            jetton_address (str): Jetton master whose balances are looked up
+            rate_limiter (AdaptiveRateLimiter): Limiter, process-wide one if not given
+        """
+        self.base_url = base_url.rstrip("/")
+        self.jetton_address = jetton_address
+        self.rate_limiter = rate_limiter or _rate_limiter
+
+    async def _get(self, path: str, params) -> Dict:
+        """GET toncenter endpoint over the pooled session, see toncenter_get"""
+        return await toncenter_get(get_http_session(), self.rate_limiter, f"{self.base_url}{path}", params,
+                                   retries=MAX_RETRIES, timeout=10)
+
+    async def _cached_balances(self, kind: str, addresses: Iterable[str], fetch) -> Dict[str, int]:
+        """
+        Balances of addresses from the TTL cache, fetching the missing ones in batches
+        Args:
+            kind (str): Cache namespace, "ton" or "jetton:<master>"
+            addresses: Addresses in any form
+            fetch: async fn(batch of canonical addresses) -> {canonical address: balance}
+        Returns:
+            Dict[str, int]: Canonical address -> balance in nano units (0 if none)
+        """
+        cache = self._balances.setdefault(kind, {})
+        now = time.monotonic()
+        result, missing = {}, []
+        for address in {normalize_address(address) for address in addresses} - {None}:
+            cached = cache.get(address)
+            if cached and now - cached[0] < BALANCE_TTL:
+                result[address] = cached[1]
+            else:
+                missing.append(address)
+
+        if missing:
+            batches = [missing[i:i + ADDRESSES_PER_REQUEST] for i in range(0, len(missing), ADDRESSES_PER_REQUEST)]
+            fetched: Dict[str, int] = {}
+            for balances in await asyncio.gather(*(fetch(batch) for batch in batches)):
+                fetched.update(balances)
+            if len(cache) > BALANCE_CACHE_SIZE:
+                cache.clear()
+            now = time.monotonic()
+            for address in missing:
+                result[address] = fetched.get(address, 0)
+                cache[address] = (now, result[address])
+        return result
+
+    async def _fetch_ton_balances(self, addresses: List[str]) -> Dict[str, int]:
+        """TON balances of one batch via /accountStates"""
+        data = await self._get("/accountStates", [("address", address) for address in addresses])
+        return {
+            normalize_address(account["address"]): int(account.get("balance") or 0)
+            for account in data.get("accounts", [])
+        }
+
+    async def _fetch_jetton_balances(self, owners: List[str]) -> Dict[str, int]:
+        """Jetton balances of one batch of owners via /jetton/wallets, summed per owner"""
+        params = [("jetton_address", self.jetton_address), ("limit", len(owners))]  # One wallet per owner
+        params += [("owner_address", owner) for owner in owners]
+        data = await self._get("/jetton/wallets", params)
+        balances: Dict[str, int] = {}
+        for wallet in data.get("jetton_wallets", []):
+            owner = normalize_address(wallet["owner"])
+            balances[owner] = balances.get(owner, 0) + int(wallet["balance"])
+        return balances
+
+    async def get_balances(self, wallet_addresses: Iterable[str]) -> Dict[str, float]:
+        """TON balances of many wallets, keyed by canonical address"""
+        balances = await self._cached_balances("ton", wallet_addresses, self._fetch_ton_balances)
+        return {address: balance / 1e9 for address, balance in balances.items()}
+
+    async def get_tetrix_balances(self, wallet_addresses: Iterable[str]) -> Dict[str, float]:
+        """TETRIX balances of many owner wallets, keyed by canonical address"""
+        balances = await self._cached_balances(f"jetton:{self.jetton_address}", wallet_addresses, self._fetch_jetton_balances)
+        return {address: balance / 1e9 for address, balance in balances.items()}
 
     async def get_balance(self, wallet_address: str) -> float:
         try:
-            address = Address(wallet_address)
-            wallet = Wallets.create(
-                version=WalletVersionEnum.v3r2,
-                workchain=0,
-                address=address
-            )
-            balance = wallet.balance
-            return float(balance) / 1e9
+            return (await self.get_balances([wallet_address])).get(normalize_address(wallet_address), 0.0)
         except Exception as e:
             logger.error(f"Error getting balance: {e}")
             return 0.0
 
     async def get_tetrix_balance(self, wallet_address: str) -> float:
         try:
-            # TODO: Implement actual token balance check using tonsdk
-            return 1.0
+            return (await self.get_tetrix_balances([wallet_address])).get(normalize_address(wallet_address), 0.0)
         except Exception as e:
             logger.error(f"Error getting TETRIX balance: {e}")
             return 0.0
 
+    async def get_wallet_info(self, address: str) -> Optional[Dict]:
+        """Account state (balance, status, code hash) from /accountStates"""
+        data = await self._get("/accountStates", [("address", address)])
+        accounts = data.get("accounts", [])
+        return accounts[0] if accounts else None
+
+    async def verify_proof(self, address: str, proof: Dict) -> bool:
+        """Verify TON Connect proof ({address, public_key, proof}) off the event loop"""
+        from services.ton_proof_service import TonProofService
+        return await TonProofService.check_proof_async({**proof, "address": address})
+
+    async def check_transaction(self, tx_hash: str) -> Optional[Dict]:
+        """Transaction by hash, None if not found"""
+        data = await self._get("/transactions", {"hash": tx_hash, "limit": 1})
+        transactions = data.get("transactions", [])
+        return transactions[0] if transactions else None
+
     async def transfer_tetrix(self, to_address: str, amount: float) -> bool:
         try:
-            # TODO: Implement actual token transfer using tonsdk
+            # TODO: Implement actual token transfer (needs a signing wallet)
             logger.info(f"Transferring {amount} TETRIX to {to_address}")
             return True
         except Exception as e:
@@ -39,9 +147,10 @@ class TonClient:
             return False
 
     async def check_transaction_status(self, tx_hash: str) -> bool:
+        """True if the transaction is on chain and was not aborted"""
         try:
-            # TODO: Implement transaction status check using tonsdk
-            return True
+            transaction = await self.check_transaction(tx_hash)
+            return bool(transaction) and not transaction.get("description", {}).get("aborted", False)
         except Exception as e:
             logger.error(f"Error checking transaction: {e}")
-            return False
\ No newline at end of file
+            return False
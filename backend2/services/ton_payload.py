@@ -0,0 +1,70 @@
+"""
+Self-verifying TON Connect proof payloads.
+
+A payload is "<telegram_id>.<expiry>.<nonce>.<signature>" where the signature is an HMAC
+over the first three fields, so /ton-connect/get-message stores nothing and verification
+is CPU-only. Replays are blocked by one SETNX of the nonce, kept until the payload expires.
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from typing import Optional, Tuple
+
+from redis.asyncio import Redis
+
+from core.cache import CacheKeys
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_TTL = 600  # Seconds a payload can be used after it was issued
+SIGNATURE_BYTES = 16  # Truncated HMAC-SHA256, 128 bits is plenty for a 10-minute token
+
+def _sign(secret: str, body: str) -> str:
+    """Hex HMAC-SHA256 of body truncated to SIGNATURE_BYTES"""
+    return hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES].hex()
+
+def create_payload(telegram_id: int, secret: str, ttl: int = PAYLOAD_TTL) -> str:
+    """Signed payload bound to telegram_id, valid for ttl seconds"""
+    body = f"{telegram_id}.{int(time.time()) + ttl}.{secrets.token_hex(8)}"
+    return f"{body}.{_sign(secret, body)}"
+
+def verify_payload(payload: str, telegram_id: int, secret: str) -> Optional[Tuple[int, str]]:
+    """
+    Check signature, owner and expiry of payload
+    Returns:
+        Optional[Tuple[int, str]]: (expiry, nonce) of a valid payload, None otherwise
+    """
+    try:
+        # Issued payloads are ASCII; anything else would break encoding and compare_digest
+        if not payload.isascii():
+            return None
+        payload_telegram_id, expiry, nonce, signature = payload.split(".")
+        expiry = int(expiry)
+    except (AttributeError, ValueError):
+        return None
+    body = f"{payload_telegram_id}.{expiry}.{nonce}"
+    if not hmac.compare_digest(signature.encode(), _sign(secret, body).encode()):
+        logger.warning(f"[TON_CONNECT] Bad payload signature for telegram_id={telegram_id}")
+        return None
+    if payload_telegram_id != str(telegram_id):
+        logger.warning(f"[TON_CONNECT] Payload of {payload_telegram_id} used by telegram_id={telegram_id}")
+        return None
+    if expiry < time.time():
+        logger.warning(f"[TON_CONNECT] Expired payload for telegram_id={telegram_id}")
+        return None
+    return expiry, nonce
+
+async def consume_payload(redis: Redis, payload: str, telegram_id: int, secret: str) -> bool:
+    """Verify payload and mark its nonce used; False if invalid or already used"""
+    verified = verify_payload(payload, telegram_id, secret)
+    if verified is None:
+        return False
+    expiry, nonce = verified
+    # Nonce only needs to be remembered while the payload could still pass verification
+    ttl = max(1, expiry - int(time.time()) + 1)
+    if not await redis.set(CacheKeys.TON_PROOF_NONCE.format(nonce=nonce), telegram_id, nx=True, ex=ttl):
+        logger.warning(f"[TON_CONNECT] Replayed payload for telegram_id={telegram_id}")
+        return False
+    return True
@@ -1,7 +1,13 @@
+import asyncio
 import logging
 import hashlib
+import os
 import time
 from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import FrozenSet, Tuple
+from urllib.parse import urlparse
 import nacl.signing
 from tonsdk.utils import Address
 from tonsdk.boc import Cell
@@ -12,7 +18,47 @@ logger = logging.getLogger(__name__)
 TON_PROOF_PREFIX = "ton-proof-item-v2/".encode()
 TON_CONNECT_PREFIX = "ton-connect".encode()
 VALID_AUTH_TIME = 300  # 5 minutes
-ALLOWED_DOMAINS = {'localhost', 'app.tetrix.xyz'}  # Add your domains here
+# Domains wallets may sign proofs for; the mini app's own host comes from FRONTEND_URL
+ALLOWED_DOMAINS = {'localhost', 'app.tetrix.xyz'} | ({urlparse(os.getenv("FRONTEND_URL", "")).netloc} - {""})
+PROOF_WORKERS = int(os.getenv("TON_PROOF_WORKERS", "4"))  # Threads verifying proofs
+PROOF_QUEUE = PROOF_WORKERS * 8  # Verifications waiting for a thread before callers wait on the event loop
+# Bits before the public key in wallet data: v1/v2 seqno; v3/v4 seqno, subwallet_id; v5 signature flag, seqno, wallet_id
+WALLET_KEY_OFFSETS = (32, 64, 65)
+
+# Proof verification is CPU work (BOC parsing, hashing, Ed25519), kept off the event loop
+_proof_executor = ThreadPoolExecutor(max_workers=PROOF_WORKERS, thread_name_prefix="ton-proof")
+_proof_slots = None  # asyncio.Semaphore bounding queued verifications, created inside the event loop
+
+def wallet_data(state_init: Cell) -> Cell:
+    """Data cell of a StateInit (split_depth, special, code and data are optional)"""
+    fields = state_init.begin_parse()
+    if fields.read_bit():
+        fields.skip_bits(5)  # split_depth
+    if fields.read_bit():
+        fields.skip_bits(2)  # special: tick, tock
+    if fields.read_bit():
+        fields.read_ref()  # code
+    if not fields.read_bit():
+        raise ValueError("state_init has no data")
+    return fields.read_ref()
+
+@lru_cache(maxsize=1024)
+def parse_state_init(state_init: str) -> Tuple[bytes, FrozenSet[bytes]]:
+    """
+    Parse base64 state_init BOC; wallets log in repeatedly with the same state_init
+    Returns:
+        Tuple[bytes, FrozenSet[bytes]]: State init hash (the account id of the wallet it deploys)
+            and the public keys its data holds at the known wallet layouts
+    """
+    cell = Cell.one_from_boc(b64decode(state_init))
+    data = wallet_data(cell)
+    keys = set()
+    for offset in WALLET_KEY_OFFSETS:
+        if data.bits.length >= offset + 256:
+            fields = data.begin_parse()
+            fields.skip_bits(offset)
+            keys.add(fields.read_uint(256).to_bytes(32, byteorder='big'))
+    return bytes(cell.bytes_hash()), frozenset(keys)
 
 class TonProofService:
     @staticmethod
@@ -28,22 +74,19 @@ class TonProofService:
         Based on reference implementation from TON Connect docs.
         """
         try:
-            logger.info(f"Checking proof payload: {payload}")
+            logger.debug("Checking proof payload: %s", payload)
             
-            # Parse and validate state init
-            state_init = Cell.one_from_boc(b64decode(payload['proof']['state_init']))
-            state_init_data = state_init.begin_parse()
-            logger.info("State init parsed successfully")
-
-            # Get public key from state init
-            public_key = bytes.fromhex(payload['public_key'])
-            logger.info(f"Using public key: {public_key.hex()}")
-
-            # Verify address matches state init
+            # State init must deploy exactly this address, and the key must be the one in its wallet data
             address = Address(payload['address'])
-            if not address:
-                logger.error("Invalid address")
+            state_init_hash, wallet_keys = parse_state_init(payload['proof']['state_init'])
+            if state_init_hash != bytes(address.hash_part):
+                logger.error("State init does not match address %s", payload['address'])
+                return False
+            public_key = bytes.fromhex(payload['public_key'])
+            if public_key not in wallet_keys:
+                logger.error("Public key is not the key of wallet %s", payload['address'])
                 return False
+            logger.debug("Using public key: %s", payload['public_key'])
 
             # Verify domain
             domain = payload['proof']['domain']['value']
@@ -73,10 +116,8 @@ class TonProofService:
                 ts,
                 payload['proof']['payload'].encode()
             ])
-            logger.info(f"Constructed message: {msg.hex()}")
 
             msg_hash = hashlib.sha256(msg).digest()
-            logger.info(f"Message hash: {msg_hash.hex()}")
 
             # Construct full message with prefix
             full_msg = b''.join([
@@ -84,20 +125,30 @@ class TonProofService:
                 TON_CONNECT_PREFIX,
                 msg_hash
             ])
-            logger.info(f"Full message: {full_msg.hex()}")
 
             result = hashlib.sha256(full_msg).digest()
-            logger.info(f"Final hash: {result.hex()}")
 
             # Verify signature
-            verify_key = nacl.signing.VerifyKey(bytes.fromhex(payload['public_key']))
+            verify_key = nacl.signing.VerifyKey(public_key)
             signature = b64decode(payload['proof']['signature'])
-            logger.info(f"Verifying signature: {signature.hex()}")
+            # Hex dumps are only built when debug logging is on, this runs for every login
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Proof message {msg.hex()}, final hash {result.hex()}, signature {signature.hex()}")
             
             verify_key.verify(result, signature)  # Verify the final hash with the signature
-            logger.info("Signature verified successfully")
+            logger.debug("Signature verified successfully")
             return True
             
         except Exception as e:
             logger.error(f"Error checking proof: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    async def check_proof_async(payload: dict) -> bool:
+        """check_proof in the bounded proof executor, so concurrent logins don't block the event loop"""
+        global _proof_slots
+        if _proof_slots is None:
+            _proof_slots = asyncio.Semaphore(PROOF_QUEUE)
+        async with _proof_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_proof_executor, TonProofService.check_proof, payload)
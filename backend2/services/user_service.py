@@ -10,13 +10,15 @@ import json
 
 from models.user import User
 from models.invite_code import InviteCode
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, FrozenSet
+from functools import lru_cache
 from core.cache import CacheKeys, cache_permanent
 from services.llm_service import LLMService
-from services.threads_service import ThreadsService
 from services.redis_service import RedisService
+from services.points_service import PointsService, POINTS_PER_INVITE, EARLY_BACKER_BONUS
 from models.threads_job_campaign import ThreadsJobCampaign
 from core.config import get_settings
+from utils.ton_address import normalize_address
 from locales.language_utils import get_strings
 
 settings = get_settings()
@@ -49,6 +51,17 @@ def utc_now() -> datetime:
     """Returns current UTC time"""
     return datetime.utcnow()
 
+@lru_cache(maxsize=1)
+def load_early_backers(file_path: str = 'first_backers.txt') -> FrozenSet[str]:
+    """
+    Early backer wallets in canonical form, read once per process (path relative to app.py).
+    Raises FileNotFoundError like before, so a missing list is not cached as empty.
+    """
+    with open(file_path, 'r') as f:
+        backers = frozenset(filter(None, (normalize_address(line) for line in f)))
+    logger.info(f"[USER_SERVICE] Loaded {len(backers)} early backers from {file_path}")
+    return backers
+
 class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -97,27 +110,11 @@ class UserService:
                     registration_phase='threads_job_campaign' if is_threads_campaign else 'preregistered'
                 )
             else:
+                # Store canonical raw form; any form TON Connect or users send is accepted
+                wallet_address = normalize_address(wallet_address) or wallet_address
                 logger.info(f"[USER_SERVICE] Checking early backer status for wallet: {wallet_address}")
-                # Use relative path from app.py
-                file_path = 'first_backers.txt'
-                logger.info(f"[USER_SERVICE] Looking for first_backers.txt at: {file_path}")
-                
-                try:
-                    with open(file_path, 'r') as f:
-                        early_backers = f.read().splitlines()
-                        logger.info(f"[USER_SERVICE] Loaded {len(early_backers)} early backers")
-                        logger.info(f"[USER_SERVICE] First few backers: {early_backers[:5]}")
-                        # Normalize wallet address for comparison
-                        wallet_address = wallet_address.strip().lower()
-                        early_backers = [addr.strip().lower() for addr in early_backers]
-                        is_early_backer = wallet_address in early_backers
-                        logger.info(f"[USER_SERVICE] Is early backer check result: {is_early_backer} for wallet {wallet_address}")
-                except FileNotFoundError:
-                    logger.error(f"[USER_SERVICE] first_backers.txt not found at {file_path}")
-                    raise
-                except Exception as e:
-                    logger.error(f"[USER_SERVICE] Error reading first_backers.txt: {e}", exc_info=True)
-                    raise
+                is_early_backer = wallet_address in load_early_backers()
+                logger.info(f"[USER_SERVICE] Is early backer check result: {is_early_backer} for wallet {wallet_address}")
 
                 logger.info(f"[USER_SERVICE] Creating new user object with telegram_id={telegram_id}, is_early_backer={is_early_backer}")
                 user = User(
@@ -134,6 +131,11 @@ class UserService:
             
             logger.info("[USER_SERVICE] Adding user to session")
             self.session.add(user)
+
+            if is_early_backer:
+                # Flush to get user id for the ledger entry, committed together with the user
+                await self.session.flush()
+                await PointsService(self.session).record(user.id, "early_backer", EARLY_BACKER_BONUS, "early_backer")
             
             logger.info("[USER_SERVICE] Committing session")
             await self.session.commit()
@@ -170,9 +172,12 @@ class UserService:
             return None
 
     async def get_user_by_wallet_address(self, wallet_address: str) -> Optional[User]:
-        """Get user by wallet address"""
+        """Get user by wallet address in any form (stored addresses are canonical, unique index lookup)"""
+        canonical = normalize_address(wallet_address)
+        if canonical is None:
+            return None
         result = await self.session.execute(
-            select(User).where(User.wallet_address == wallet_address)
+            select(User).where(User.wallet_address == canonical)
         )
         return result.scalar_one_or_none()
 
@@ -288,6 +293,8 @@ class UserService:
         invite.used_by_id = user.id
         invite.used_at = utc_now()
         user.registration_phase = 'active'  # Set registration phase to active when invite code is used
+        # Credit the inviter in the same transaction; ref makes a retried redemption a no-op
+        await PointsService(self.session).record(invite.creator_id, "invite", POINTS_PER_INVITE, f"invite:{invite.id}")
 
         try:
             await self.session.commit()
@@ -297,7 +304,7 @@ class UserService:
             return False
 
     async def get_user_stats(self, user: User) -> Dict:
-        """Get user statistics"""
+        """Get user statistics, points are read from materialized user_points"""
         # Count successful invites
         result = await self.session.execute(
             select(func.count(InviteCode.id))
@@ -310,25 +317,20 @@ class UserService:
         codes = await self.generate_invite_codes(user)
         available_invites = await self.get_available_invites(user)
 
-        # Calculate points
-        holding_points = 420  # Placeholder
-        points_per_invite = 420
-        invite_points = total_invites * points_per_invite
-        early_backer_bonus = 4200 if user.is_early_backer else 0
-
-        total_points = holding_points + invite_points + early_backer_bonus
+        # Points maintained by points_ledger
+        points = await PointsService(self.session).get_user_points(user.id)
 
         return {
-            'points': total_points,
+            'points': points['total'],
             'total_invites': total_invites,
             'available_invites': available_invites,
             'registration_date': user.registration_date.isoformat(),
             'points_breakdown': {
-                'holding': holding_points,
-                'invites': invite_points,
-                'early_backer_bonus': early_backer_bonus
+                'holding': points['holding'],
+                'invites': points['invites'],
+                'early_backer_bonus': points['early_backer_bonus']
             },
-            'points_per_invite': points_per_invite,
+            'points_per_invite': POINTS_PER_INVITE,
             'invite_codes': codes,
             'max_invite_slots': user.max_invite_slots,
             'ignore_slot_reset': user.ignore_slot_reset
@@ -545,12 +547,12 @@ class UserService:
 
     async def create_threads_campaign_entry(self, telegram_id: int, text: str) -> tuple[bool, str]:
         """
-        Create threads campaign entry for user
+        Create threads campaign entry for user, queued for the analysis workers
+        (profile fetch, analysis and delivery run in services/threads_job_queue.py)
         Returns: (success, error_code)
-        error_code: None if success, 'invalid_format' or 'not_found' if failed
+        error_code: None if success, 'invalid_format' if failed
         """
         from models.threads_job_campaign import ThreadsJobCampaign
-        from services.threads_service import ThreadsService
         
         logger.debug(f"Starting create_threads_campaign_entry for telegram_id={telegram_id}, text='{text}'")
         
@@ -568,16 +570,6 @@ class UserService:
             return False, 'invalid_format'
         logger.debug(f"Extracted username: {username}")
             
-        # Get user data and posts
-        threads_service = ThreadsService()
-        threads_data = await threads_service.get_user_data(username)
-        if not threads_data:
-            logger.debug(f"Threads profile not found for username: {username}")
-            return False, 'not_found'
-        
-        user_id = threads_data['user']['data']['user']['id']
-        logger.debug(f"Found Threads user_id: {user_id}")
-            
         try:
             # Delete any existing campaign entry for this user
             existing_campaign = await ThreadsJobCampaign.get_by_telegram_id(self.session, telegram_id)
@@ -586,12 +578,11 @@ class UserService:
                 await self.session.delete(existing_campaign)
                 await self.session.commit()
             
-            # Create new campaign entry with posts data
+            # Create new queued campaign entry
             campaign = ThreadsJobCampaign(
                 user_id=user.id,
                 threads_username=username,
-                threads_user_id=user_id,
-                posts_json=json.dumps(threads_data, ensure_ascii=False)  # Store full response
+                job_status='queued'
             )
             
             logger.debug(f"Attempting to save campaign entry: user_id={user.id}, threads_username={username}")
@@ -672,44 +663,20 @@ class UserService:
         logger.debug(f"Successfully validated username: {username}")
         return username
 
-    async def analyze_threads_profile(self, telegram_id: int) -> bool:
-        """Analyze user's Threads profile"""
-        try:
-            # Get campaign entry
-            campaign = await self.get_threads_campaign_entry(telegram_id)
-            if not campaign:
-                logger.error(f"No campaign entry found for user {telegram_id}")
-                return False
-
-            # Get user language
-            language = await self.get_user_language(telegram_id)
-            
-            # Initialize threads service
-            threads_service = ThreadsService()
-
-            # If we have posts but no analysis, resume analysis
-            if campaign.posts_json and not campaign.analysis_report:
-                logger.info(f"Resuming analysis for user {telegram_id} with existing posts")
-                threads_data = json.loads(campaign.posts_json)
-                posts = threads_service.extract_posts_from_json(threads_data)
-                analysis_report = await self.llm_service.analyze_threads_profile(posts, telegram_id, language)
-                if analysis_report:
-                    campaign.analysis_report = json.dumps(analysis_report, ensure_ascii=False)
-                    await self.session.commit()
-                    return True
-                return False
-            
-            # If we have both posts and analysis, just send the formatted report
-            if campaign.posts_json and campaign.analysis_report:
-                logger.info(f"Sending existing analysis for user {telegram_id}")
-                analysis_report = json.loads(campaign.analysis_report)
-                await self.llm_service.send_analysis_to_user(telegram_id, analysis_report, language)
-                return True
-
-            # This should never happen since we now get posts data during campaign creation
-            logger.error(f"Campaign found without posts_json for user {telegram_id}")
-            return False
-
-        except Exception as e:
-            logger.error(f"Error in analyze_threads_profile: {e}")
-            return False
\ No newline at end of file
+    async def get_report_parts(self, campaign, language: str) -> List[str]:
+        """Rendered analysis message parts in language, rendered and stored on first use"""
+        parts = (campaign.report_parts or {}).get(language)
+        if parts:
+            return parts
+        parts = self.llm_service.render_report_parts(json.loads(campaign.analysis_report), language)
+        campaign.report_parts = {**(campaign.report_parts or {}), language: parts}
+        await self.session.commit()
+        return parts
+
+    async def requeue_threads_job(self, campaign) -> None:
+        """Queue a failed threads analysis job again with a fresh attempt budget"""
+        campaign.job_status = 'queued'
+        campaign.attempts = 0
+        campaign.last_error = None
+        campaign.run_after = datetime.now(timezone.utc)
+        await self.session.commit()
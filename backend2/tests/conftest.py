@@ -0,0 +1,7 @@
+import os
+
+# Settings required by core.config; tests never reach Telegram or the database
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test")
+os.environ.setdefault("BACKEND_URL", "http://localhost")
+os.environ.setdefault("FRONTEND_URL", "http://localhost")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
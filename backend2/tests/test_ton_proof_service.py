@@ -0,0 +1,21 @@
+import nacl.signing
+
+from bench_ton_proof import make_proof
+from services.ton_proof_service import TonProofService
+
+
+def test_valid_proof_is_accepted():
+    assert TonProofService.check_proof(make_proof("payload"))
+
+
+def test_foreign_public_key_is_rejected():
+    # Correctly signed, but with a fresh key instead of the wallet's own
+    forged = make_proof("payload", signing_key=nacl.signing.SigningKey.generate())
+    assert not TonProofService.check_proof(forged)
+
+
+def test_foreign_state_init_is_rejected():
+    # Valid proof of one wallet presented for another wallet's address
+    proof = make_proof("payload")
+    proof["address"] = make_proof("payload")["address"]
+    assert not TonProofService.check_proof(proof)
@@ -0,0 +1,207 @@
+"""
+Local fake of the toncenter v3 API for running the holder ingester without network.
+
+Serves holders from holders.tsv (the last snapshot produced by get_holders.py), TON
+balances and transactions for TonClient:
+    python -m utils.fake_toncenter --port 8081 --rate-limit 5 --latency 0.2
+    TONCENTER_API_URL=http://localhost:8081/api/v3 python get_holders.py
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+DEFAULT_HOLDERS_FILE = Path(__file__).resolve().parent.parent / "holders.tsv"  # Snapshot shipped with the repo
+
+def load_holders(path: Path) -> List[Dict]:
+    """Load holder rows from TSV snapshot sorted by balance desc"""
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+    rows.sort(key=lambda row: int(row["balance"]), reverse=True)
+    return rows
+
+class FakeToncenter:
+    """In-memory toncenter with optional latency and per-second request limit"""
+
+    def __init__(self, holders: List[Dict], rate_limit: Optional[float] = None, latency: float = 0.0):
+        """
+        Args:
+            holders (List[Dict]): Holder rows as in holders.tsv
+            rate_limit (float): Requests per second before answering 429, None for unlimited
+            latency (float): Delay added to every response in seconds
+        """
+        self.holders = holders
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.transfers: List[Dict] = []  # Simulated jetton transfers, see transfer()
+        self.accounts: Dict[str, int] = {}  # Raw address -> TON balance in nanotons, see set_account()
+        self._lt = max((int(row["last_transaction_lt"]) for row in holders), default=0)  # Last issued logical time
+        self.requests = 0  # Total requests served, including throttled ones
+        self.throttled = 0  # Requests answered with 429
+        self._window_start = time.monotonic()  # Start of the current one-second window
+        self._window_count = 0  # Requests in the current window
+
+    def _throttle(self) -> bool:
+        """Count request in the current one-second window, True if over the limit"""
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+        return self.rate_limit is not None and self._window_count > self.rate_limit
+
+    def transfer(self, source: str, destination: str, amount: int):
+        """
+        Simulate a jetton transfer between owners (raw addresses): moves balance,
+        advances last_transaction_lt of both wallets and records the transfer
+        """
+        by_owner = {row["owner"]: row for row in self.holders}
+        source_row = by_owner[source]
+        destination_row = by_owner.get(destination)
+        if destination_row is None:
+            destination_row = {
+                **source_row, "address": f"0:{len(self.holders):064X}", "owner": destination,
+                "owner_friendly": destination, "wallet_friendly": f"0:{len(self.holders):064X}", "balance": "0"
+            }
+            self.holders.append(destination_row)
+
+        self._lt += 2
+        source_row["balance"] = str(int(source_row["balance"]) - amount)
+        source_row["last_transaction_lt"] = str(self._lt - 1)
+        destination_row["balance"] = str(int(destination_row["balance"]) + amount)
+        destination_row["last_transaction_lt"] = str(self._lt)
+        self.holders.sort(key=lambda row: int(row["balance"]), reverse=True)
+        self.transfers.append({
+            "source": source, "destination": destination, "source_wallet": source_row["address"],
+            "amount": str(amount), "jetton_master": source_row["jetton"], "transaction_lt": str(self._lt - 1),
+            "transaction_hash": hashlib.sha256(str(self._lt - 1).encode()).hexdigest()
+        })
+
+    def set_account(self, address: str, balance: int):
+        """Set TON balance (nanotons) of a raw address"""
+        self.accounts[address.upper()] = balance
+
+    async def _before_response(self) -> Optional[web.Response]:
+        """Apply rate limit and latency, returns 429 response when throttled"""
+        self.requests += 1
+        if self._throttle():
+            self.throttled += 1
+            return web.json_response({"error": "Ratelimit exceed"}, status=429, headers={"Retry-After": "1"})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return None
+
+    async def jetton_wallets(self, request: web.Request) -> web.Response:
+        """GET /api/v3/jetton/wallets with limit/offset pagination and owner_address filter"""
+        throttled = await self._before_response()
+        if throttled:
+            return throttled
+
+        limit = min(int(request.query.get("limit", 10)), 1000)
+        offset = int(request.query.get("offset", 0))
+        rows = [row for row in self.holders if int(row["balance"]) > 0]
+        owners = set(request.query.getall("owner_address", []))
+        if owners:
+            rows = [row for row in rows if row["owner"] in owners or row["owner_friendly"] in owners]
+        page = rows[offset:offset + limit]
+        wallets = [
+            {
+                "address": row["address"],
+                "balance": row["balance"],
+                "owner": row["owner"],
+                "jetton": row["jetton"],
+                "last_transaction_lt": row["last_transaction_lt"],
+                "code_hash": row["code_hash"],
+                "data_hash": row["data_hash"]
+            }
+            for row in page
+        ]
+        address_book = {}
+        for row in page:
+            address_book[row["address"]] = {"user_friendly": row["wallet_friendly"]}
+            address_book[row["owner"]] = {"user_friendly": row["owner_friendly"]}
+        return web.json_response({"jetton_wallets": wallets, "address_book": address_book})
+
+    async def jetton_transfers(self, request: web.Request) -> web.Response:
+        """GET /api/v3/jetton/transfers from start_lt in lt order"""
+        throttled = await self._before_response()
+        if throttled:
+            return throttled
+
+        limit = min(int(request.query.get("limit", 10)), 1000)
+        offset = int(request.query.get("offset", 0))
+        start_lt = int(request.query.get("start_lt", 0))
+        rows = [transfer for transfer in self.transfers if int(transfer["transaction_lt"]) >= start_lt]
+        return web.json_response({"jetton_transfers": rows[offset:offset + limit]})
+
+    async def account_states(self, request: web.Request) -> web.Response:
+        """GET /api/v3/accountStates for repeated address params; unknown addresses are nonexistent"""
+        throttled = await self._before_response()
+        if throttled:
+            return throttled
+
+        accounts = []
+        for address in request.query.getall("address", []):
+            balance = self.accounts.get(address.upper())
+            accounts.append({
+                "address": address.upper(),
+                "balance": str(balance or 0),
+                "status": "active" if balance is not None else "nonexist"
+            })
+        return web.json_response({"accounts": accounts, "address_book": {}})
+
+    async def transactions(self, request: web.Request) -> web.Response:
+        """GET /api/v3/transactions?hash= for simulated transfers"""
+        throttled = await self._before_response()
+        if throttled:
+            return throttled
+
+        tx_hash = request.query.get("hash")
+        rows = [
+            {"hash": transfer["transaction_hash"], "lt": transfer["transaction_lt"], "description": {"aborted": False}}
+            for transfer in self.transfers if transfer["transaction_hash"] == tx_hash
+        ]
+        return web.json_response({"transactions": rows, "address_book": {}})
+
+    async def simulate_account(self, request: web.Request) -> web.Response:
+        """POST /_fake/account {"address", "balance"} to set a TON balance"""
+        body = await request.json()
+        self.set_account(body["address"], int(body["balance"]))
+        return web.json_response({"ok": True})
+
+    async def simulate_transfer(self, request: web.Request) -> web.Response:
+        """POST /_fake/transfer {"source", "destination", "amount"} to drive delta sync"""
+        body = await request.json()
+        self.transfer(body["source"], body["destination"], int(body["amount"]))
+        return web.json_response({"ok": True, "lt": self._lt})
+
+    def make_app(self) -> web.Application:
+        """Build aiohttp application with toncenter routes"""
+        app = web.Application()
+        app.router.add_get("/api/v3/jetton/wallets", self.jetton_wallets)
+        app.router.add_get("/api/v3/jetton/transfers", self.jetton_transfers)
+        app.router.add_get("/api/v3/accountStates", self.account_states)
+        app.router.add_get("/api/v3/transactions", self.transactions)
+        app.router.add_post("/_fake/transfer", self.simulate_transfer)
+        app.router.add_post("/_fake/account", self.simulate_account)
+        return app
+
+def main():
+    """Run fake toncenter server"""
+    parser = argparse.ArgumentParser(description="Fake toncenter v3 API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--holders", type=Path, default=DEFAULT_HOLDERS_FILE)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before 429")
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    args = parser.parse_args()
+
+    fake = FakeToncenter(load_holders(args.holders), rate_limit=args.rate_limit, latency=args.latency)
+    web.run_app(fake.make_app(), port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 import os
+import asyncio
 import logging
+import time
 import aiohttp
 import unicodedata
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+MAX_MESSAGE_LENGTH = 4000  # Telegram allows 4096, leave some room for formatting
+
 def get_visual_width(s: str) -> int:
     """Get visual width of string considering wide characters"""
     width = 0
@@ -55,21 +60,21 @@ async def send_telegram_message(telegram_id: int, text: str, **kwargs) -> bool:
         logger.error(f"Error sending message: {e}")
         return False
 
-async def split_and_send_message(telegram_id: int, text: str, **kwargs) -> bool:
-    """Split long message and send parts"""
-    MAX_LENGTH = 4000  # Leave some room for formatting
-    
-    # If message is short enough, send as is
-    if len(text) <= MAX_LENGTH:
-        return await send_telegram_message(telegram_id=telegram_id, text=text, **kwargs)
-    
-    # Split message into parts
+def split_message(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split text into parts of at most max_length, breaking at line ends where possible"""
     parts = []
     current_part = ""
     
     for line in text.split("\n"):
+        # Hard-wrap single lines longer than a whole message
+        while len(line) > max_length:
+            if current_part:
+                parts.append(current_part)
+                current_part = ""
+            parts.append(line[:max_length])
+            line = line[max_length:]
         # If adding this line would exceed max length
-        if len(current_part) + len(line) + 1 > MAX_LENGTH:
+        if len(current_part) + len(line) + 1 > max_length:
             # If current part is not empty, add it to parts
             if current_part:
                 parts.append(current_part)
@@ -81,11 +86,152 @@ async def split_and_send_message(telegram_id: int, text: str, **kwargs) -> bool:
     # Add last part if not empty
     if current_part:
         parts.append(current_part)
+    return parts
+
+async def split_and_send_message(telegram_id: int, text: str, **kwargs) -> bool:
+    """Split long message and send parts"""
+    # If message is short enough, send as is
+    if len(text) <= MAX_MESSAGE_LENGTH:
+        return await send_telegram_message(telegram_id=telegram_id, text=text, **kwargs)
     
-    # Send all parts
+    return await send_message_parts(telegram_id, split_message(text), **kwargs)
+
+async def send_message_parts(telegram_id: int, parts: List[str], **kwargs) -> bool:
+    """Send pre-split message parts in order"""
     success = True
     for part in parts:
         if not await send_telegram_message(telegram_id=telegram_id, text=part, **kwargs):
             success = False
     
-    return success 
\ No newline at end of file
+    return success
+
+async def call_telegram_api(method: str, data: Dict) -> Optional[Dict]:
+    """
+    Call Bot API method through the pooled upstream session.
+    Waits out one 429 using retry_after. Returns the result or None on error.
+    """
+    from core.upstream import get_http_session
+
+    bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not bot_token:
+        logger.error("TELEGRAM_BOT_TOKEN not set")
+        return None
+
+    url = f"https://api.telegram.org/bot{bot_token}/{method}"
+    for attempt in range(2):
+        try:
+            async with get_http_session().post(url, json=data) as response:
+                body = await response.json(content_type=None)
+        except Exception as e:
+            logger.error(f"Telegram {method} failed: {e}")
+            return None
+        if body.get("ok"):
+            return body["result"]
+        retry_after = body.get("parameters", {}).get("retry_after")
+        if response.status == 429 and retry_after and attempt == 0:
+            await asyncio.sleep(retry_after)
+            continue
+        # Editing to the same text is not an error for callers
+        if "message is not modified" in body.get("description", ""):
+            return {}
+        logger.error(f"Telegram {method} error: {body.get('description')}")
+        return None
+    return None
+
+class TelegramStreamWriter:
+    """
+    Shows text to a user while it is being generated: sends a message on the first chunk,
+    then edits it with the accumulated text at most every min_interval seconds (Telegram
+    rate-limits edits). Text beyond the length limit rolls over into a new message.
+    Streamed text is plain; finish() replaces it with the final formatted text.
+    """
+
+    def __init__(self, telegram_id: int, min_interval: float = 1.5, max_length: int = MAX_MESSAGE_LENGTH):
+        """
+        Args:
+            telegram_id (int): Chat to stream into
+            min_interval (float): Min seconds between edits
+            max_length (int): Message length that triggers rollover
+        """
+        self.telegram_id = telegram_id
+        self.min_interval = min_interval
+        self.max_length = max_length
+        self.message_ids: List[int] = []  # Sent messages, the last one is being edited
+        self._text = ""  # Text of the message being edited, including not yet shown chunks
+        self._shown = ""  # Text of the last message as the user sees it
+        self._last_edit = 0.0  # Monotonic time of the last send or edit
+
+    @property
+    def started(self) -> bool:
+        """Whether anything was shown to the user"""
+        return bool(self.message_ids)
+
+    async def append(self, chunk: str):
+        """Add generated text; flushes when the throttle interval has passed"""
+        if not chunk:
+            return
+        self._text += chunk
+        while len(self._text) > self.max_length:
+            # Close the current message at the last line break and continue in a new one
+            cut = self._text.rfind("\n", 0, self.max_length)
+            cut = cut if cut > 0 else self.max_length
+            head, self._text = self._text[:cut], self._text[cut:].lstrip("\n")
+            await self._show(head)
+            self.message_ids.append(None)  # Next flush sends a new message
+            self._shown = ""
+        if time.monotonic() - self._last_edit >= self.min_interval:
+            await self._show(self._text)
+
+    async def flush(self):
+        """Show all appended text now"""
+        await self._show(self._text)
+
+    async def _show(self, text: str):
+        """Send or edit the current message to show text"""
+        if not text.strip() or text == self._shown:
+            return
+        self._last_edit = time.monotonic()
+        if not self.message_ids or self.message_ids[-1] is None:
+            result = await call_telegram_api("sendMessage", {"chat_id": self.telegram_id, "text": text})
+            if result is None:
+                return
+            if self.message_ids:
+                self.message_ids[-1] = result["message_id"]
+            else:
+                self.message_ids.append(result["message_id"])
+        else:
+            result = await call_telegram_api("editMessageText", {
+                "chat_id": self.telegram_id, "message_id": self.message_ids[-1], "text": text
+            })
+            if result is None:
+                return
+        self._shown = text
+
+    async def discard(self):
+        """Delete streamed messages, so a retry doesn't leave a truncated draft next to the new one"""
+        for message_id in self.message_ids:
+            if message_id is not None:
+                await call_telegram_api("deleteMessage", {"chat_id": self.telegram_id, "message_id": message_id})
+        self.message_ids = []
+        self._text = ""
+        self._shown = ""
+
+    async def finish(self, parts: List[str], **kwargs) -> bool:
+        """
+        Replace streamed messages with final message parts (e.g. HTML formatted, see
+        split_message): edits sent messages in place, sends extra parts and deletes
+        messages no longer needed
+        """
+        message_ids = [message_id for message_id in self.message_ids if message_id is not None]
+        success = True
+        for i, part in enumerate(parts):
+            if i < len(message_ids):
+                result = await call_telegram_api("editMessageText", {
+                    "chat_id": self.telegram_id, "message_id": message_ids[i], "text": part, **kwargs
+                })
+            else:
+                result = await call_telegram_api("sendMessage", {"chat_id": self.telegram_id, "text": part, **kwargs})
+            success = success and result is not None
+        for message_id in message_ids[len(parts):]:
+            await call_telegram_api("deleteMessage", {"chat_id": self.telegram_id, "message_id": message_id})
+        return success
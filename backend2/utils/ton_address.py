@@ -0,0 +1,56 @@
+"""
+TON address forms and normalization on top of tonsdk's Address.
+
+Canonical form is raw uppercase "0:ABC..." as used by toncenter and jetton_holders.owner.
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+
+from tonsdk.utils import Address, InvalidAddressError
+
+def parse_address(address: Optional[str]) -> Optional[Address]:
+    """
+    Parse raw ("0:abc...", any case) or user-friendly (standard or url-safe base64) address;
+    tonsdk checks the CRC16 of friendly forms and accepts only workchains 0 and -1.
+    Returns:
+        Optional[Address]: Parsed address, None if not a valid address
+    """
+    if not address:
+        return None
+    address = address.strip()
+    if ":" not in address:
+        # tonsdk detects url-safe input only past the first character
+        address = address.replace("-", "+").replace("_", "/")
+    try:
+        return Address(address)
+    except (InvalidAddressError, ValueError):
+        return None
+
+@lru_cache(maxsize=65536)
+def normalize_address(address: Optional[str]) -> Optional[str]:
+    """
+    Canonical raw uppercase form of an address in any form, None if invalid.
+    Cached: the same wallets are normalized on every leaderboard rebuild and holder sync.
+    """
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    return f"{parsed.wc}:{parsed.hash_part.hex().upper()}"
+
+def to_friendly(address: str, bounceable: bool = True, testnet: bool = False, url_safe: bool = True) -> Optional[str]:
+    """User-friendly form of an address in any form, None if invalid"""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    return parsed.to_string(True, is_url_safe=url_safe, is_bounceable=bounceable, is_test_only=testnet)
+
+def address_forms(address: str) -> Optional[Dict[str, str]]:
+    """Raw, bounceable and non-bounceable forms of an address, None if invalid"""
+    raw = normalize_address(address)
+    if raw is None:
+        return None
+    return {
+        "raw": raw,
+        "bounceable": to_friendly(raw, bounceable=True),
+        "non_bounceable": to_friendly(raw, bounceable=False)
+    }
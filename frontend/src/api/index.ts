@@ -73,10 +73,17 @@ export class ApiService {
             if (!telegram_id) {
                 throw new Error('No Telegram ID found');
             }
+            const { timestamp, domain, payload, signature, state_init, public_key } = data.proof;
+            if (!signature || !state_init || !public_key) {
+                throw new Error('Wallet did not provide a ton_proof');
+            }
+            // Signed ton_proof item proves wallet ownership to the backend
             const response = await this.axiosInstance.post('/ton-connect/proof', {
                 telegram_id,
                 wallet_address: data.address,
-                payload: data.proof.payload
+                payload,
+                proof: { timestamp, domain, payload, signature, state_init },
+                public_key
             });
             const result = this.handleResponse<{ success: boolean }>(response);
             if (result.success) {
@@ -90,10 +90,8 @@ export function TonConnect() {
                 try {
                     const proof: TonProofPayload = {
                         type: 'ton_proof' as const,
-                        domain: {
-                            lengthBytes: 25,
-                            value: new URL(import.meta.env.VITE_FRONTEND_URL).host
-                        },
+                        // Domain exactly as the wallet signed it
+                        domain: w.connectItems.tonProof.proof.domain,
                         timestamp: w.connectItems.tonProof.proof.timestamp,
                         payload: w.connectItems.tonProof.proof.payload,
                         signature: w.connectItems.tonProof.proof.signature,